@@ -1,4 +1,5 @@
 ﻿from functools import lru_cache
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -14,14 +15,78 @@ class Settings(BaseSettings):
     openai_api_key: str | None = Field(default=None)
     mongo_uri: str | None = Field(default=None)
     database_name: str = Field(default="ai_note_assistant")
+    mongo_max_pool_size: int = Field(default=100)
+    mongo_min_pool_size: int = Field(default=0)
+    mongo_max_idle_time_ms: int | None = Field(default=None)
+    mongo_wait_queue_timeout_ms: int | None = Field(default=None)
+    mongo_connect_timeout_ms: int = Field(default=20000)
+    mongo_server_selection_timeout_ms: int = Field(default=30000)
+    mongo_socket_timeout_ms: int | None = Field(default=None)
+    mongo_compressors: str | None = Field(default=None)
+    mongo_pool_monitoring: bool = Field(default=True)
     jwt_secret: str | None = Field(default=None)
     jwt_algorithm: str = Field(default="HS256")
     jwt_expire_minutes: int = Field(default=60)
+    admin_emails: str = Field(default="")
+    metrics_token: str | None = Field(default=None)
+    password_hash_rounds: int = Field(default=12)
+    password_hash_workers: int = Field(default=2)
+    auth_cache_enabled: bool = Field(default=True)
+    auth_token_cache_size: int = Field(default=4096)
+    auth_user_cache_size: int = Field(default=1024)
+    auth_user_cache_ttl_seconds: int = Field(default=60)
     s3_bucket: str | None = Field(default=None)
     s3_access_key: str | None = Field(default=None)
     s3_secret_key: str | None = Field(default=None)
     whisper_model_size: str = Field(default="base")
+    whisper_backend: Literal["thread", "process"] = Field(default="thread")
+    whisper_preload: bool = Field(default=True)
+    whisper_default_tier: Literal["fast", "balanced", "accurate", "auto"] = Field(
+        default="balanced"
+    )
+    whisper_fast_model: str = Field(default="tiny")
+    whisper_accurate_model: str = Field(default="small")
+    whisper_auto_fast_max_seconds: float = Field(default=120.0)
+    whisper_auto_accurate_min_seconds: float = Field(default=1200.0)
+    whisper_model_memory_mb: int = Field(default=2048)
+    whisper_process_workers: int = Field(default=2)
+    whisper_torch_threads: int | None = Field(default=None)
+    whisper_segmenting: bool = Field(default=False)
+    whisper_segment_max_seconds: float = Field(default=120.0)
+    whisper_segment_overlap_seconds: float = Field(default=1.0)
+    transcription_cache_enabled: bool = Field(default=True)
+    transcription_cache_size: int = Field(default=256)
+    transcription_cache_ttl_seconds: int = Field(default=30 * 24 * 3600)
+    upload_chunk_size: int = Field(default=1024 * 1024)
+    max_upload_bytes: int = Field(default=512 * 1024 * 1024)
+    upload_spool_dir: str | None = Field(default=None)
+    audio_memmap_min_seconds: float = Field(default=600.0)
+    audio_trim_silence: bool = Field(default=True)
+    audio_silence_threshold_db: float = Field(default=-45.0)
+    audio_silence_padding_seconds: float = Field(default=0.3)
+    audio_decode_workers: int = Field(default=2)
+    transcription_workers: int = Field(default=2)
+    transcription_queue_limit: int = Field(default=100)
+    transcription_retry_after_seconds: int = Field(default=30)
+    transcription_poll_interval_seconds: float = Field(default=2.0)
+    transcription_job_timeout_seconds: int = Field(default=3600)
+    transcription_job_heartbeat_seconds: float = Field(default=30.0)
+    transcription_job_ttl_seconds: int = Field(default=7 * 24 * 3600)
     openai_model: str = Field(default="gpt-4o-mini")
+    summary_chunk_tokens: int = Field(default=8000)
+    summary_chunk_overlap_tokens: int = Field(default=200)
+    summary_max_concurrency: int = Field(default=4)
+    summary_batch_concurrency: int = Field(default=4)
+    summary_batch_max_items: int = Field(default=500)
+    summary_batch_max_retries: int = Field(default=3)
+    summary_batch_backoff_seconds: float = Field(default=1.0)
+    summary_cache_enabled: bool = Field(default=True)
+    summary_cache_size: int = Field(default=512)
+    summary_cache_ttl_seconds: int = Field(default=7 * 24 * 3600)
+    embedding_backend: Literal["hashing", "openai"] = Field(default="hashing")
+    embedding_model: str = Field(default="text-embedding-3-small")
+    embedding_dimensions: int = Field(default=256)
+    search_index_cache_size: int = Field(default=256)
 
 
 @lru_cache
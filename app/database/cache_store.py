@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import logging
+from datetime import UTC, datetime
+from typing import Any, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, IndexModel
+
+from app.config import get_settings
+from app.database.mongodb import get_database
+from app.utils.cache import LRUCache, register_stats
+
+logger = logging.getLogger(__name__)
+
+
+class TieredCache:
+    """An in-process LRU in front of a MongoDB collection whose TTL index expires entries.
+
+    The MongoDB tier is skipped when no database is configured, and its failures are logged
+    rather than raised: a cache must never fail the operation it is accelerating.
+    """
+
+    def __init__(self, name: str, collection_name: str, *, maxsize: int, ttl_seconds: int) -> None:
+        self.name = name
+        self.collection_name = collection_name
+        self.ttl_seconds = ttl_seconds
+        self.memory: LRUCache[str, Dict[str, Any]] = LRUCache(name, maxsize)
+        self.store_counters = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+        register_stats(f"{name}_store", lambda: dict(self.store_counters))
+
+    def _collection(self) -> AsyncIOMotorCollection:
+        return get_database()[self.collection_name]
+
+    def index_models(self) -> list[IndexModel]:
+        return [IndexModel([("created_at", ASCENDING)], expireAfterSeconds=self.ttl_seconds)]
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached
+
+        if not get_settings().mongo_uri:
+            return None
+
+        try:
+            document = await self._collection().find_one({"_id": key}, {"_id": 0, "created_at": 0})
+        except Exception as exc:  # pragma: no cover - depends on database availability
+            self.store_counters["errors"] += 1
+            logger.warning("%s cache lookup failed: %s", self.name, exc)
+            return None
+
+        if document is None:
+            self.store_counters["misses"] += 1
+            return None
+
+        self.store_counters["hits"] += 1
+        self.memory.set(key, document)
+        return document
+
+    async def put(self, key: str, payload: Dict[str, Any]) -> None:
+        self.memory.set(key, payload)
+        if not get_settings().mongo_uri:
+            return
+
+        document = {**payload, "created_at": datetime.now(UTC)}
+        try:
+            await self._collection().replace_one({"_id": key}, document, upsert=True)
+        except Exception as exc:  # pragma: no cover - depends on database availability
+            self.store_counters["errors"] += 1
+            logger.warning("%s cache write failed: %s", self.name, exc)
+            return
+        self.store_counters["writes"] += 1
+
+    def clear_memory(self) -> None:
+        self.memory.clear()
@@ -0,0 +1,220 @@
+"""Declared MongoDB indexes, created and verified at startup.
+
+Services register the indexes their queries rely on with ``register_indexes``; the application
+lifespan calls ``ensure_all_indexes`` once. Run ``python -m app.database.indexes --explain`` to
+print the query plans of the hot queries and spot collection scans.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from app.database.mongodb import get_database
+
+logger = logging.getLogger(__name__)
+
+_index_providers: Dict[str, List[Callable[[], Sequence[IndexModel]]]] = {}
+
+# Options that make two indexes on the same key different; other options (e.g. background) are
+# build hints and are not compared. MongoDB reports the text fields of any index as the same
+# key, so they are told apart by their weights.
+_COMPARED_OPTIONS = (
+    "unique",
+    "sparse",
+    "expireAfterSeconds",
+    "partialFilterExpression",
+    "weights",
+)
+
+# MongoDB error codes for an index that already exists under different options or name.
+_INDEX_CONFLICT_CODES = (85, 86)
+
+
+def register_indexes(collection_name: str, provider: Callable[[], Sequence[IndexModel]]) -> None:
+    """Declare indexes for a collection; ``provider`` is called when indexes are ensured."""
+    _index_providers.setdefault(collection_name, []).append(provider)
+
+
+def declared_indexes() -> Dict[str, List[IndexModel]]:
+    return {
+        name: [model for provider in providers for model in provider()]
+        for name, providers in sorted(_index_providers.items())
+    }
+
+
+def _normalise_key(key: Any) -> Tuple[Tuple[str, Any], ...]:
+    items = list(key.items() if hasattr(key, "items") else key)
+    if not any(direction == "text" for _, direction in items):
+        return tuple((name, int(direction)) for name, direction in items)
+
+    # MongoDB reports the text fields of any index as ``_fts``/``_ftsx``, whatever they are;
+    # the ordinary fields before and after them are kept.
+    prefix: List[Tuple[str, Any]] = []
+    suffix: List[Tuple[str, Any]] = []
+    in_text = False
+    for name, direction in items:
+        if direction == "text" or name == "_ftsx":
+            in_text = True
+        else:
+            (suffix if in_text else prefix).append((name, int(direction)))
+    return (*prefix, ("_fts", "text"), ("_ftsx", 1), *suffix)
+
+
+def keys_match(left: Any, right: Any) -> bool:
+    """Whether two index keys, as declared or as reported by MongoDB, are the same."""
+    return _normalise_key(left) == _normalise_key(right)
+
+
+def _expected_options(model: IndexModel) -> Dict[str, Any]:
+    return {name: model.document[name] for name in _COMPARED_OPTIONS if name in model.document}
+
+
+def _actual_options(info: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: info[name] for name in _COMPARED_OPTIONS if name in info and info[name]}
+
+
+async def _sync_ttl(collection_name: str, name: str, expire_after: int) -> None:
+    """Update an existing TTL index in place; changing the TTL needs no rebuild."""
+    await get_database().command(
+        "collMod", collection_name, index={"name": name, "expireAfterSeconds": expire_after}
+    )
+    logger.info("Updated TTL of %s.%s to %d seconds", collection_name, name, expire_after)
+
+
+async def ensure_collection_indexes(collection_name: str, models: Sequence[IndexModel]) -> None:
+    """Create ``models`` on a collection and verify the result; safe to run on every start.
+
+    A TTL that differs from the declared one is updated in place. Any other mismatch (e.g. an
+    existing non-unique index where a unique one is declared) raises ``RuntimeError`` rather
+    than leaving the application running without the guarantee it expects.
+    """
+
+    collection = get_database()[collection_name]
+    existing = await collection.index_information()
+    by_key = {_normalise_key(info["key"]): (name, info) for name, info in existing.items()}
+
+    missing: List[IndexModel] = []
+    for model in models:
+        match = by_key.get(_normalise_key(model.document["key"]))
+        if match is None:
+            missing.append(model)
+            continue
+
+        name, info = match
+        expected, actual = _expected_options(model), _actual_options(info)
+        if expected == actual:
+            continue
+        if expected.keys() == actual.keys() == {"expireAfterSeconds"}:
+            await _sync_ttl(collection_name, name, expected["expireAfterSeconds"])
+            continue
+        raise RuntimeError(
+            f"Index {collection_name}.{name} has options {actual}, expected {expected}; "
+            "drop it so it can be recreated."
+        )
+
+    if not missing:
+        return
+
+    try:
+        created = await collection.create_indexes(missing)
+    except OperationFailure as exc:
+        if exc.code in _INDEX_CONFLICT_CODES:
+            raise RuntimeError(f"Conflicting index on {collection_name}: {exc}") from exc
+        if exc.code == 11000:
+            raise RuntimeError(
+                f"Cannot build a unique index on {collection_name}: duplicate values exist."
+            ) from exc
+        raise
+    logger.info("Created indexes on %s: %s", collection_name, ", ".join(created))
+
+
+async def ensure_all_indexes() -> None:
+    for collection_name, models in declared_indexes().items():
+        await ensure_collection_indexes(collection_name, models)
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """A query shape the application runs often, checked with ``explain()`` for index use."""
+
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: List[Tuple[str, int]] = field(default_factory=list)
+    limit: int = 0
+
+
+HOT_QUERIES: Tuple[HotQuery, ...] = (
+    HotQuery("login by email", "users", {"email": "user@example.com"}, limit=1),
+    HotQuery(
+        "list notes",
+        "notes",
+        {"user_id": "user"},
+        [("created_at", DESCENDING), ("_id", DESCENDING)],
+        limit=51,
+    ),
+    HotQuery(
+        "claim transcription job",
+        "transcription_jobs",
+        {"status": "queued"},
+        [("created_at", ASCENDING)],
+        limit=1,
+    ),
+)
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get("stage", "?")]
+    children = plan.get("inputStages") or ([plan["inputStage"]] if "inputStage" in plan else [])
+    for child in children:
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+async def explain_query(query: HotQuery) -> Dict[str, Any]:
+    cursor = get_database()[query.collection].find(query.filter)
+    if query.sort:
+        cursor = cursor.sort(query.sort)
+    if query.limit:
+        cursor = cursor.limit(query.limit)
+    return await cursor.explain()
+
+
+async def explain_hot_queries(queries: Optional[Sequence[HotQuery]] = None) -> Dict[str, List[str]]:
+    """Log the winning plan of each hot query and warn about collection scans or in-memory sorts."""
+    plans: Dict[str, List[str]] = {}
+    for query in queries or HOT_QUERIES:
+        explained = await explain_query(query)
+        winning = explained.get("queryPlanner", {}).get("winningPlan", {})
+        stages = _plan_stages(winning.get("queryPlan", winning))
+        plans[query.name] = stages
+        if "COLLSCAN" in stages or "SORT" in stages:
+            logger.warning("%s: %s", query.name, " <- ".join(stages))
+        else:
+            logger.info("%s: %s", query.name, " <- ".join(stages))
+    return plans
+
+
+async def _main(explain: bool) -> None:
+    # Importing the application registers every service's indexes.
+    import app.main  # noqa: F401
+
+    await ensure_all_indexes()
+    if explain:
+        await explain_hot_queries()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ensure MongoDB indexes and inspect query plans.")
+    parser.add_argument(
+        "--explain", action="store_true", help="log the query plans of the hot queries"
+    )
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    asyncio.run(_main(parser.parse_args().explain))
@@ -0,0 +1,179 @@
+"""Move transcripts stored inline on note documents into the transcript store.
+
+Usage::
+
+    python -m app.database.migrate_transcripts [--batch-size 200] [--dry-run]
+
+Run it once when upgrading, before starting the new version. It also fills in
+``transcript_terms`` on notes split before that field existed, and replaces a ``notes_text``
+index declared over other fields (the inline ``transcript`` or the excerpt) or without the
+``user_id`` prefix with the current one. It is safe to re-run and to interrupt; a note edited while it runs keeps its newer
+transcript.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+
+from app.database.indexes import declared_indexes, ensure_all_indexes, keys_match
+from app.database.mongodb import get_database
+from app.services import search_service, transcript_service
+
+logger = logging.getLogger(__name__)
+
+_NOTES_COLLECTION = "notes"
+_INLINE_QUERY: Dict[str, Any] = {"transcript": {"$type": "string"}}
+_MISSING_TERMS_QUERY: Dict[str, Any] = {
+    "transcript": {"$exists": False},
+    "transcript_length": {"$exists": True},
+    "transcript_terms": {"$exists": False},
+}
+
+
+@dataclass
+class MigrationReport:
+    pending: int = 0
+    migrated: int = 0
+    skipped: int = 0
+    terms_added: int = 0
+    average_size_before: float = 0.0
+    average_size_after: float = 0.0
+
+
+async def average_document_size(collection_name: str = _NOTES_COLLECTION) -> float:
+    """Mean BSON size in bytes of the documents in a collection."""
+    result = (
+        await get_database()[collection_name]
+        .aggregate([{"$group": {"_id": None, "size": {"$avg": {"$bsonSize": "$$ROOT"}}}}])
+        .to_list(length=1)
+    )
+    return float(result[0]["size"]) if result else 0.0
+
+
+async def migrate_note(document: Dict[str, Any]) -> bool:
+    """Move one note's inline transcript out; ``False`` if the note changed meanwhile."""
+    transcript = document["transcript"]
+    # Insert-only: a transcript already saved by a newer edit of the note is left alone.
+    await transcript_service.save(document["_id"], document["user_id"], transcript, overwrite=False)
+    result = await get_database()[_NOTES_COLLECTION].update_one(
+        {"_id": document["_id"], "transcript": transcript},
+        {"$set": transcript_service.note_fields(transcript), "$unset": {"transcript": ""}},
+    )
+    return result.modified_count == 1
+
+
+async def add_terms(note_id: ObjectId, user_id: str) -> bool:
+    """Index the words of a note's stored transcript; ``False`` if there is nothing to add."""
+    transcript = await transcript_service.load(note_id, user_id)
+    if transcript is None:
+        return False
+    result = await get_database()[_NOTES_COLLECTION].update_one(
+        {"_id": note_id, "transcript_terms": {"$exists": False}},
+        {"$set": {"transcript_terms": transcript_service.transcript_terms(transcript)}},
+    )
+    return result.modified_count == 1
+
+
+async def _replace_text_index() -> None:
+    name = search_service.TEXT_INDEX_NAME
+    (declared,) = [
+        model for model in declared_indexes()[_NOTES_COLLECTION] if model.document["name"] == name
+    ]
+    notes = get_database()[_NOTES_COLLECTION]
+    info = (await notes.index_information()).get(name)
+    if info and (
+        info.get("weights") != declared.document["weights"]
+        or not keys_match(info["key"], declared.document["key"])
+    ):
+        await notes.drop_index(name)
+        logger.info("Dropped %s over %s; it is recreated", name, sorted(info.get("weights", {})))
+    await ensure_all_indexes()
+
+
+async def migrate(*, batch_size: int = 200, dry_run: bool = False) -> MigrationReport:
+    notes = get_database()[_NOTES_COLLECTION]
+    report = MigrationReport(
+        pending=await notes.count_documents(_INLINE_QUERY),
+        average_size_before=await average_document_size(),
+    )
+    if dry_run:
+        report.average_size_after = report.average_size_before
+        return report
+
+    # Walking in _id order guarantees progress even when some notes are skipped.
+    last_id: Optional[ObjectId] = None
+    while True:
+        query = dict(_INLINE_QUERY)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = (
+            await notes.find(query, {"user_id": 1, "transcript": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not batch:
+            break
+        for document in batch:
+            if await migrate_note(document):
+                report.migrated += 1
+            else:
+                report.skipped += 1
+        last_id = batch[-1]["_id"]
+        logger.info("Migrated %d of %d transcripts", report.migrated, report.pending)
+
+    last_id = None
+    while True:
+        query = dict(_MISSING_TERMS_QUERY)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = (
+            await notes.find(query, {"user_id": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not batch:
+            break
+        for document in batch:
+            report.terms_added += await add_terms(document["_id"], document["user_id"])
+        last_id = batch[-1]["_id"]
+        logger.info("Indexed the words of %d split transcripts", report.terms_added)
+
+    await _replace_text_index()
+    report.average_size_after = await average_document_size()
+    return report
+
+
+async def _main(batch_size: int, dry_run: bool) -> None:
+    # Importing the application registers every service's indexes.
+    import app.main  # noqa: F401
+
+    report = await migrate(batch_size=batch_size, dry_run=dry_run)
+    logger.info(
+        "%d notes with inline transcripts, %d migrated, %d skipped, %d given search terms; "
+        "average note size %.0f -> %.0f bytes",
+        report.pending,
+        report.migrated,
+        report.skipped,
+        report.terms_added,
+        report.average_size_before,
+        report.average_size_after,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move inline note transcripts to their store.")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only count the notes left to migrate"
+    )
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    arguments = parser.parse_args()
+    asyncio.run(_main(arguments.batch_size, arguments.dry_run))
@@ -1,23 +1,61 @@
-﻿from typing import Optional
+﻿from typing import Any, Dict, Optional
 
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
 
-from app.config import get_settings
+from app.config import Settings, get_settings
+from app.database import pool_monitor
 
 _client: Optional[AsyncIOMotorClient] = None
 
 
+def client_options(settings: Settings) -> Dict[str, Any]:
+    """Pool, timeout and compression options for the client, leaving unset ones to PyMongo."""
+    options: Dict[str, Any] = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+        "waitQueueTimeoutMS": settings.mongo_wait_queue_timeout_ms,
+        "socketTimeoutMS": settings.mongo_socket_timeout_ms,
+        "compressors": settings.mongo_compressors,
+    }
+    options = {name: value for name, value in options.items() if value is not None}
+    if settings.mongo_pool_monitoring:
+        options["event_listeners"] = [pool_monitor.pool_monitor, pool_monitor.command_monitor]
+    return options
+
+
 def get_client() -> AsyncIOMotorClient:
+    """Return the shared client, created by ``connect`` at startup or on first use elsewhere."""
     settings = get_settings()
     if not settings.mongo_uri:
         raise RuntimeError("MONGO_URI is not configured.")
 
     global _client
     if _client is None:
-        _client = AsyncIOMotorClient(settings.mongo_uri)
+        _client = AsyncIOMotorClient(settings.mongo_uri, **client_options(settings))
     return _client
 
 
+async def connect() -> AsyncIOMotorClient:
+    """Create the client and ping the server so the first request does not pay for it."""
+    client = get_client()
+    try:
+        await client.admin.command("ping")
+    except PyMongoError as exc:
+        raise RuntimeError(f"MongoDB is not reachable: {exc}") from exc
+    return client
+
+
+def close() -> None:
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
 def get_database() -> AsyncIOMotorDatabase:
     settings = get_settings()
     client = get_client()
@@ -0,0 +1,192 @@
+"""Connection pool and command metrics collected from PyMongo's monitoring events.
+
+The listeners are registered on the client in ``app.database.mongodb``. PyMongo calls them
+from its own threads, so every counter is guarded by a lock.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from threading import Lock
+from typing import Any, DefaultDict, Dict, List
+
+from pymongo import monitoring
+
+from app.utils import metrics
+from app.utils.cache import register_stats
+from app.utils.metrics import Histogram
+
+
+class _PoolState:
+    def __init__(self) -> None:
+        self.open = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.checkouts = 0
+        self.checkout_failures: Counter[str] = Counter()
+        self.clears = 0
+        self.checkout_wait_ms = Histogram()
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks open and checked-out connections and how long checkouts wait, per server."""
+
+    def __init__(self) -> None:
+        self._pools: DefaultDict[str, _PoolState] = defaultdict(_PoolState)
+        self._lock = Lock()
+
+    def _pool(self, event: Any) -> _PoolState:
+        return self._pools[f"{event.address[0]}:{event.address[1]}"]
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        with self._lock:
+            self._pool(event)
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        with self._lock:
+            self._pool(event).clears += 1
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        with self._lock:
+            self._pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        with self._lock:
+            self._pool(event).open += 1
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        with self._lock:
+            pool = self._pool(event)
+            pool.open = max(pool.open - 1, 0)
+
+    def connection_check_out_started(
+        self, event: monitoring.ConnectionCheckOutStartedEvent
+    ) -> None:
+        pass
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        with self._lock:
+            pool = self._pool(event)
+            pool.checkout_failures[str(event.reason)] += 1
+            pool.checkout_wait_ms.observe(event.duration * 1000)
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        with self._lock:
+            pool = self._pool(event)
+            pool.checkouts += 1
+            pool.in_use += 1
+            pool.max_in_use = max(pool.max_in_use, pool.in_use)
+            pool.checkout_wait_ms.observe(event.duration * 1000)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        with self._lock:
+            pool = self._pool(event)
+            pool.in_use = max(pool.in_use - 1, 0)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                address: {
+                    "open": pool.open,
+                    "in_use": pool.in_use,
+                    "max_in_use": pool.max_in_use,
+                    "checkouts": pool.checkouts,
+                    "checkout_failures": dict(pool.checkout_failures),
+                    "clears": pool.clears,
+                    "checkout_wait_ms": pool.checkout_wait_ms.snapshot(),
+                }
+                for address, pool in sorted(self._pools.items())
+            }
+
+    def totals(self) -> Dict[str, int]:
+        with self._lock:
+            pools = list(self._pools.values())
+            return {
+                "open": sum(pool.open for pool in pools),
+                "in_use": sum(pool.in_use for pool in pools),
+                "checkouts": sum(pool.checkouts for pool in pools),
+                "checkout_failures": sum(sum(pool.checkout_failures.values()) for pool in pools),
+            }
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """Latency histogram and failure count per command name (``find``, ``insert``, ...)."""
+
+    def __init__(self) -> None:
+        self._latency_ms: DefaultDict[str, Histogram] = defaultdict(Histogram)
+        self._failures: Counter[str] = Counter()
+        self._lock = Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        with self._lock:
+            histogram = self._latency_ms[event.command_name]
+        histogram.observe(event.duration_micros / 1000)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        with self._lock:
+            histogram = self._latency_ms[event.command_name]
+            self._failures[event.command_name] += 1
+        histogram.observe(event.duration_micros / 1000)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            histograms = dict(self._latency_ms)
+            failures = dict(self._failures)
+        return {
+            name: {"failures": failures.get(name, 0), "latency_ms": histogram.snapshot()}
+            for name, histogram in sorted(histograms.items())
+        }
+
+
+pool_monitor = PoolMonitor()
+command_monitor = CommandMonitor()
+
+register_stats("mongo_pool", pool_monitor.totals)
+
+
+def snapshot() -> Dict[str, Any]:
+    return {"pools": pool_monitor.snapshot(), "commands": command_monitor.snapshot()}
+
+
+def _prometheus_lines() -> List[str]:
+    pools, commands = pool_monitor.snapshot(), command_monitor.snapshot()
+    lines = [
+        "# HELP mongodb_pool_connections Connections in the pool, by state.",
+        "# TYPE mongodb_pool_connections gauge",
+    ]
+    for address, pool in pools.items():
+        for state in ("open", "in_use"):
+            lines.append(
+                f'mongodb_pool_connections{{address="{address}",state="{state}"}} {pool[state]}'
+            )
+    lines += [
+        "# HELP mongodb_pool_checkout_wait_milliseconds Time to check a connection out.",
+        "# TYPE mongodb_pool_checkout_wait_milliseconds histogram",
+    ]
+    for address, pool in pools.items():
+        lines += metrics.histogram_lines(
+            "mongodb_pool_checkout_wait_milliseconds",
+            {"address": address},
+            pool["checkout_wait_ms"],
+        )
+    lines += [
+        "# HELP mongodb_command_duration_milliseconds Server round trip of each command.",
+        "# TYPE mongodb_command_duration_milliseconds histogram",
+    ]
+    for name, command in commands.items():
+        lines += metrics.histogram_lines(
+            "mongodb_command_duration_milliseconds", {"command": name}, command["latency_ms"]
+        )
+    return lines
+
+
+metrics.register_collector(_prometheus_lines)
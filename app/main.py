@@ -1,18 +1,64 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from app.config import get_settings
+from app.database import mongodb
+from app.database.indexes import ensure_all_indexes
 from app.middleware.auth_middleware import AuthMiddleware
-from app.routes import audio, auth, nlp, notes
+from app.middleware.metrics_middleware import MetricsMiddleware
+from app.routes import admin, audio, auth, health, jobs, meetings, monitoring, nlp, notes
+from app.services import auth_service, job_service, search_service, whisper_service
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    settings = get_settings()
+    if settings.whisper_preload:
+        # Loads in the background; /health/ready reports 503 until the model is warm.
+        whisper_service.start_preload()
+    if settings.mongo_uri:
+        await mongodb.connect()
+        await ensure_all_indexes()
+        await job_service.start_workers(settings.transcription_workers)
+    try:
+        yield
+    finally:
+        await whisper_service.stop_background_load()
+        await job_service.stop_workers()
+        await search_service.drain_pending()
+        whisper_service.shutdown_process_pool()
+        whisper_service.shutdown_decode_executor()
+        auth_service.shutdown_hash_executor()
+        mongodb.close()
 
-app = FastAPI(title="AI Note-Taking Assistant API")
 
-app.add_middleware(AuthMiddleware, protected_paths=("/api/notes", "/api/mindmap", "/api/summarise"))
+app = FastAPI(title="AI Note-Taking Assistant API", lifespan=lifespan)
+
+app.add_middleware(
+    AuthMiddleware,
+    protected_paths=(
+        "/api/notes",
+        "/api/mindmap",
+        "/api/summarise",
+        "/api/meetings",
+        "/api/admin",
+        "/api/monitoring",
+        "/api/jobs",
+    ),
+    # Anonymous synchronous uploads stay allowed; a token identifies the owner of async jobs.
+    optional_paths=("/api/upload-audio",),
+)
+# Added last so it is outermost and also times requests rejected by the auth middleware.
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(audio.router)
+app.include_router(jobs.router)
+app.include_router(meetings.router)
 app.include_router(notes.router)
 app.include_router(auth.router)
 app.include_router(nlp.router)
-
-
-@app.get("/health")
-async def health_check() -> dict[str, str]:
-    return {"status": "ok"}
+app.include_router(monitoring.router)
+app.include_router(monitoring.metrics_router)
+app.include_router(health.router)
+app.include_router(admin.router)
@@ -1,43 +1,75 @@
 ﻿from __future__ import annotations
 
-from typing import Iterable
+import re
+from typing import Iterable, Optional, Pattern
 
 from fastapi import HTTPException, status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.services import auth_service
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, protected_paths: Iterable[str] | None = None) -> None:
-        super().__init__(app)
-        self.protected_paths = tuple(protected_paths or ())
+def _compile_prefixes(prefixes: Iterable[str]) -> Optional[Pattern[str]]:
+    """Compile path prefixes into one anchored alternation, longest first."""
+    ordered = sorted(set(prefixes), key=len, reverse=True)
+    if not ordered:
+        return None
+    return re.compile("|".join(re.escape(prefix) for prefix in ordered))
+
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        if self._requires_auth(request.url.path):
-            try:
-                token = self._extract_token(request)
-            except HTTPException as exc:
-                return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+class AuthMiddleware:
+    """Pure ASGI middleware that authenticates requests under the protected path prefixes.
 
-            try:
-                user = await auth_service.get_user_from_token(token)
-            except HTTPException as exc:
-                return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+    Under ``optional_paths`` a bearer token is validated when one is sent and anonymous
+    requests pass through; the route decides what an anonymous caller may do.
 
-            request.state.user = user
+    Unlike ``BaseHTTPMiddleware`` it does not wrap the downstream app in extra tasks and memory
+    streams, so streaming responses and background tasks pass through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        protected_paths: Iterable[str] | None = None,
+        optional_paths: Iterable[str] | None = None,
+    ) -> None:
+        self.app = app
+        self.protected_paths = tuple(protected_paths or ())
+        self.optional_paths = tuple(optional_paths or ())
+        self._protected = _compile_prefixes(self.protected_paths)
+        self._optional = _compile_prefixes(self.optional_paths)
 
-        return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not (
+            self._requires_auth(scope["path"]) or self._accepts_auth(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            token = self._extract_token(Headers(scope=scope))
+            user = await auth_service.get_user_from_token(token)
+        except HTTPException as exc:
+            response = JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+            await response(scope, receive, send)
+            return
+
+        # ``request.state`` is backed by ``scope["state"]``.
+        scope.setdefault("state", {})["user"] = user
+        await self.app(scope, receive, send)
 
     def _requires_auth(self, path: str) -> bool:
-        return any(path.startswith(prefix) for prefix in self.protected_paths)
+        return self._protected is not None and self._protected.match(path) is not None
+
+    def _accepts_auth(self, scope: Scope) -> bool:
+        optional = self._optional is not None and self._optional.match(scope["path"]) is not None
+        return optional and "authorization" in Headers(scope=scope)
 
     @staticmethod
-    def _extract_token(request: Request) -> str:
-        header = request.headers.get("Authorization")
+    def _extract_token(headers: Headers) -> str:
+        header = headers.get("Authorization")
         if not header:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated."
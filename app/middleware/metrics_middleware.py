@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import Counter, Gauge, LabelledHistogram
+
+REQUEST_DURATION = LabelledHistogram(
+    "http_request_duration_seconds",
+    "Time to serve HTTP requests, by route template.",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being served.")
+REQUEST_ERRORS = Counter(
+    "http_request_errors_total",
+    "HTTP requests that raised instead of sending a response.",
+    ("method", "route"),
+)
+
+
+def _route(scope: Scope) -> str:
+    # The router records the matched route in the scope; its template keeps label values bounded.
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency and in-flight requests per route."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException:
+            REQUEST_ERRORS.inc(method=scope["method"], route=_route(scope))
+            raise
+        finally:
+            REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=_route(scope),
+                status=str(status_code),
+            )
+            REQUESTS_IN_PROGRESS.dec()
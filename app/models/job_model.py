@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: JobStatus
+
+
+class JobRead(BaseModel):
+    id: str
+    status: JobStatus
+    language: Optional[str] = None
+    transcript: Optional[str] = None
+    detected_language: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,22 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.models.note_model import NoteRead
+
+
+class MeetingTimings(BaseModel):
+    """Wall-clock seconds spent in each stage of the meeting pipeline."""
+
+    upload: float
+    transcribe: float
+    summarise: float
+    mindmap: float
+    save: float
+    total: float
+
+
+class MeetingResponse(BaseModel):
+    note: NoteRead
+    language: Optional[str] = None
+    timings: MeetingTimings
@@ -25,7 +25,30 @@ class NoteUpdate(BaseModel):
 
 
 class NoteRead(NoteBase):
+    # ``None`` when the note was read without its transcript (``include_transcript=false``).
+    transcript: Optional[str] = None
     id: str
     user_id: str
     created_at: datetime
     updated_at: datetime
+
+
+class NoteSummary(BaseModel):
+    """List view of a note without the heavy ``transcript`` and ``mindmap`` fields."""
+
+    id: str
+    user_id: str
+    summary: str
+    actions: List[Dict[str, Any]] = Field(default_factory=list)
+    topics: List[str] = Field(default_factory=list)
+    created_at: datetime
+    updated_at: datetime
+
+
+class NoteSearchHit(NoteSummary):
+    score: float
+
+
+class NotePage(BaseModel):
+    items: List[NoteSummary]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,42 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException, Request, status
+from pydantic import BaseModel, Field
+
+from app.config import get_settings
+from app.services import whisper_service
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+class ModelSwitchRequest(BaseModel):
+    model_size: str = Field(min_length=1)
+
+
+def require_admin(request: Request):
+    user = getattr(request.state, "user", None)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated.")
+    admins = {email.strip().lower() for email in get_settings().admin_emails.split(",")}
+    if user.email.lower() not in admins:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required.")
+    return user
+
+
+@router.get("/whisper-model")
+async def get_whisper_model(request: Request) -> Dict[str, Any]:
+    require_admin(request)
+    return whisper_service.model_status()
+
+
+@router.post("/whisper-model", status_code=status.HTTP_202_ACCEPTED)
+async def switch_whisper_model(request: Request, payload: ModelSwitchRequest) -> Dict[str, Any]:
+    """Load another model size in the background and swap it in once it is warm."""
+    require_admin(request)
+    try:
+        whisper_service.switch_model(payload.model_size)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except whisper_service.ModelSwitchInProgressError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    return whisper_service.model_status()
@@ -1,7 +1,17 @@
-﻿from fastapi import APIRouter, File, HTTPException, UploadFile
+﻿import logging
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
-from app.services.whisper_service import TranscriptionResult, transcribe_audio
+from app.config import get_settings
+from app.models.job_model import JobAccepted
+from app.services import job_service
+from app.services.whisper_service import QualityTier, TranscriptionResult, transcribe_audio
+from app.utils.helpers import peak_rss_bytes
+from app.utils.uploads import UPLOAD_OPENAPI, UploadTooLargeError, spool_upload
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["audio"])
 
@@ -11,17 +21,92 @@ class TranscriptionResponse(BaseModel):
     language: str | None
 
 
-@router.post("/upload-audio", response_model=TranscriptionResponse)
+@router.post(
+    "/upload-audio",
+    response_model=TranscriptionResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": JobAccepted}},
+    openapi_extra=UPLOAD_OPENAPI,
+)
 async def upload_audio(
-    file: UploadFile = File(...),
+    request: Request,
+    response: Response,
     language: str | None = None,
-) -> TranscriptionResponse:
-    contents = await file.read()
+    tier: QualityTier | None = None,
+    run_async: bool = Query(default=False, alias="async"),
+) -> TranscriptionResponse | JSONResponse:
+    """Transcribe an uploaded recording.
+
+    ``tier`` trades accuracy for latency: ``fast``, ``balanced``, ``accurate``, or ``auto`` to
+    choose by the recording's duration. The model used is returned in ``X-Whisper-Model``.
+    """
+    settings = get_settings()
+    if run_async:
+        # Jobs are fetched later by id, so they belong to an authenticated owner.
+        user = getattr(request.state, "user", None)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Background transcription requires authentication.",
+            )
+        # Check backpressure before reading the body so a burst can't fill the disk either.
+        try:
+            await job_service.ensure_capacity()
+        except job_service.QueueFullError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(exc),
+                headers={"Retry-After": str(exc.retry_after)},
+            ) from exc
+
+    rss_before = peak_rss_bytes()
+    try:
+        upload = await spool_upload(
+            request,
+            chunk_size=settings.upload_chunk_size,
+            max_bytes=settings.max_upload_bytes,
+            directory=settings.upload_spool_dir,
+        )
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    if run_async:
+        if upload.size == 0:
+            upload.remove()
+            raise HTTPException(status_code=400, detail="Uploaded audio file is empty.")
+        try:
+            job = await job_service.enqueue_job(
+                upload.path, user.id, language=language, audio_sha256=upload.sha256, tier=tier
+            )
+        except BaseException:
+            upload.remove()
+            raise
+        accepted = JobAccepted(job_id=job.id, status=job.status)
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=accepted.model_dump())
+
     try:
-        result: TranscriptionResult = await transcribe_audio(contents, language=language)
+        result: TranscriptionResult = await transcribe_audio(
+            upload.path, language=language, audio_sha256=upload.sha256, tier=tier
+        )
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except RuntimeError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+    finally:
+        upload.remove()
+
+    if result.model:
+        response.headers["X-Whisper-Model"] = result.model
+    rss_after = peak_rss_bytes()
+    if rss_after is not None:
+        # A process-wide lifetime high-water mark, so it is logged rather than returned as if it
+        # measured this request.
+        logger.info(
+            "Transcribed %d byte upload; process peak RSS %d bytes (raised %d during request)",
+            upload.size,
+            rss_after,
+            rss_after - (rss_before or rss_after),
+        )
 
     return TranscriptionResponse(transcript=result.text, language=result.language)
@@ -0,0 +1,26 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services import whisper_service
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/health")
+@router.get("/health/live")
+async def liveness() -> Dict[str, str]:
+    """The process is up and serving; says nothing about whether models are loaded."""
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+async def readiness() -> JSONResponse:
+    """200 once the active Whisper model is loaded and warmed, 503 until then."""
+    status: Dict[str, Any] = whisper_service.model_status()
+    ready = status["ready"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "loading", "whisper": status},
+    )
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException, Request, status
+
+from app.models.job_model import JobRead
+from app.services import job_service
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+def _require_user(request: Request):
+    user = getattr(request.state, "user", None)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated.")
+    return user
+
+
+@router.get("/{job_id}", response_model=JobRead)
+async def get_job(job_id: str, request: Request) -> JobRead:
+    user = _require_user(request)
+    try:
+        job = await job_service.get_job(job_id, user.id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,70 @@
+import time
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+
+from app.config import get_settings
+from app.models.meeting_model import MeetingResponse
+from app.services import meeting_service
+from app.services.whisper_service import QualityTier
+from app.utils.uploads import UPLOAD_OPENAPI, UploadTooLargeError, spool_upload
+
+router = APIRouter(prefix="/api/meetings", tags=["meetings"])
+
+# Summarisation talks to the LLM provider, so its failures are upstream errors.
+_STAGE_STATUS = {"summarise": status.HTTP_502_BAD_GATEWAY}
+
+
+def _require_user(request: Request):
+    user = getattr(request.state, "user", None)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated.")
+    return user
+
+
+@router.post(
+    "",
+    response_model=MeetingResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=UPLOAD_OPENAPI,
+)
+async def create_meeting(
+    request: Request,
+    response: Response,
+    language: str | None = None,
+    tier: QualityTier | None = None,
+) -> MeetingResponse:
+    """Upload a recording and get back the saved note: transcript, summary and mind map."""
+    user = _require_user(request)
+    settings = get_settings()
+
+    started = time.perf_counter()
+    try:
+        upload = await spool_upload(
+            request,
+            chunk_size=settings.upload_chunk_size,
+            max_bytes=settings.max_upload_bytes,
+            directory=settings.upload_spool_dir,
+        )
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    upload_seconds = time.perf_counter() - started
+
+    try:
+        result = await meeting_service.process_meeting(
+            upload, user.id, language=language, tier=tier, upload_seconds=upload_seconds
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except meeting_service.MeetingStageError as exc:
+        raise HTTPException(
+            status_code=_STAGE_STATUS.get(exc.stage, status.HTTP_500_INTERNAL_SERVER_ERROR),
+            detail=str(exc),
+        ) from exc
+
+    response.headers["Server-Timing"] = ", ".join(
+        f"{stage};dur={seconds * 1000:.1f}"
+        for stage, seconds in result.timings.model_dump().items()
+    )
+    return result
@@ -0,0 +1,52 @@
+import secrets
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+from app.config import get_settings
+from app.database import pool_monitor
+from app.routes.admin import require_admin
+from app.utils import metrics
+from app.utils.cache import cache_stats
+
+router = APIRouter(prefix="/api/monitoring", tags=["monitoring"])
+metrics_router = APIRouter(tags=["monitoring"])
+
+_PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/caches")
+async def get_cache_stats(request: Request) -> Dict[str, Dict[str, int]]:
+    require_admin(request)
+    return cache_stats()
+
+
+@router.get("/mongo")
+async def get_mongo_stats(request: Request) -> Dict[str, Any]:
+    """Connection pool usage, checkout waits and command latency histograms per server."""
+    require_admin(request)
+    return pool_monitor.snapshot()
+
+
+def _require_scrape_token(request: Request) -> None:
+    # Scrapers carry a static token rather than a user's JWT; without one configured the
+    # endpoint stays closed, since it exports the admin-only cache and MongoDB pool stats.
+    token = get_settings().metrics_token
+    if not token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, presented = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(presented, token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(request: Request) -> PlainTextResponse:
+    """All metrics in the Prometheus text exposition format; needs ``METRICS_TOKEN``."""
+    _require_scrape_token(request)
+    await metrics.refresh()
+    return PlainTextResponse(metrics.render_prometheus(), media_type=_PROMETHEUS_CONTENT_TYPE)
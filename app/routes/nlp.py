@@ -1,12 +1,12 @@
-﻿from typing import Any, Dict, List
+﻿import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, Request, status
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
-from app.models.note_model import NoteRead
-from app.services import note_service
-from app.services.mindmap_service import build_mindmap
-from app.services.nlp_service import generate_summary
+from app.services import knowledge_graph_service, note_service
+from app.services.nlp_service import generate_summaries, generate_summary, stream_summary
 
 router = APIRouter(prefix="/api", tags=["nlp"])
 
@@ -29,6 +29,26 @@ class SummariseResponse(BaseModel):
     transcript_length: int
 
 
+class SummariseBatchRequest(BaseModel):
+    transcripts: List[str] = Field(min_length=1)
+    concurrency: Optional[int] = Field(default=None, ge=1, le=32)
+
+
+class SummariseBatchItem(BaseModel):
+    index: int
+    result: Optional[SummariseResponse] = None
+    error: Optional[str] = None
+
+
+class SummariseBatchResponse(BaseModel):
+    results: List[SummariseBatchItem]
+    succeeded: int
+    failed: int
+    elapsed_seconds: float
+    items_per_second: float
+    tokens_per_second: float
+
+
 @router.post("/summarise", response_model=SummariseResponse)
 async def summarise(request: Request, payload: SummariseRequest) -> SummariseResponse:
     _require_user(request)
@@ -42,15 +62,71 @@ async def summarise(request: Request, payload: SummariseRequest) -> SummariseRes
     return SummariseResponse.model_validate(result)
 
 
+@router.post("/summarise/batch", response_model=SummariseBatchResponse)
+async def summarise_batch(
+    request: Request, payload: SummariseBatchRequest
+) -> SummariseBatchResponse:
+    _require_user(request)
+    try:
+        batch = await generate_summaries(payload.transcripts, concurrency=payload.concurrency)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    return SummariseBatchResponse.model_validate(batch)
+
+
+def _format_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _event_stream(
+    first: Tuple[str, Dict[str, Any]], events: AsyncIterator[Tuple[str, Dict[str, Any]]]
+) -> AsyncIterator[str]:
+    yield _format_event(*first)
+    try:
+        async for event, data in events:
+            yield _format_event(event, data)
+    except RuntimeError as exc:
+        yield _format_event("error", {"detail": str(exc)})
+
+
+@router.post("/summarise/stream")
+async def summarise_stream(request: Request, payload: SummariseRequest) -> StreamingResponse:
+    """Stream the summary as server-sent events, ending with a ``result`` event."""
+    _require_user(request)
+    events = stream_summary(payload.transcript)
+    # Pull the first event before responding so validation errors still map to HTTP statuses.
+    try:
+        first = await anext(events)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+
+    return StreamingResponse(
+        _event_stream(first, events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/mindmap")
+async def get_user_mindmap(
+    request: Request, max_topics: int = Query(100, ge=1, le=500)
+) -> Dict[str, Any]:
+    user = _require_user(request)
+    return await knowledge_graph_service.get_user_graph(user.id, max_topics=max_topics)
+
+
 @router.get("/mindmap/{note_id}")
-async def get_mindmap(request: Request, note_id: str) -> Dict[str, List[Dict[str, str]]]:
+async def get_mindmap(request: Request, note_id: str) -> Dict[str, Any]:
     user = _require_user(request)
     try:
-        note: NoteRead | None = await note_service.get_note(note_id, user.id)
+        mindmap = await note_service.get_mindmap(note_id, user.id)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    if note is None:
+    if mindmap is None:
         raise HTTPException(status_code=404, detail="Note not found")
 
-    return build_mindmap(note.actions, note.topics)
+    return mindmap
@@ -1,9 +1,9 @@
-﻿from typing import List
+﻿from typing import List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 
-from app.models.note_model import NoteCreate, NoteRead, NoteUpdate
-from app.services import note_service
+from app.models.note_model import NoteCreate, NoteRead, NoteSearchHit, NoteSummary, NoteUpdate
+from app.services import note_service, search_service
 
 router = APIRouter(prefix="/api/notes", tags=["notes"])
 
@@ -15,10 +15,23 @@ def _require_user(request: Request):
     return user
 
 
-@router.get("/", response_model=List[NoteRead])
-async def list_notes(request: Request) -> List[NoteRead]:
+@router.get("/", response_model=List[NoteSummary])
+async def list_notes(
+    request: Request,
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = None,
+) -> List[NoteSummary]:
+    """List notes newest first; pass the ``X-Next-Cursor`` header back as ``cursor`` to page."""
     user = _require_user(request)
-    return await note_service.list_notes(user.id)
+    try:
+        page = await note_service.list_notes(user.id, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
 
 
 @router.post("/", response_model=NoteRead, status_code=status.HTTP_201_CREATED)
@@ -27,11 +40,27 @@ async def create_note(request: Request, note: NoteCreate) -> NoteRead:
     return await note_service.create_note(note, user.id)
 
 
+@router.get("/search", response_model=List[NoteSearchHit])
+async def search_notes(
+    request: Request,
+    q: str = Query(min_length=1, max_length=500),
+    mode: Literal["text", "semantic"] = "text",
+    limit: int = Query(default=20, ge=1, le=100),
+) -> List[NoteSearchHit]:
+    """Keyword search (``mode=text``) or embedding similarity search (``mode=semantic``)."""
+    user = _require_user(request)
+    try:
+        return await search_service.search_notes(user.id, q, mode=mode, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
 @router.get("/{note_id}", response_model=NoteRead)
-async def get_note(request: Request, note_id: str) -> NoteRead:
+async def get_note(request: Request, note_id: str, include_transcript: bool = True) -> NoteRead:
+    """Fetch a note; pass ``include_transcript=false`` to skip loading the transcript."""
     user = _require_user(request)
     try:
-        note = await note_service.get_note(note_id, user.id)
+        note = await note_service.get_note(note_id, user.id, include_transcript=include_transcript)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
@@ -41,10 +70,14 @@ async def get_note(request: Request, note_id: str) -> NoteRead:
 
 
 @router.put("/{note_id}", response_model=NoteRead)
-async def update_note(request: Request, note_id: str, update: NoteUpdate) -> NoteRead:
+async def update_note(
+    request: Request, note_id: str, update: NoteUpdate, include_transcript: bool = True
+) -> NoteRead:
     user = _require_user(request)
     try:
-        note = await note_service.update_note(note_id, update, user.id)
+        note = await note_service.update_note(
+            note_id, update, user.id, include_transcript=include_transcript
+        )
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
@@ -1,7 +1,13 @@
 ﻿from __future__ import annotations
 
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
-from typing import Any, Dict, Tuple
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
 
 from bson import ObjectId
 from bson.errors import InvalidId
@@ -10,10 +16,18 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from motor.motor_asyncio import AsyncIOMotorCollection
 from passlib.context import CryptContext
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
 
-from app.config import get_settings
+from app.config import Settings, get_settings
+from app.database.indexes import register_indexes
 from app.database.mongodb import get_database
 from app.models.user_model import TokenResponse, UserCreate, UserLogin, UserPublic
+from app.utils.cache import LRUCache, register_stats
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
 
 
 class UserAlreadyExistsError(Exception):
@@ -28,20 +42,123 @@ class AuthConfigurationError(Exception):
     """Raised when JWT configuration is missing."""
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+class _AuthCaches:
+    """Decoded tokens (token -> (user id, exp)) and public user profiles (user id -> user)."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.tokens: LRUCache[str, Tuple[str, Optional[float]]] = LRUCache(
+            "auth_tokens", settings.auth_token_cache_size
+        )
+        self.users: LRUCache[str, UserPublic] = LRUCache(
+            "auth_users", settings.auth_user_cache_size, settings.auth_user_cache_ttl_seconds
+        )
+
+
+_auth_caches: Optional[_AuthCaches] = None
+_auth_caches_lock = Lock()
+_lookup_counters = {"db_lookups": 0, "db_lookups_avoided": 0, "invalidations": 0}
+register_stats("auth", lambda: dict(_lookup_counters))
+
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_executor_lock = Lock()
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
+_COLLECTION_NAME = "users"
+
+
 def get_user_collection() -> AsyncIOMotorCollection:
-    return get_database()["users"]
+    return get_database()[_COLLECTION_NAME]
+
+
+# The unique index is what actually prevents duplicate accounts; the lookup in register_user
+# only avoids hashing a password for an email that is obviously taken.
+register_indexes(_COLLECTION_NAME, lambda: [IndexModel([("email", ASCENDING)], unique=True)])
+
+
+@lru_cache(maxsize=4)
+def _crypt_context(rounds: int) -> CryptContext:
+    # Pinning min and max to the configured cost makes verify_and_update flag any hash made
+    # with a different cost, so raising or lowering the setting rehashes users as they log in.
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def _pwd_context() -> CryptContext:
+    return _crypt_context(get_settings().password_hash_rounds)
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 def verify_password(password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(password, hashed_password)
+    return _pwd_context().verify(password, hashed_password)
+
+
+def verify_and_update_password(password: str, hashed_password: str) -> Tuple[bool, str | None]:
+    """Verify a password, returning a replacement hash when the stored cost is outdated."""
+    if not hashed_password:
+        return False, None
+    return _pwd_context().verify_and_update(password, hashed_password)
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=get_settings().password_hash_workers, thread_name_prefix="bcrypt"
+            )
+        return _hash_executor
+
+
+async def _run_hasher(func: Callable[..., T], *args: Any) -> T:
+    """Run bcrypt on its own small pool: off the event loop, and capped so a login burst
+    queues here instead of taking the default executor's threads from other work."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), func, *args)
+
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    with _hash_executor_lock:
+        executor, _hash_executor = _hash_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _get_auth_caches() -> Optional[_AuthCaches]:
+    global _auth_caches
+    settings = get_settings()
+    if not settings.auth_cache_enabled:
+        return None
+    with _auth_caches_lock:
+        if _auth_caches is None:
+            _auth_caches = _AuthCaches(settings)
+        return _auth_caches
+
+
+def invalidate_user(user_id: Any) -> None:
+    """Drop a cached user; call whenever a user document is changed or deleted."""
+    if _auth_caches is not None and _auth_caches.users.pop(str(user_id)) is not None:
+        _lookup_counters["invalidations"] += 1
+
+
+def clear_auth_caches() -> None:
+    if _auth_caches is not None:
+        _auth_caches.tokens.clear()
+        _auth_caches.users.clear()
+
+
+def _seconds_until(expires_at: Optional[float]) -> Optional[float]:
+    return None if expires_at is None else expires_at - time.time()
 
 
 def _to_object_id(user_id: str) -> ObjectId | str:
@@ -80,7 +197,7 @@ async def register_user(data: UserCreate) -> Tuple[str, UserPublic]:
         raise UserAlreadyExistsError("Email is already registered.")
 
     now = datetime.now(UTC)
-    hashed_password = hash_password(data.password)
+    hashed_password = await _run_hasher(hash_password, data.password)
     document: Dict[str, Any] = {
         "email": email,
         "hashed_password": hashed_password,
@@ -89,7 +206,10 @@ async def register_user(data: UserCreate) -> Tuple[str, UserPublic]:
         "updated_at": now,
     }
 
-    result = await collection.insert_one(document)
+    try:
+        result = await collection.insert_one(document)
+    except DuplicateKeyError as exc:
+        raise UserAlreadyExistsError("Email is already registered.") from exc
     document["_id"] = result.inserted_id
 
     token = create_access_token(document["_id"])
@@ -101,13 +221,34 @@ async def authenticate_user(data: UserLogin) -> Tuple[str, UserPublic]:
     email = data.email.lower()
 
     user = await collection.find_one({"email": email})
-    if not user or not verify_password(data.password, user.get("hashed_password", "")):
+    if not user:
+        raise InvalidCredentialsError("Invalid email or password.")
+
+    verified, new_hash = await _run_hasher(
+        verify_and_update_password, data.password, user.get("hashed_password", "")
+    )
+    if not verified:
         raise InvalidCredentialsError("Invalid email or password.")
+    if new_hash:
+        await _store_rehashed_password(collection, user["_id"], new_hash)
 
     token = create_access_token(user["_id"])
     return token, _build_public_user(user)
 
 
+async def _store_rehashed_password(
+    collection: AsyncIOMotorCollection, user_id: Any, hashed_password: str
+) -> None:
+    try:
+        await collection.update_one(
+            {"_id": user_id},
+            {"$set": {"hashed_password": hashed_password, "updated_at": datetime.now(UTC)}},
+        )
+    except Exception as exc:  # pragma: no cover - depends on database availability
+        # The old hash still verifies; the next login will retry the upgrade.
+        logger.warning("Failed to store rehashed password for user %s: %s", user_id, exc)
+
+
 async def get_user_by_id(user_id: str) -> Dict[str, Any] | None:
     collection = get_user_collection()
     return await collection.find_one({"_id": _to_object_id(user_id)})
@@ -122,21 +263,47 @@ async def get_user_from_token(token: str) -> UserPublic:
             detail="JWT secret is not configured.",
         )
 
-    try:
-        payload = jwt.decode(token, secret, algorithms=[settings.jwt_algorithm])
-        user_id: str | None = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token.")
-    except JWTError as exc:  # pragma: no cover
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token."
-        ) from exc
-
+    caches = _get_auth_caches()
+    claims = caches.tokens.get(token) if caches else None
+    if claims is None:
+        try:
+            payload = jwt.decode(token, secret, algorithms=[settings.jwt_algorithm])
+            user_id: str | None = payload.get("sub")
+            if user_id is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token."
+                )
+        except JWTError as exc:  # pragma: no cover
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token."
+            ) from exc
+
+        expires_at = float(payload["exp"]) if "exp" in payload else None
+        claims = (user_id, expires_at)
+        if caches:
+            # A cached decode must stop being valid exactly when the token does.
+            caches.tokens.set(token, claims, ttl_seconds=_seconds_until(expires_at))
+
+    user_id, expires_at = claims
+    remaining = _seconds_until(expires_at)
+    if remaining is not None and remaining <= 0:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired.")
+
+    cached_user = caches.users.get(user_id) if caches else None
+    if cached_user is not None:
+        _lookup_counters["db_lookups_avoided"] += 1
+        return cached_user
+
+    _lookup_counters["db_lookups"] += 1
     user = await get_user_by_id(user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found.")
 
-    return _build_public_user(user)
+    public_user = _build_public_user(user)
+    if caches:
+        ttl = settings.auth_user_cache_ttl_seconds
+        caches.users.set(user_id, public_user, ttl_seconds=min(ttl, remaining or ttl))
+    return public_user
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserPublic:
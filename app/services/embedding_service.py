@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Protocol, Sequence
+
+import numpy as np
+from bson.binary import Binary
+
+from app.config import get_settings
+
+_WORD_PATTERN = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it of on or so that the this to was "
+    "we were will with".split()
+)
+
+# Transcripts can run to hours; the summary and topics carry most of the meaning, so only the
+# opening of the transcript is embedded alongside them.
+_TRANSCRIPT_CHARS = 4000
+
+
+class Embedder(Protocol):
+    name: str
+    dimensions: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return one L2-normalised float32 row per text."""
+
+
+def _normalise_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+class HashingEmbedder:
+    """Deterministic local embedder: signed feature hashing of words and word pairs.
+
+    It captures lexical overlap rather than meaning, needs no network or model download, and
+    gives identical vectors across processes, which makes it the stand-in for tests.
+    """
+
+    def __init__(self, dimensions: int) -> None:
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _features(self, text: str) -> List[str]:
+        words = [word for word in _WORD_PATTERN.findall(text.lower()) if word not in _STOPWORDS]
+        return words + [
+            f"{first} {second}" for first, second in zip(words, words[1:], strict=False)
+        ]
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                matrix[row, value % self.dimensions] += 1.0 if value >> 63 else -1.0
+        return _normalise_rows(matrix)
+
+
+class OpenAIEmbedder:
+    def __init__(self, model_name: str, dimensions: int, api_key: str) -> None:
+        from langchain_openai import OpenAIEmbeddings
+
+        self.dimensions = dimensions
+        self.name = f"{model_name}-{dimensions}"
+        self._client = OpenAIEmbeddings(model=model_name, dimensions=dimensions, api_key=api_key)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._client.embed_documents(list(texts))
+        return _normalise_rows(np.asarray(vectors, dtype=np.float32))
+
+
+@lru_cache(maxsize=4)
+def _build_embedder(
+    backend: str, model_name: str, dimensions: int, api_key: str | None
+) -> Embedder:
+    if backend == "openai":
+        if not api_key:
+            raise RuntimeError("OpenAI API key is not configured.")
+        return OpenAIEmbedder(model_name, dimensions, api_key)
+    return HashingEmbedder(dimensions)
+
+
+def get_embedder() -> Embedder:
+    settings = get_settings()
+    return _build_embedder(
+        settings.embedding_backend,
+        settings.embedding_model,
+        settings.embedding_dimensions,
+        settings.openai_api_key,
+    )
+
+
+def note_text(note: Mapping[str, Any]) -> str:
+    topics = ", ".join(note.get("topics") or [])
+    # Stored notes carry an excerpt; notes not yet migrated or being created carry the full text.
+    transcript = (note.get("transcript_excerpt") or note.get("transcript") or "")[
+        :_TRANSCRIPT_CHARS
+    ]
+    return "\n".join(part for part in (note.get("summary") or "", topics, transcript) if part)
+
+
+def encode_vector(vector: np.ndarray) -> Binary:
+    """Pack a vector as little-endian float32 bytes: 4 bytes per dimension in BSON."""
+    return Binary(np.asarray(vector, dtype="<f4").tobytes())
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<f4")
+
+
+def embedding_fields(note: Mapping[str, Any], embedder: Embedder) -> Dict[str, Any]:
+    """Compute the ``embedding`` and ``embedding_model`` fields stored on a note."""
+    vector = embedder.embed([note_text(note)])[0]
+    return {"embedding": encode_vector(vector), "embedding_model": embedder.name}
@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+
+from app.config import Settings, get_settings
+from app.database.indexes import register_indexes
+from app.database.mongodb import get_database
+from app.models.job_model import JobRead
+from app.services.whisper_service import transcribe_audio
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+_COLLECTION_NAME = "transcription_jobs"
+_ACTIVE_STATUSES = ("queued", "running")
+
+# A claim whose heartbeat is this many intervals old belongs to a worker that has died.
+_MISSED_HEARTBEATS = 4
+# Names this process in claims, so a job's owner can be told apart across instances.
+_INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_workers: List[asyncio.Task] = []
+_wakeup: Optional[asyncio.Event] = None
+_last_requeue: Optional[float] = None
+
+
+class QueueFullError(Exception):
+    """Raised when the transcription queue is at capacity."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Transcription queue is full. Retry later.")
+        self.retry_after = retry_after
+
+
+def _collection() -> AsyncIOMotorCollection:
+    return get_database()[_COLLECTION_NAME]
+
+
+def _object_id(job_id: str) -> ObjectId:
+    try:
+        return ObjectId(job_id)
+    except (InvalidId, TypeError) as exc:
+        raise ValueError("Invalid job id") from exc
+
+
+def _normalize(document: Dict[str, Any]) -> JobRead:
+    result = document.get("result") or {}
+    return JobRead(
+        id=str(document["_id"]),
+        status=document["status"],
+        language=document.get("language"),
+        transcript=result.get("transcript"),
+        detected_language=result.get("language"),
+        error=document.get("error"),
+        created_at=document["created_at"],
+        updated_at=document["updated_at"],
+        started_at=document.get("started_at"),
+        finished_at=document.get("finished_at"),
+    )
+
+
+def _index_models() -> List[IndexModel]:
+    return [
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("created_at", ASCENDING)]),
+        IndexModel(
+            [("finished_at", ASCENDING)],
+            expireAfterSeconds=get_settings().transcription_job_ttl_seconds,
+        ),
+    ]
+
+
+register_indexes(_COLLECTION_NAME, _index_models)
+
+
+async def queue_depth() -> int:
+    return await _collection().count_documents({"status": {"$in": list(_ACTIVE_STATUSES)}})
+
+
+QUEUE_DEPTH = metrics.Gauge(
+    "transcription_jobs", "Background transcription jobs by status.", ("status",)
+)
+
+
+async def _refresh_queue_metrics() -> None:
+    if not get_settings().mongo_uri:
+        return
+    counts = (
+        await _collection()
+        .aggregate(
+            [
+                {"$match": {"status": {"$in": list(_ACTIVE_STATUSES)}}},
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+            ]
+        )
+        .to_list(length=None)
+    )
+    by_status = {document["_id"]: document["count"] for document in counts}
+    for status in _ACTIVE_STATUSES:
+        QUEUE_DEPTH.set(by_status.get(status, 0), status=status)
+
+
+metrics.register_refresher(_refresh_queue_metrics)
+
+
+async def ensure_capacity() -> None:
+    """Raise ``QueueFullError`` when queued plus running jobs have reached the limit."""
+    settings = get_settings()
+    if await queue_depth() >= settings.transcription_queue_limit:
+        raise QueueFullError(settings.transcription_retry_after_seconds)
+
+
+async def enqueue_job(
+    audio_path: str,
+    user_id: str,
+    *,
+    language: Optional[str] = None,
+    audio_sha256: Optional[str] = None,
+    tier: Optional[str] = None,
+) -> JobRead:
+    """Persist a queued job for an audio file that the workers will own and delete."""
+    now = datetime.now(UTC)
+    document: Dict[str, Any] = {
+        "user_id": user_id,
+        "status": "queued",
+        "audio_path": audio_path,
+        "audio_sha256": audio_sha256,
+        "language": language,
+        "tier": tier,
+        "created_at": now,
+        "updated_at": now,
+    }
+    result = await _collection().insert_one(document)
+    document["_id"] = result.inserted_id
+
+    if _wakeup is not None:
+        _wakeup.set()
+    return _normalize(document)
+
+
+async def get_job(job_id: str, user_id: str) -> Optional[JobRead]:
+    """Return the caller's job; jobs belonging to other users are reported as missing."""
+    document = await _collection().find_one({"_id": _object_id(job_id), "user_id": user_id})
+    return _normalize(document) if document else None
+
+
+async def _claim_next_job() -> Optional[Dict[str, Any]]:
+    now = datetime.now(UTC)
+    claim = {"instance": _INSTANCE_ID, "id": ObjectId()}
+    return await _collection().find_one_and_update(
+        {"status": "queued"},
+        {
+            "$set": {
+                "status": "running",
+                "claim": claim,
+                "started_at": now,
+                "heartbeat_at": now,
+                "updated_at": now,
+            }
+        },
+        sort=[("created_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _claimed(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Filter matching the job only while this worker still holds the claim it was given."""
+    return {"_id": document["_id"], "status": "running", "claim": document["claim"]}
+
+
+async def _heartbeat(document: Dict[str, Any], interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        result = await _collection().update_one(
+            _claimed(document), {"$set": {"heartbeat_at": datetime.now(UTC)}}
+        )
+        if not result.matched_count:
+            logger.warning("Transcription job %s was reclaimed by another worker", document["_id"])
+            return
+
+
+async def _run_job(document: Dict[str, Any]) -> None:
+    update: Dict[str, Any]
+    heartbeat = asyncio.create_task(
+        _heartbeat(document, get_settings().transcription_job_heartbeat_seconds)
+    )
+    try:
+        result = await transcribe_audio(
+            document["audio_path"],
+            language=document.get("language"),
+            audio_sha256=document.get("audio_sha256"),
+            tier=document.get("tier"),
+        )
+    except asyncio.CancelledError:
+        # Shutting down: hand the job back so the next start picks it up with its audio intact.
+        await _collection().update_one(
+            _claimed(document),
+            {
+                "$set": {"status": "queued", "updated_at": datetime.now(UTC)},
+                "$unset": {"claim": ""},
+            },
+        )
+        raise
+    except Exception as exc:
+        logger.warning("Transcription job %s failed: %s", document["_id"], exc)
+        update = {"status": "failed", "error": str(exc)}
+    else:
+        update = {
+            "status": "done",
+            "result": {"transcript": result.text, "language": result.language},
+        }
+    finally:
+        heartbeat.cancel()
+
+    now = datetime.now(UTC)
+    update.update({"updated_at": now, "finished_at": now})
+    recorded = await _collection().update_one(
+        _claimed(document), {"$set": update, "$unset": {"claim": ""}}
+    )
+    if not recorded.matched_count:
+        # Requeued and claimed elsewhere meanwhile: that worker owns the result and the audio.
+        logger.warning("Discarding result of reclaimed transcription job %s", document["_id"])
+        return
+
+    try:
+        os.remove(document["audio_path"])
+    except OSError:
+        pass
+
+
+async def _requeue_if_due(settings: Settings) -> None:
+    global _last_requeue
+    now = time.monotonic()
+    if (
+        _last_requeue is not None
+        and now - _last_requeue < settings.transcription_job_heartbeat_seconds
+    ):
+        return
+    _last_requeue = now
+    requeued = await requeue_interrupted_jobs()
+    if requeued:
+        logger.info("Requeued %d interrupted transcription jobs", requeued)
+
+
+async def _worker_loop(index: int) -> None:
+    settings = get_settings()
+    while True:
+        try:
+            await _requeue_if_due(settings)
+            document = await _claim_next_job()
+        except Exception as exc:  # pragma: no cover - transient database errors
+            logger.error("Transcription worker %d failed to claim a job: %s", index, exc)
+            document = None
+
+        if document is None:
+            assert _wakeup is not None
+            try:
+                await asyncio.wait_for(
+                    _wakeup.wait(), timeout=settings.transcription_poll_interval_seconds
+                )
+            except TimeoutError:
+                pass
+            _wakeup.clear()
+            continue
+
+        try:
+            await _run_job(document)
+        except Exception as exc:  # pragma: no cover - transient database errors
+            logger.error("Transcription worker %d failed to record job result: %s", index, exc)
+
+
+async def requeue_interrupted_jobs() -> int:
+    """Requeue running jobs whose worker has stopped sending heartbeats, e.g. after a crash.
+
+    Workers run this periodically, so jobs of a crashed instance are picked up again within a
+    few heartbeat intervals. The old claim is dropped, so a worker that was only stalled can no
+    longer record its result or delete the audio.
+    """
+    settings = get_settings()
+    now = datetime.now(UTC)
+    stale = now - timedelta(
+        seconds=settings.transcription_job_heartbeat_seconds * _MISSED_HEARTBEATS
+    )
+    legacy = now - timedelta(seconds=settings.transcription_job_timeout_seconds)
+    result = await _collection().update_many(
+        {
+            "status": "running",
+            "$or": [
+                {"heartbeat_at": {"$lt": stale}},
+                # Claimed before heartbeats were recorded.
+                {"heartbeat_at": {"$exists": False}, "started_at": {"$lt": legacy}},
+            ],
+        },
+        {"$set": {"status": "queued", "updated_at": now}, "$unset": {"claim": ""}},
+    )
+    return result.modified_count
+
+
+async def start_workers(count: int) -> None:
+    """Start ``count`` transcription workers draining the persistent queue."""
+    global _wakeup
+    if _workers:
+        return
+
+    _wakeup = asyncio.Event()
+    for index in range(count):
+        _workers.append(asyncio.create_task(_worker_loop(index), name=f"transcriber-{index}"))
+
+
+async def stop_workers() -> None:
+    global _wakeup
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _wakeup = None
@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from datetime import UTC, datetime
+from itertools import combinations
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+
+from app.database.indexes import register_indexes
+from app.database.mongodb import get_database
+
+logger = logging.getLogger(__name__)
+
+_NOTES_COLLECTION = "notes"
+_NODES_COLLECTION = "knowledge_graph_nodes"
+_EDGES_COLLECTION = "knowledge_graph_edges"
+_STATE_COLLECTION = "knowledge_graphs"
+
+register_indexes(
+    _NODES_COLLECTION,
+    lambda: [
+        IndexModel([("user_id", ASCENDING), ("key", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("notes", DESCENDING)]),
+    ],
+)
+register_indexes(
+    _EDGES_COLLECTION,
+    lambda: [
+        IndexModel(
+            [("user_id", ASCENDING), ("source", ASCENDING), ("target", ASCENDING)], unique=True
+        )
+    ],
+)
+
+
+def _collection(name: str) -> AsyncIOMotorCollection:
+    return get_database()[name]
+
+
+def topic_key(topic: str) -> str:
+    return topic.strip().lower()
+
+
+class NoteContribution:
+    """What one note adds to its owner's graph: topic counts, action counts and topic pairs."""
+
+    def __init__(self, note: Optional[Mapping[str, Any]] = None) -> None:
+        note = note or {}
+        self.labels: Dict[str, str] = {}
+        for topic in note.get("topics") or []:
+            key = topic_key(topic)
+            if key:
+                self.labels.setdefault(key, topic.strip())
+        self.actions = len(note.get("actions") or [])
+        self.pairs = set(combinations(sorted(self.labels), 2))
+
+
+def _graph_updates(
+    user_id: str, before: NoteContribution, after: NoteContribution
+) -> Tuple[List[UpdateOne], List[UpdateOne]]:
+    notes: Counter[str] = Counter()
+    actions: Counter[str] = Counter()
+    for key in before.labels:
+        notes[key] -= 1
+        actions[key] -= before.actions
+    for key in after.labels:
+        notes[key] += 1
+        actions[key] += after.actions
+
+    node_updates = [
+        UpdateOne(
+            {"user_id": user_id, "key": key},
+            {
+                "$inc": {"notes": notes[key], "actions": actions[key]},
+                "$setOnInsert": {"label": after.labels.get(key) or before.labels[key]},
+            },
+            upsert=True,
+        )
+        for key in notes
+        if notes[key] or actions[key]
+    ]
+
+    weights: Counter[Tuple[str, str]] = Counter()
+    for pair in before.pairs:
+        weights[pair] -= 1
+    for pair in after.pairs:
+        weights[pair] += 1
+    edge_updates = [
+        UpdateOne(
+            {"user_id": user_id, "source": source, "target": target},
+            {"$inc": {"weight": weight}},
+            upsert=True,
+        )
+        for (source, target), weight in weights.items()
+        if weight
+    ]
+    return node_updates, edge_updates
+
+
+async def _graph_state(user_id: str) -> Optional[Mapping[str, Any]]:
+    return await _collection(_STATE_COLLECTION).find_one({"_id": user_id}, {"building": 1})
+
+
+async def _is_built(user_id: str) -> bool:
+    state = await _graph_state(user_id)
+    return state is not None and "building" not in state
+
+
+async def invalidate(user_id: str) -> None:
+    """Mark a user's graph as untrusted so the next read rebuilds it from their notes."""
+    await _collection(_STATE_COLLECTION).delete_one({"_id": user_id})
+
+
+async def record_change(
+    user_id: str,
+    before: Optional[Mapping[str, Any]],
+    after: Optional[Mapping[str, Any]],
+) -> None:
+    """Apply the difference between a note's old and new topics and actions to the graph.
+
+    Pass ``before=None`` for a created note and ``after=None`` for a deleted one. Graphs that
+    have not been built yet are left alone; the first read builds them from scratch. A change
+    made while a rebuild is reading the notes, or a failed update, invalidates the graph rather
+    than failing the note write.
+    """
+
+    try:
+        state = await _graph_state(user_id)
+        if state is None:
+            return
+        if "building" in state:
+            # The rebuild may or may not have read this note; let the next read start over.
+            await invalidate(user_id)
+            return
+
+        node_updates, edge_updates = _graph_updates(
+            user_id, NoteContribution(before), NoteContribution(after)
+        )
+        if node_updates:
+            nodes = _collection(_NODES_COLLECTION)
+            await nodes.bulk_write(node_updates, ordered=False)
+            await nodes.delete_many({"user_id": user_id, "notes": {"$lte": 0}})
+        if edge_updates:
+            edges = _collection(_EDGES_COLLECTION)
+            await edges.bulk_write(edge_updates, ordered=False)
+            await edges.delete_many({"user_id": user_id, "weight": {"$lte": 0}})
+    except Exception as exc:  # pragma: no cover - depends on database availability
+        logger.warning("Knowledge graph update failed for user %s: %s", user_id, exc)
+        try:
+            await invalidate(user_id)
+        except Exception:
+            logger.exception("Failed to invalidate knowledge graph for user %s", user_id)
+
+
+def _topics_per_note_stages(user_id: str) -> List[Dict[str, Any]]:
+    """Pipeline stages yielding one ``{actions, topics: [{key, label}]}`` document per note."""
+    return [
+        {"$match": {"user_id": user_id}},
+        {
+            "$project": {
+                "_id": 0,
+                "actions": {"$size": {"$ifNull": ["$actions", []]}},
+                "topics": {
+                    "$map": {
+                        "input": {"$ifNull": ["$topics", []]},
+                        "as": "topic",
+                        "in": {
+                            "key": {"$toLower": {"$trim": {"input": "$$topic"}}},
+                            "label": {"$trim": {"input": "$$topic"}},
+                        },
+                    }
+                },
+            }
+        },
+        {
+            "$project": {
+                "actions": 1,
+                "topics": {"$filter": {"input": "$topics", "cond": {"$ne": ["$$this.key", ""]}}},
+            }
+        },
+    ]
+
+
+def node_pipeline(user_id: str) -> List[Dict[str, Any]]:
+    return [
+        *_topics_per_note_stages(user_id),
+        {"$project": {"actions": 1, "keys": {"$setUnion": ["$topics.key", []]}, "topics": 1}},
+        {"$unwind": "$keys"},
+        {
+            "$group": {
+                "_id": "$keys",
+                "notes": {"$sum": 1},
+                "actions": {"$sum": "$actions"},
+                "labels": {"$first": "$topics"},
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "user_id": {"$literal": user_id},
+                "key": "$_id",
+                "notes": 1,
+                "actions": 1,
+                "label": {
+                    "$arrayElemAt": [
+                        {
+                            "$map": {
+                                "input": {
+                                    "$filter": {
+                                        "input": "$labels",
+                                        "cond": {"$eq": ["$$this.key", "$_id"]},
+                                    }
+                                },
+                                "in": "$$this.label",
+                            }
+                        },
+                        0,
+                    ]
+                },
+            }
+        },
+        {
+            "$merge": {
+                "into": _NODES_COLLECTION,
+                "on": ["user_id", "key"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert",
+            }
+        },
+    ]
+
+
+def edge_pipeline(user_id: str) -> List[Dict[str, Any]]:
+    return [
+        *_topics_per_note_stages(user_id),
+        {"$project": {"source": {"$setUnion": ["$topics.key", []]}}},
+        {"$project": {"source": 1, "target": "$source"}},
+        {"$unwind": "$source"},
+        {"$unwind": "$target"},
+        {"$match": {"$expr": {"$lt": ["$source", "$target"]}}},
+        {"$group": {"_id": {"source": "$source", "target": "$target"}, "weight": {"$sum": 1}}},
+        {
+            "$project": {
+                "_id": 0,
+                "user_id": {"$literal": user_id},
+                "source": "$_id.source",
+                "target": "$_id.target",
+                "weight": 1,
+            }
+        },
+        {
+            "$merge": {
+                "into": _EDGES_COLLECTION,
+                "on": ["user_id", "source", "target"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert",
+            }
+        },
+    ]
+
+
+async def rebuild(user_id: str) -> None:
+    """Recompute a user's graph inside MongoDB with aggregation pipelines.
+
+    A ``building`` marker is written first. Note changes recorded meanwhile remove it, and the
+    graph is then only marked built if the marker is still this rebuild's own.
+    """
+
+    state = _collection(_STATE_COLLECTION)
+    build = ObjectId()
+    await state.replace_one({"_id": user_id}, {"_id": user_id, "building": build}, upsert=True)
+    await _collection(_NODES_COLLECTION).delete_many({"user_id": user_id})
+    await _collection(_EDGES_COLLECTION).delete_many({"user_id": user_id})
+
+    notes = _collection(_NOTES_COLLECTION)
+    # $merge writes server-side and returns no documents; iterating drives the pipeline.
+    for pipeline in (node_pipeline(user_id), edge_pipeline(user_id)):
+        await notes.aggregate(pipeline).to_list(length=None)
+
+    await state.replace_one(
+        {"_id": user_id, "building": build}, {"_id": user_id, "built_at": datetime.now(UTC)}
+    )
+
+
+async def get_user_graph(user_id: str, *, max_topics: int = 100) -> Dict[str, Any]:
+    """Return a user's most frequent topics and how often pairs of them share a meeting.
+
+    Reads cost the size of the graph, not the number of notes: counts are maintained
+    incrementally by ``record_change`` and only computed from the notes on first use.
+    """
+
+    if not await _is_built(user_id):
+        await rebuild(user_id)
+
+    nodes = (
+        await _collection(_NODES_COLLECTION)
+        .find({"user_id": user_id}, {"_id": 0, "user_id": 0})
+        .sort([("notes", DESCENDING), ("key", ASCENDING)])
+        .limit(max_topics)
+        .to_list(length=max_topics)
+    )
+    keys = [node["key"] for node in nodes]
+    edges = await (
+        _collection(_EDGES_COLLECTION)
+        .find(
+            {"user_id": user_id, "source": {"$in": keys}, "target": {"$in": keys}},
+            {"_id": 0, "user_id": 0},
+        )
+        .to_list(length=None)
+    )
+
+    return {
+        "nodes": [
+            {
+                "id": node["key"],
+                "label": node.get("label") or node["key"],
+                "notes": node["notes"],
+                "actions": node["actions"],
+            }
+            for node in nodes
+        ],
+        "links": [
+            {"source": edge["source"], "target": edge["target"], "weight": edge["weight"]}
+            for edge in edges
+        ],
+    }
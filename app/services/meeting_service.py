@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from app.models.meeting_model import MeetingResponse, MeetingTimings
+from app.models.note_model import NoteCreate
+from app.services import mindmap_service, nlp_service, note_service, whisper_service
+from app.utils.uploads import SpooledUpload
+
+
+class MeetingStageError(RuntimeError):
+    """Raised when a pipeline stage fails; ``stage`` names it so callers can map the status."""
+
+    def __init__(self, stage: str, message: str) -> None:
+        super().__init__(message)
+        self.stage = stage
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.perf_counter() - started, 4)
+
+
+async def process_meeting(
+    upload: SpooledUpload,
+    user_id: str,
+    *,
+    language: Optional[str] = None,
+    tier: Optional[str] = None,
+    upload_seconds: float = 0.0,
+) -> MeetingResponse:
+    """Transcribe an uploaded recording, summarise it, build its mind map and save the note.
+
+    The transcript is handed from stage to stage in memory instead of travelling back to the
+    client between calls. The stages depend on each other's output, so they run in order; the
+    spooled audio is removed as soon as transcription is done rather than at the end.
+    ``ValueError`` from any stage propagates unchanged; other failures are raised as
+    ``MeetingStageError``.
+    """
+
+    started = time.perf_counter()
+    timings: Dict[str, float] = {"upload": round(upload_seconds, 4)}
+
+    try:
+        with _timed(timings, "transcribe"):
+            transcription = await whisper_service.transcribe_audio(
+                upload.path, language=language, audio_sha256=upload.sha256, tier=tier
+            )
+    except RuntimeError as exc:
+        raise MeetingStageError("transcribe", str(exc)) from exc
+    finally:
+        upload.remove()
+
+    try:
+        with _timed(timings, "summarise"):
+            summary = await nlp_service.generate_summary(transcription.text)
+    except RuntimeError as exc:
+        raise MeetingStageError("summarise", str(exc)) from exc
+
+    with _timed(timings, "mindmap"):
+        mindmap = await asyncio.to_thread(
+            mindmap_service.build_mindmap, summary["actions"], summary["topics"]
+        )
+
+    note = NoteCreate(
+        transcript=transcription.text,
+        summary=summary["summary"],
+        actions=summary["actions"],
+        topics=summary["topics"],
+        mindmap=mindmap,
+    )
+    try:
+        with _timed(timings, "save"):
+            saved = await note_service.create_note(note, user_id)
+    except RuntimeError as exc:
+        raise MeetingStageError("save", str(exc)) from exc
+
+    timings["total"] = round(upload_seconds + time.perf_counter() - started, 4)
+    return MeetingResponse(
+        note=saved, language=transcription.language, timings=MeetingTimings(**timings)
+    )
@@ -1,22 +1,137 @@
-﻿from typing import Dict, List
+﻿from __future__ import annotations
 
+import math
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Set
 
-def build_mindmap(
-    actions: List[Dict[str, str]], topics: List[str]
-) -> Dict[str, List[Dict[str, str]]]:
-    """Construct minimal mind map structure until networkx integration is added."""
-    nodes = [{"id": "root", "label": "Meeting Summary"}]
-    links: List[Dict[str, str]] = []
+import networkx as nx
 
+from app.utils.metrics import instrumented
+
+# Bump when the stored graph format changes so outdated mind maps are rebuilt on read.
+MINDMAP_VERSION = 2
+
+_ROOT = "root"
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in into is it of on or our the their this to "
+    "was we were will with".split()
+)
+
+
+def _keywords(text: str) -> Set[str]:
+    return {
+        word
+        for word in _WORD_PATTERN.findall(text.lower())
+        if len(word) > 2 and word not in _STOPWORDS
+    }
+
+
+def _action_label(action: Dict[str, Any]) -> str:
+    return action.get("task") or action.get("summary") or "Action"
+
+
+def _action_text(action: Dict[str, Any]) -> Iterable[str]:
+    return (value for value in action.values() if isinstance(value, str))
+
+
+def build_graph(actions: List[Dict[str, Any]], topics: List[str]) -> nx.Graph:
+    """Link each topic to the root and each action to the topics it relates to most.
+
+    An action relates to a topic through shared keywords, each weighted by how few topics use
+    it, and is linked to its best-scoring topics only. Topics are looked up through an inverted
+    keyword index, so matching costs time proportional to the words in the actions rather than
+    actions x topics. Actions with no related topic hang off the root.
+    """
+
+    graph = nx.Graph()
+    graph.add_node(_ROOT, label="Meeting Summary", kind="root")
+
+    topic_index: Dict[str, List[str]] = defaultdict(list)
     for index, topic in enumerate(topics, start=1):
         topic_id = f"topic-{index}"
-        nodes.append({"id": topic_id, "label": topic})
-        links.append({"source": "root", "target": topic_id})
+        graph.add_node(topic_id, label=topic, kind="topic")
+        graph.add_edge(_ROOT, topic_id)
+        for word in _keywords(topic):
+            topic_index[word].append(topic_id)
+
+    for index, action in enumerate(actions, start=1):
+        action_id = f"action-{index}"
+        graph.add_node(action_id, label=_action_label(action), kind="action")
+        words = set().union(*(_keywords(text) for text in _action_text(action)))
+        scores: Dict[str, float] = defaultdict(float)
+        for word in words:
+            matches = topic_index.get(word, ())
+            if len(matches) == len(topics) > 1:
+                continue  # shared by every topic, so it tells them apart no better than root
+            for topic_id in matches:
+                scores[topic_id] += 1 / len(matches)
+
+        best = max(scores.values(), default=0.0)
+        related = sorted(topic_id for topic_id, score in scores.items() if score == best)
+        for topic_id in related or [_ROOT]:
+            graph.add_edge(topic_id, action_id)
+
+    return graph
+
+
+def _radial_layout(graph: nx.Graph) -> Dict[str, tuple[float, float]]:
+    """Place topics on an inner ring and actions on an outer ring next to their first topic.
+
+    Deterministic and linear in the graph size, unlike force-directed layouts.
+    """
+
+    positions: Dict[str, tuple[float, float]] = {_ROOT: (0.0, 0.0)}
+    topics = [node for node, kind in graph.nodes(data="kind") if kind == "topic"]
+    groups: Dict[str, List[str]] = {topic: [] for topic in topics}
+    loose: List[str] = []
+    for node, kind in graph.nodes(data="kind"):
+        if kind != "action":
+            continue
+        anchors = sorted(neighbour for neighbour in graph[node] if neighbour in groups)
+        (groups[anchors[0]] if anchors else loose).append(node)
+
+    sectors = [*topics, *(["__loose__"] if loose else [])]
+    groups["__loose__"] = loose
+    slice_angle = 2 * math.pi / max(len(sectors), 1)
+    for position, sector in enumerate(sectors):
+        centre = position * slice_angle
+        if sector in graph:
+            positions[sector] = (round(math.cos(centre), 4), round(math.sin(centre), 4))
+        members = groups[sector]
+        for offset, node in enumerate(members):
+            angle = centre + slice_angle * ((offset + 0.5) / len(members) - 0.5)
+            positions[node] = (round(2 * math.cos(angle), 4), round(2 * math.sin(angle), 4))
+    return positions
+
+
+@instrumented("mindmap.build")
+def build_mindmap(actions: List[Dict[str, Any]], topics: List[str]) -> Dict[str, Any]:
+    """Build the mind map of a note, with layout and degree centrality precomputed.
+
+    The result is stored on the note, so this runs when its actions or topics change rather
+    than on every read.
+    """
+
+    graph = build_graph(actions, topics)
+    positions = _radial_layout(graph)
+    centrality = nx.degree_centrality(graph) if len(graph) > 1 else {_ROOT: 0.0}
+
+    nodes = [
+        {
+            "id": node,
+            "label": data["label"],
+            "type": data["kind"],
+            "x": positions[node][0],
+            "y": positions[node][1],
+            "centrality": round(centrality[node], 4),
+        }
+        for node, data in graph.nodes(data=True)
+    ]
+    links = [{"source": source, "target": target} for source, target in graph.edges()]
+    return {"version": MINDMAP_VERSION, "nodes": nodes, "links": links}
 
-    for idx, action in enumerate(actions, start=1):
-        action_id = f"action-{idx}"
-        label = action.get("task") or action.get("summary") or "Action"
-        nodes.append({"id": action_id, "label": label})
-        links.append({"source": "root", "target": action_id})
 
-    return {"nodes": nodes, "links": links}
+def is_current(mindmap: Dict[str, Any] | None) -> bool:
+    return bool(mindmap) and mindmap.get("version") == MINDMAP_VERSION
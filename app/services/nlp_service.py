@@ -1,8 +1,13 @@
 ﻿from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
+import random
+import time
+from functools import lru_cache, partial
 from threading import Lock
-from typing import Any, Dict, List, Tuple
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
 
 from langchain_core.exceptions import OutputParserException
 from langchain_core.output_parsers import JsonOutputParser
@@ -11,9 +16,18 @@ from langchain_core.runnables import Runnable
 from langchain_openai import ChatOpenAI
 
 from app.config import get_settings
+from app.database.cache_store import TieredCache
+from app.database.indexes import register_indexes
+from app.utils import metrics
+from app.utils.cache import SingleFlight
+from app.utils.helpers import chunk_sentences
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever the prompts change so cached summaries from older prompts are not reused.
+PROMPT_VERSION = "1"
+_SUMMARY_CACHE_COLLECTION = "summary_cache"
+
 _PARSER = JsonOutputParser()
 _PROMPT = ChatPromptTemplate.from_messages(
     [
@@ -26,19 +40,101 @@ _PROMPT = ChatPromptTemplate.from_messages(
     ]
 ).partial(format_instructions=_PARSER.get_format_instructions())
 
-_chain_cache: Dict[Tuple[str, str], Runnable[Any, Dict[str, Any]]] = {}
+_REDUCE_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "You merge partial summaries of consecutive parts of one meeting into a single "
+            "concise summary of the whole meeting. Respond with a JSON object containing a "
+            '"summary" string.',
+        ),
+        ("human", "Partial summaries:\n{summaries}"),
+    ]
+)
+
+_chain_cache: Dict[Tuple[str, str, str], Runnable[Any, Dict[str, Any]]] = {}
 _chain_lock = Lock()
 
+_summary_cache: Optional[TieredCache] = None
+_summary_cache_lock = Lock()
+_summary_flight: SingleFlight[str, Dict[str, Any]] = SingleFlight("summary_single_flight")
 
-def _get_chain(api_key: str, model_name: str) -> Runnable[Any, Dict[str, Any]]:
-    key = (api_key, model_name)
+
+def _cached_chain(
+    name: str, prompt: ChatPromptTemplate, api_key: str, model_name: str
+) -> Runnable[Any, Dict[str, Any]]:
+    key = (name, api_key, model_name)
     with _chain_lock:
         if key not in _chain_cache:
             llm = ChatOpenAI(model=model_name, temperature=0.2, api_key=api_key)
-            _chain_cache[key] = _PROMPT | llm | _PARSER
+            _chain_cache[key] = prompt | llm | _PARSER
     return _chain_cache[key]
 
 
+def _get_chain(api_key: str, model_name: str) -> Runnable[Any, Dict[str, Any]]:
+    return _cached_chain("summary", _PROMPT, api_key, model_name)
+
+
+def _get_reduce_chain(api_key: str, model_name: str) -> Runnable[Any, Dict[str, Any]]:
+    return _cached_chain("reduce", _REDUCE_PROMPT, api_key, model_name)
+
+
+def _get_summary_cache() -> TieredCache:
+    global _summary_cache
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            settings = get_settings()
+            _summary_cache = TieredCache(
+                "summaries",
+                _SUMMARY_CACHE_COLLECTION,
+                maxsize=settings.summary_cache_size,
+                ttl_seconds=settings.summary_cache_ttl_seconds,
+            )
+        return _summary_cache
+
+
+def _summary_cache_key(transcript: str, model_name: str) -> str:
+    normalised = " ".join(transcript.split())
+    material = "\0".join((PROMPT_VERSION, model_name, normalised))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+register_indexes(_SUMMARY_CACHE_COLLECTION, lambda: _get_summary_cache().index_models())
+
+
+def clear_summary_cache() -> None:
+    _get_summary_cache().clear_memory()
+
+
+@lru_cache(maxsize=8)
+def _encoding(model_name: str):
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def _count_tokens(text: str, model_name: str) -> int:
+    """Count tokens with the model's tokenizer; blocking, so call it off the event loop.
+
+    The first call for a model may download its BPE file, and long transcripts take a while to
+    encode.
+    """
+
+    try:
+        encoding = _encoding(model_name)
+    except Exception:  # pragma: no cover - tokenizer files unavailable (e.g. offline)
+        # Roughly four characters per token for English text.
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+# Item types kept in a summary's lists; streamed ``action``/``topic`` events use the same filter.
+_ITEM_TYPES = {"actions": dict, "topics": str}
+
+
 def _normalise_summary_payload(data: Dict[str, Any], transcript: str) -> Dict[str, Any]:
     summary = data.get("summary") or ""
     actions = data.get("actions") or []
@@ -49,8 +145,8 @@ def _normalise_summary_payload(data: Dict[str, Any], transcript: str) -> Dict[st
     if not isinstance(topics, list):
         topics = []
 
-    filtered_actions = [action for action in actions if isinstance(action, dict)]
-    filtered_topics = [topic for topic in topics if isinstance(topic, str)]
+    filtered_actions = [action for action in actions if isinstance(action, _ITEM_TYPES["actions"])]
+    filtered_topics = [topic for topic in topics if isinstance(topic, _ITEM_TYPES["topics"])]
 
     return {
         "summary": summary,
@@ -60,6 +156,129 @@ def _normalise_summary_payload(data: Dict[str, Any], transcript: str) -> Dict[st
     }
 
 
+async def _invoke(chain: Runnable[Any, Dict[str, Any]], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return await chain.ainvoke(inputs) or {}
+    except OutputParserException as exc:
+        logger.error("Failed to parse LangChain output: %s", exc)
+        raise RuntimeError("Failed to parse OpenAI response.") from exc
+    except Exception as exc:  # pragma: no cover - unexpected LangChain/OpenAI issues
+        logger.error("LangChain agent error: %s", exc)
+        raise RuntimeError("OpenAI summarisation error.") from exc
+
+
+def _action_key(action: Dict[str, Any]) -> str:
+    label = action.get("task") or action.get("summary") or repr(sorted(action.items()))
+    return " ".join(str(label).lower().split())
+
+
+def _merge_partials(partials: Sequence[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    actions: Dict[str, Dict[str, Any]] = {}
+    topics: Dict[str, str] = {}
+    for partial_result in partials:
+        for action in partial_result["actions"]:
+            actions.setdefault(_action_key(action), action)
+        for topic in partial_result["topics"]:
+            topics.setdefault(topic.strip().casefold(), topic.strip())
+    return list(actions.values()), list(topics.values())
+
+
+async def _reduce_summaries(
+    summaries: List[str],
+    reduce_chain: Runnable[Any, Dict[str, Any]],
+    count_tokens: Callable[[str], int],
+    max_tokens: int,
+    semaphore: asyncio.Semaphore,
+) -> str:
+    """Merge partial summaries, in rounds of groups that fit the context budget."""
+
+    async def reduce_group(group: List[str]) -> str:
+        numbered = "\n\n".join(f"Part {index}: {text}" for index, text in enumerate(group, 1))
+        async with semaphore:
+            response = await _invoke(reduce_chain, {"summaries": numbered})
+        return str(response.get("summary") or "")
+
+    while len(summaries) > 1:
+        groups: List[List[str]] = [[]]
+        group_tokens = 0
+        for summary in summaries:
+            tokens = count_tokens(summary)
+            if groups[-1] and group_tokens + tokens > max_tokens:
+                groups.append([])
+                group_tokens = 0
+            groups[-1].append(summary)
+            group_tokens += tokens
+        if len(groups) == len(summaries):
+            # Every summary fills the budget alone; merging in pairs still makes progress.
+            groups = [summaries[index : index + 2] for index in range(0, len(summaries), 2)]
+        summaries = list(await asyncio.gather(*(reduce_group(group) for group in groups)))
+
+    return summaries[0] if summaries else ""
+
+
+async def _summarise_in_chunks(transcript: str, api_key: str, model_name: str) -> Dict[str, Any]:
+    settings = get_settings()
+    count_tokens = partial(_count_tokens, model_name=model_name)
+    chunks = await asyncio.to_thread(
+        chunk_sentences,
+        transcript,
+        settings.summary_chunk_tokens,
+        count_tokens=count_tokens,
+        overlap_tokens=settings.summary_chunk_overlap_tokens,
+    )
+    chain = _get_chain(api_key, model_name)
+    semaphore = asyncio.Semaphore(settings.summary_max_concurrency)
+
+    async def summarise_chunk(chunk: str) -> Dict[str, Any]:
+        async with semaphore:
+            response = await _invoke(chain, {"transcript": chunk})
+        return _normalise_summary_payload(response, chunk)
+
+    partials = await asyncio.gather(*(summarise_chunk(chunk) for chunk in chunks))
+    actions, topics = _merge_partials(partials)
+    summary = await _reduce_summaries(
+        [partial_result["summary"] for partial_result in partials if partial_result["summary"]],
+        _get_reduce_chain(api_key, model_name),
+        count_tokens,
+        settings.summary_chunk_tokens,
+        semaphore,
+    )
+    return {"summary": summary, "actions": actions, "topics": topics}
+
+
+async def _needs_chunking(transcript: str, model_name: str) -> bool:
+    limit = get_settings().summary_chunk_tokens
+    # A token never covers less than one byte, so short transcripts skip the tokenizer.
+    if len(transcript.encode("utf-8")) <= limit:
+        return False
+    return await asyncio.to_thread(_count_tokens, transcript, model_name) > limit
+
+
+async def _summarise(transcript: str, api_key: str, model_name: str) -> Dict[str, Any]:
+    with metrics.track("nlp.llm", model_name):
+        if await _needs_chunking(transcript, model_name):
+            raw_response = await _summarise_in_chunks(transcript, api_key, model_name)
+        else:
+            raw_response = await _invoke(
+                _get_chain(api_key, model_name), {"transcript": transcript}
+            )
+    return _normalise_summary_payload(raw_response, transcript)
+
+
+async def _summarise_cached(
+    key: str, transcript: str, api_key: str, model_name: str
+) -> Dict[str, Any]:
+    cache = _get_summary_cache()
+    cached = await cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = await _summarise(transcript, api_key, model_name)
+    payload = {name: result[name] for name in ("summary", "actions", "topics")}
+    await cache.put(key, payload)
+    return payload
+
+
 async def generate_summary(transcript: str) -> Dict[str, Any]:
     cleaned_transcript = transcript.strip()
     if not cleaned_transcript:
@@ -69,10 +288,66 @@ async def generate_summary(transcript: str) -> Dict[str, Any]:
     if not settings.openai_api_key:
         raise RuntimeError("OpenAI API key is not configured.")
 
-    chain = _get_chain(settings.openai_api_key, settings.openai_model)
+    api_key, model_name = settings.openai_api_key, settings.openai_model
+    with metrics.track("nlp.generate_summary", model_name):
+        if not settings.summary_cache_enabled:
+            return await _summarise(cleaned_transcript, api_key, model_name)
+
+        # Identical concurrent requests share one in-flight LLM call.
+        key = _summary_cache_key(cleaned_transcript, model_name)
+        payload = await _summary_flight.run(
+            key, lambda: _summarise_cached(key, cleaned_transcript, api_key, model_name)
+        )
+    return {**payload, "transcript_length": len(cleaned_transcript)}
+
+
+def _completed_items(value: Any) -> List[Any]:
+    # While streaming, the last element of a partially parsed list may still be growing.
+    return value[:-1] if isinstance(value, list) else []
 
+
+async def stream_summary(transcript: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ``(event, data)`` pairs while the summary is generated.
+
+    ``summary`` events carry text deltas as the summary forms, ``action`` and ``topic`` events
+    carry list items once they are complete, and a final ``result`` event carries the same
+    payload ``generate_summary`` returns. Validation errors are raised before the first event.
+    Cached summaries and transcripts that need map-reduce produce only the ``result`` event.
+    """
+
+    cleaned_transcript = transcript.strip()
+    if not cleaned_transcript:
+        raise ValueError("Transcript is empty.")
+
+    settings = get_settings()
+    if not settings.openai_api_key:
+        raise RuntimeError("OpenAI API key is not configured.")
+
+    api_key, model_name = settings.openai_api_key, settings.openai_model
+    key = _summary_cache_key(cleaned_transcript, model_name)
+    cache = _get_summary_cache() if settings.summary_cache_enabled else None
+    cached = await cache.get(key) if cache is not None else None
+    if cached is not None or await _needs_chunking(cleaned_transcript, model_name):
+        yield "result", await generate_summary(cleaned_transcript)
+        return
+
+    chain = _get_chain(api_key, model_name)
+    latest: Dict[str, Any] = {}
+    sent = {"summary": 0, "actions": 0, "topics": 0}
     try:
-        raw_response = await chain.ainvoke({"transcript": cleaned_transcript})
+        async for latest in chain.astream({"transcript": cleaned_transcript}):
+            if not isinstance(latest, dict):
+                continue
+            summary = latest.get("summary")
+            if isinstance(summary, str) and len(summary) > sent["summary"]:
+                yield "summary", {"delta": summary[sent["summary"] :]}
+                sent["summary"] = len(summary)
+            for field, event in (("actions", "action"), ("topics", "topic")):
+                items = _completed_items(latest.get(field))
+                for item in items[sent[field] :]:
+                    if isinstance(item, _ITEM_TYPES[field]):
+                        yield event, {"item": item}
+                sent[field] = max(sent[field], len(items))
     except OutputParserException as exc:
         logger.error("Failed to parse LangChain output: %s", exc)
         raise RuntimeError("Failed to parse OpenAI response.") from exc
@@ -80,7 +355,93 @@ async def generate_summary(transcript: str) -> Dict[str, Any]:
         logger.error("LangChain agent error: %s", exc)
         raise RuntimeError("OpenAI summarisation error.") from exc
 
-    return _normalise_summary_payload(raw_response or {}, cleaned_transcript)
+    final = latest if isinstance(latest, dict) else {}
+    # The stream has ended, so the last item of each list is complete as well.
+    for field, event in (("actions", "action"), ("topics", "topic")):
+        items = final.get(field)
+        for item in items[sent[field] :] if isinstance(items, list) else ():
+            if isinstance(item, _ITEM_TYPES[field]):
+                yield event, {"item": item}
+
+    result = _normalise_summary_payload(final, cleaned_transcript)
+    if cache is not None:
+        await cache.put(key, {name: result[name] for name in ("summary", "actions", "topics")})
+    yield "result", result
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Return the suggested delay if ``exc`` was caused by an HTTP 429, else ``None``."""
+    error: Optional[BaseException] = exc
+    while error is not None:
+        if getattr(error, "status_code", None) == 429:
+            response = getattr(error, "response", None)
+            header = response.headers.get("retry-after") if response is not None else None
+            try:
+                return float(header) if header else 0.0
+            except ValueError:
+                return 0.0
+        error = error.__cause__
+    return None
+
+
+async def _generate_with_backoff(transcript: str) -> Dict[str, Any]:
+    settings = get_settings()
+    attempt = 0
+    while True:
+        try:
+            return await generate_summary(transcript)
+        except RuntimeError as exc:
+            suggested = _retry_after(exc)
+            if suggested is None or attempt >= settings.summary_batch_max_retries:
+                raise
+            backoff = settings.summary_batch_backoff_seconds * 2**attempt
+            delay = max(suggested, backoff) + random.uniform(0, backoff / 2)
+            logger.warning("Rate limited by OpenAI; retrying in %.1fs", delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def generate_summaries(
+    transcripts: Sequence[str], *, concurrency: Optional[int] = None
+) -> Dict[str, Any]:
+    """Summarise many transcripts with bounded concurrency and rate-limit-aware retries.
+
+    Each item reports either its ``result`` or its ``error``; one failure never fails the batch.
+    ``tokens_per_second`` counts the input tokens of the successfully summarised transcripts.
+    """
+
+    settings = get_settings()
+    if len(transcripts) > settings.summary_batch_max_items:
+        raise ValueError(f"A batch may contain at most {settings.summary_batch_max_items} items.")
+
+    semaphore = asyncio.Semaphore(concurrency or settings.summary_batch_concurrency)
+
+    async def summarise_item(index: int, transcript: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                result = await _generate_with_backoff(transcript)
+            except (ValueError, RuntimeError) as exc:
+                return {"index": index, "result": None, "error": str(exc)}
+        return {"index": index, "result": result, "error": None}
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(summarise_item(index, transcript) for index, transcript in enumerate(transcripts))
+    )
+    elapsed = time.perf_counter() - started
+
+    succeeded = [transcripts[item["index"]] for item in results if item["error"] is None]
+    tokens = await asyncio.to_thread(
+        lambda: sum(_count_tokens(transcript, settings.openai_model) for transcript in succeeded)
+    )
+    return {
+        "results": results,
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "elapsed_seconds": elapsed,
+        "items_per_second": len(succeeded) / elapsed if elapsed else 0.0,
+        "tokens_per_second": tokens / elapsed if elapsed else 0.0,
+    }
 
 
 async def extract_actions(transcript: str) -> List[Dict[str, Any]]:
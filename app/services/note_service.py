@@ -1,15 +1,45 @@
-﻿from datetime import datetime
-from typing import Any, Dict, List, Optional
+﻿import asyncio
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
 
 from bson import ObjectId
 from bson.errors import InvalidId
 from motor.motor_asyncio import AsyncIOMotorCollection
-from pymongo import ReturnDocument
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
 
+from app.database.indexes import register_indexes
 from app.database.mongodb import get_database
-from app.models.note_model import NoteCreate, NoteRead, NoteUpdate
+from app.models.note_model import NoteCreate, NotePage, NoteRead, NoteSummary, NoteUpdate
+from app.services import (
+    knowledge_graph_service,
+    mindmap_service,
+    search_service,
+    transcript_service,
+)
+from app.utils.metrics import instrumented
 
 _COLLECTION_NAME = "notes"
+_LIST_PROJECTION = {
+    "transcript": 0,
+    "transcript_excerpt": 0,
+    "transcript_terms": 0,
+    "mindmap": 0,
+    "embedding": 0,
+    "embedding_model": 0,
+}
+_NOTE_PROJECTION = {
+    "transcript_excerpt": 0,
+    "transcript_terms": 0,
+    "embedding": 0,
+    "embedding_model": 0,
+}
+# Notes not yet migrated still hold their transcript inline; leave it out when not asked for.
+_NOTE_PROJECTION_WITHOUT_TRANSCRIPT = {**_NOTE_PROJECTION, "transcript": 0}
+_EMBEDDED_FIELDS = {"transcript_excerpt", "summary", "topics"}
+_LIST_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
 
 
 def _collection() -> AsyncIOMotorCollection:
@@ -22,6 +52,15 @@ def _normalize(document: Dict[str, Any]) -> NoteRead:
     return NoteRead.model_validate(payload)
 
 
+def _projection(include_transcript: bool) -> Dict[str, int]:
+    return _NOTE_PROJECTION if include_transcript else _NOTE_PROJECTION_WITHOUT_TRANSCRIPT
+
+
+def _attach_transcript(document: Dict[str, Any], stored: Optional[str]) -> None:
+    if "transcript" not in document:
+        document["transcript"] = stored if stored is not None else ""
+
+
 def _object_id(note_id: str) -> ObjectId:
     try:
         return ObjectId(note_id)
@@ -29,50 +68,250 @@ def _object_id(note_id: str) -> ObjectId:
         raise ValueError("Invalid note id") from exc
 
 
-async def list_notes(user_id: str) -> List[NoteRead]:
-    notes: List[NoteRead] = []
-    cursor = _collection().find({"user_id": user_id}).sort("created_at", -1)
-    async for document in cursor:
-        notes.append(_normalize(document))
-    return notes
+def _encode_cursor(document: Dict[str, Any]) -> str:
+    position = {"created_at": document["created_at"].isoformat(), "id": str(document["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(position["created_at"]), ObjectId(position["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError, InvalidId) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+register_indexes(_COLLECTION_NAME, lambda: [IndexModel([("user_id", ASCENDING), *_LIST_SORT])])
 
 
+@instrumented("notes.list")
+async def list_notes(user_id: str, *, limit: int = 50, cursor: Optional[str] = None) -> NotePage:
+    """Return one page of a user's notes, newest first, without transcripts or mind maps.
+
+    Pages are keyed on ``(created_at, _id)`` rather than skipped over, so every page is a bounded
+    range scan of the ``user_id, created_at, _id`` index however many notes precede it.
+    """
+    query: Dict[str, Any] = {"user_id": user_id}
+    if cursor:
+        created_at, last_id = _decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}},
+        ]
+
+    documents = (
+        await _collection()
+        .find(query, _LIST_PROJECTION)
+        .sort(_LIST_SORT)
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    next_cursor = _encode_cursor(documents[limit - 1]) if len(documents) > limit else None
+
+    items = []
+    for document in documents[:limit]:
+        payload = document.copy()
+        payload["id"] = str(payload.pop("_id"))
+        items.append(NoteSummary.model_validate(payload))
+    return NotePage(items=items, next_cursor=next_cursor)
+
+
+@instrumented("notes.create")
 async def create_note(note: NoteCreate, user_id: str) -> NoteRead:
+    """Insert a note; its transcript goes to the transcript store, an excerpt stays inline."""
     now = datetime.utcnow()
     payload = note.model_dump()
+    transcript = payload.pop("transcript")
+    payload.update(transcript_service.note_fields(transcript))
+    if not payload["mindmap"]:
+        payload["mindmap"] = await asyncio.to_thread(
+            mindmap_service.build_mindmap, payload["actions"], payload["topics"]
+        )
     payload["user_id"] = user_id
     payload["created_at"] = now
     payload["updated_at"] = now
-    result = await _collection().insert_one(payload)
-    payload["_id"] = result.inserted_id
-    return _normalize(payload)
+    payload["_id"] = ObjectId()
+    await transcript_service.save(payload["_id"], user_id, transcript)
+    try:
+        await _collection().insert_one(payload)
+    except Exception:
+        await transcript_service.delete(payload["_id"])
+        raise
+    await knowledge_graph_service.record_change(user_id, None, payload)
+    search_service.schedule_embedding(payload["_id"], user_id)
+    return _normalize({**payload, "transcript": transcript})
 
 
-async def get_note(note_id: str, user_id: Optional[str] = None) -> Optional[NoteRead]:
+@instrumented("notes.get")
+async def get_note(
+    note_id: str, user_id: Optional[str] = None, *, include_transcript: bool = True
+) -> Optional[NoteRead]:
+    """Fetch a note; the transcript is read from its own store only when asked for."""
     query: Dict[str, Any] = {"_id": _object_id(note_id)}
     if user_id:
         query["user_id"] = user_id
 
-    document = await _collection().find_one(query)
+    if not include_transcript:
+        document = await _collection().find_one(query, _NOTE_PROJECTION_WITHOUT_TRANSCRIPT)
+        return _normalize(document) if document else None
+
+    # Both lookups are by _id, so they run side by side rather than one after the other.
+    document, stored = await asyncio.gather(
+        _collection().find_one(query, _NOTE_PROJECTION),
+        transcript_service.load(query["_id"], user_id),
+    )
     if not document:
         return None
+    _attach_transcript(document, stored)
     return _normalize(document)
 
 
-async def update_note(note_id: str, update: NoteUpdate, user_id: str) -> Optional[NoteRead]:
+@instrumented("notes.update")
+async def update_note(
+    note_id: str, update: NoteUpdate, user_id: str, *, include_transcript: bool = True
+) -> Optional[NoteRead]:
+    """Apply a partial update; the stored transcript is rewritten only when it is part of it."""
     update_data = update.model_dump(exclude_unset=True)
-    if not update_data:
-        return await get_note(note_id, user_id)
+    transcript = update_data.pop("transcript", None)
+    if not update_data and transcript is None:
+        return await get_note(note_id, user_id, include_transcript=include_transcript)
+
+    query = {"_id": _object_id(note_id), "user_id": user_id}
+    changes: Dict[str, Any] = {}
+    if transcript is not None:
+        update_data.update(transcript_service.note_fields(transcript))
+        changes["$unset"] = {"transcript": ""}
+    previous = await _changed_content(query, update_data)
+    if previous is not None and "mindmap" not in update_data:
+        update_data["mindmap"] = await asyncio.to_thread(
+            mindmap_service.build_mindmap,
+            update_data.get("actions", previous.get("actions", [])),
+            update_data.get("topics", previous.get("topics", [])),
+        )
 
     update_data["updated_at"] = datetime.utcnow()
-    result = await _collection().find_one_and_update(
-        {"_id": _object_id(note_id), "user_id": user_id},
-        {"$set": update_data},
-        return_document=ReturnDocument.AFTER,
+    changes["$set"] = update_data
+    if transcript is None:
+        result = await _collection().find_one_and_update(
+            query,
+            changes,
+            projection=_projection(include_transcript),
+            return_document=ReturnDocument.AFTER,
+        )
+    else:
+        result = await _update_with_transcript(query, changes, transcript, include_transcript)
+    if not result:
+        return None
+
+    if previous is not None:
+        await knowledge_graph_service.record_change(user_id, previous, result)
+    if _EMBEDDED_FIELDS & update_data.keys():
+        search_service.schedule_embedding(result["_id"], user_id)
+
+    if include_transcript:
+        stored = transcript
+        if stored is None and "transcript" not in result:
+            stored = await transcript_service.load(result["_id"], user_id)
+        _attach_transcript(result, stored)
+    return _normalize(result)
+
+
+async def _update_with_transcript(
+    query: Dict[str, Any], changes: Dict[str, Any], transcript: str, include_transcript: bool
+) -> Optional[Dict[str, Any]]:
+    """Save the new transcript, then the note that describes it; undo the save if that fails.
+
+    As in ``create_note`` the store is written first, so a note never carries the excerpt and
+    search terms of a transcript that was not saved. The store is keyed by note id alone, so
+    the caller's ownership is checked before anything is written.
+    """
+
+    owned = await _collection().find_one(query, {"transcript": 1})
+    if owned is None:
+        return None
+    note_id, user_id = query["_id"], query["user_id"]
+    if "transcript" in owned:
+        stored_before: Optional[str] = None  # Not migrated yet: the store had no copy.
+    else:
+        stored_before = await transcript_service.load(note_id, user_id)
+
+    await transcript_service.save(note_id, user_id, transcript)
+    try:
+        result = await _collection().find_one_and_update(
+            query,
+            changes,
+            projection=_projection(include_transcript),
+            return_document=ReturnDocument.AFTER,
+        )
+    except BaseException:
+        await _restore_transcript(note_id, user_id, stored_before)
+        raise
+    if result is None:
+        # Deleted meanwhile; don't leave the transcript behind.
+        await transcript_service.delete(note_id)
+    return result
+
+
+async def _restore_transcript(note_id: ObjectId, user_id: str, stored: Optional[str]) -> None:
+    if stored is None:
+        await transcript_service.delete(note_id)
+    else:
+        await transcript_service.save(note_id, user_id, stored)
+
+
+async def _changed_content(
+    query: Dict[str, Any], update_data: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Return the note's current actions and topics if the update really changes either."""
+    if not {"actions", "topics"} & update_data.keys():
+        return None
+
+    current = await _collection().find_one(query, {"actions": 1, "topics": 1, "_id": 0})
+    if current is None:
+        return None
+
+    if all(
+        update_data.get(field, current.get(field)) == current.get(field)
+        for field in ("actions", "topics")
+    ):
+        return None
+    return current
+
+
+@instrumented("notes.get_mindmap")
+async def get_mindmap(note_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """Return a note's stored mind map, fetching only that field.
+
+    Notes saved before mind maps were persisted (or with an outdated format) are built once
+    from their actions and topics and written back.
+    """
+    query = {"_id": _object_id(note_id), "user_id": user_id}
+    document = await _collection().find_one(query, {"mindmap": 1, "_id": 0})
+    if document is None:
+        return None
+    if mindmap_service.is_current(document.get("mindmap")):
+        return document["mindmap"]
+
+    source = await _collection().find_one(query, {"actions": 1, "topics": 1, "_id": 0})
+    if source is None:
+        return None
+    mindmap = await asyncio.to_thread(
+        mindmap_service.build_mindmap, source.get("actions", []), source.get("topics", [])
     )
-    return _normalize(result) if result else None
+    await _collection().update_one(query, {"$set": {"mindmap": mindmap}})
+    return mindmap
 
 
+@instrumented("notes.delete")
 async def delete_note(note_id: str, user_id: str) -> bool:
-    result = await _collection().delete_one({"_id": _object_id(note_id), "user_id": user_id})
-    return result.deleted_count == 1
+    object_id = _object_id(note_id)
+    deleted = await _collection().find_one_and_delete(
+        {"_id": object_id, "user_id": user_id},
+        projection={"actions": 1, "topics": 1, "_id": 0},
+    )
+    if deleted is None:
+        return False
+    await transcript_service.delete(object_id)
+    await knowledge_graph_service.record_change(user_id, deleted, None)
+    search_service.invalidate_user_index(user_id)
+    return True
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, TEXT, IndexModel
+
+from app.config import get_settings
+from app.database.indexes import register_indexes
+from app.database.mongodb import get_database
+from app.models.note_model import NoteSearchHit
+from app.services import embedding_service
+from app.utils import metrics
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_COLLECTION_NAME = "notes"
+_RESULT_PROJECTION = {
+    "transcript": 0,
+    "transcript_excerpt": 0,
+    "transcript_terms": 0,
+    "mindmap": 0,
+    "embedding": 0,
+    "embedding_model": 0,
+}
+_EMBED_SOURCE_PROJECTION = {
+    "summary": 1,
+    "topics": 1,
+    "transcript_excerpt": 1,
+    "transcript": 1,
+    "updated_at": 1,
+}
+
+# A collection has at most one text index; topics and summaries are the strongest signals.
+# Transcripts live in their own store; the note's distinct-word list stands in for the full text.
+# The user_id prefix keeps each search within the caller's notes; queries must match it exactly.
+TEXT_INDEX_NAME = "notes_text"
+register_indexes(
+    _COLLECTION_NAME,
+    lambda: [
+        IndexModel(
+            [
+                ("user_id", ASCENDING),
+                ("transcript_terms", TEXT),
+                ("summary", TEXT),
+                ("topics", TEXT),
+            ],
+            weights={"topics": 10, "summary": 5, "transcript_terms": 1},
+            name=TEXT_INDEX_NAME,
+        )
+    ],
+)
+
+_pending: Set[asyncio.Task] = set()
+_vector_indexes: Optional[LRUCache[str, "_VectorIndex"]] = None
+_vector_indexes_lock = Lock()
+
+metrics.Gauge(
+    "embedding_tasks_pending",
+    "Note embeddings scheduled but not yet stored.",
+    callback=lambda: {(): len(_pending)},
+)
+
+
+def _collection() -> AsyncIOMotorCollection:
+    return get_database()[_COLLECTION_NAME]
+
+
+@dataclass(frozen=True)
+class _VectorIndex:
+    """One user's note embeddings as a dense matrix, searched by brute-force dot product."""
+
+    note_ids: Tuple[ObjectId, ...]
+    matrix: np.ndarray
+
+    def nearest(self, query: np.ndarray, limit: int) -> List[Tuple[ObjectId, float]]:
+        if not self.note_ids:
+            return []
+        scores = self.matrix @ query
+        count = min(limit, len(scores))
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top])]
+        return [(self.note_ids[row], float(scores[row])) for row in top]
+
+
+def _get_vector_indexes() -> LRUCache[str, _VectorIndex]:
+    global _vector_indexes
+    with _vector_indexes_lock:
+        if _vector_indexes is None:
+            _vector_indexes = LRUCache("note_vectors", get_settings().search_index_cache_size)
+        return _vector_indexes
+
+
+def invalidate_user_index(user_id: str) -> None:
+    _get_vector_indexes().pop(user_id)
+
+
+async def _load_vector_index(user_id: str, model_name: str) -> _VectorIndex:
+    indexes = _get_vector_indexes()
+    index = indexes.get(user_id)
+    if index is not None:
+        return index
+
+    documents = await (
+        _collection()
+        .find({"user_id": user_id, "embedding_model": model_name}, {"embedding": 1})
+        .to_list(length=None)
+    )
+    vectors = [embedding_service.decode_vector(document["embedding"]) for document in documents]
+    matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    index = _VectorIndex(tuple(document["_id"] for document in documents), matrix)
+    indexes.set(user_id, index)
+    return index
+
+
+async def _embed_note(note_id: ObjectId, user_id: str) -> None:
+    query = {"_id": note_id, "user_id": user_id}
+    try:
+        document = await _collection().find_one(query, _EMBED_SOURCE_PROJECTION)
+        if document is None:
+            return
+        fields = await asyncio.to_thread(
+            embedding_service.embedding_fields, document, embedding_service.get_embedder()
+        )
+        # Matching on updated_at drops the write if the note changed meanwhile; the embedding
+        # scheduled by that later change will land instead.
+        await _collection().update_one(
+            {**query, "updated_at": document.get("updated_at")}, {"$set": fields}
+        )
+        invalidate_user_index(user_id)
+    except Exception as exc:
+        logger.warning("Failed to embed note %s: %s", note_id, exc)
+
+
+def schedule_embedding(note_id: ObjectId, user_id: str) -> None:
+    """Embed a note in the background so creating or updating it does not wait on the model."""
+    task = asyncio.create_task(_embed_note(note_id, user_id), name=f"embed-{note_id}")
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+async def drain_pending() -> None:
+    """Wait for background embeddings still in flight (used on shutdown and in tests)."""
+    while _pending:
+        await asyncio.gather(*list(_pending), return_exceptions=True)
+
+
+def _to_hit(document: Dict[str, Any], score: float) -> NoteSearchHit:
+    payload = {key: value for key, value in document.items() if key != "score"}
+    payload["id"] = str(payload.pop("_id"))
+    return NoteSearchHit.model_validate({**payload, "score": score})
+
+
+async def text_search(user_id: str, query: str, *, limit: int = 20) -> List[NoteSearchHit]:
+    """Keyword search over transcript words, summaries and topics via the ``notes_text`` index.
+
+    Transcripts are indexed as their distinct words, so a quoted phrase only matches within
+    summaries and topics; the words of the phrase still match anywhere in the transcript.
+    """
+    documents = await (
+        _collection()
+        .find(
+            {"user_id": user_id, "$text": {"$search": query}},
+            {**_RESULT_PROJECTION, "score": {"$meta": "textScore"}},
+        )
+        .sort([("score", {"$meta": "textScore"})])
+        .limit(limit)
+        .to_list(length=limit)
+    )
+    return [_to_hit(document, document.get("score", 0.0)) for document in documents]
+
+
+async def semantic_search(user_id: str, query: str, *, limit: int = 20) -> List[NoteSearchHit]:
+    """Rank a user's notes by cosine similarity between their embeddings and the query's."""
+    embedder = embedding_service.get_embedder()
+    vector = (await asyncio.to_thread(embedder.embed, [query]))[0]
+    index = await _load_vector_index(user_id, embedder.name)
+    nearest = index.nearest(vector, limit)
+    if not nearest:
+        return []
+
+    documents = await (
+        _collection()
+        .find(
+            {"_id": {"$in": [note_id for note_id, _ in nearest]}, "user_id": user_id},
+            _RESULT_PROJECTION,
+        )
+        .to_list(length=len(nearest))
+    )
+    by_id = {document["_id"]: document for document in documents}
+    return [_to_hit(by_id[note_id], score) for note_id, score in nearest if note_id in by_id]
+
+
+async def search_notes(
+    user_id: str, query: str, *, mode: str = "text", limit: int = 20
+) -> List[NoteSearchHit]:
+    query = query.strip()
+    if not query:
+        raise ValueError("Search query must not be empty.")
+    if mode == "semantic":
+        return await semantic_search(user_id, query, limit=limit)
+    return await text_search(user_id, query, limit=limit)
@@ -0,0 +1,90 @@
+"""Transcripts stored apart from their notes, zlib-compressed, one document per note.
+
+Note documents keep only ``transcript_excerpt`` (the opening, used for embeddings),
+``transcript_terms`` (each distinct word once, so keyword search covers the whole transcript)
+and ``transcript_length``, so listing, searching and updating notes never moves the full text.
+Notes written before the split still carry an inline ``transcript`` until
+``python -m app.database.migrate_transcripts`` moves it here.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import zlib
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from bson.binary import Binary
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from app.database.mongodb import get_database
+
+logger = logging.getLogger(__name__)
+
+_COLLECTION_NAME = "note_transcripts"
+_CODEC = "zlib"
+_COMPRESSION_LEVEL = 6
+
+# Long enough for the embedding window, small next to a meeting transcript.
+EXCERPT_CHARS = 4000
+_WORD = re.compile(r"\w+")
+
+
+def _collection() -> AsyncIOMotorCollection:
+    return get_database()[_COLLECTION_NAME]
+
+
+def compress(transcript: str) -> Binary:
+    return Binary(zlib.compress(transcript.encode("utf-8"), _COMPRESSION_LEVEL))
+
+
+def decompress(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def transcript_terms(transcript: str) -> List[str]:
+    """Distinct lower-cased words of a transcript, in order of first use.
+
+    A meeting's vocabulary is a few thousand words however long it runs, so the note can carry
+    it for the text index without carrying the transcript.
+    """
+    return list(dict.fromkeys(word.lower() for word in _WORD.findall(transcript)))
+
+
+def note_fields(transcript: str) -> Dict[str, Any]:
+    """The transcript-derived fields kept on the note document itself."""
+    return {
+        "transcript_excerpt": transcript[:EXCERPT_CHARS],
+        "transcript_terms": transcript_terms(transcript),
+        "transcript_length": len(transcript),
+    }
+
+
+async def save(note_id: ObjectId, user_id: str, transcript: str, *, overwrite: bool = True) -> None:
+    """Store a note's transcript; with ``overwrite=False`` an existing one is kept."""
+    data = await asyncio.to_thread(compress, transcript)
+    document = {"user_id": user_id, "codec": _CODEC, "data": data, "length": len(transcript)}
+    update = {"$set": document} if overwrite else {"$setOnInsert": document}
+    await _collection().update_one({"_id": note_id}, update, upsert=True)
+
+
+async def load(note_id: ObjectId, user_id: Optional[str] = None) -> Optional[str]:
+    query: Dict[str, Any] = {"_id": note_id}
+    if user_id:
+        query["user_id"] = user_id
+
+    document = await _collection().find_one(query, {"codec": 1, "data": 1})
+    if document is None:
+        return None
+    if document.get("codec") != _CODEC:
+        raise RuntimeError(f"Unsupported transcript codec {document.get('codec')!r}.")
+    return await asyncio.to_thread(decompress, document["data"])
+
+
+async def delete(note_id: ObjectId) -> None:
+    try:
+        await _collection().delete_one({"_id": note_id})
+    except Exception as exc:  # pragma: no cover - depends on database availability
+        logger.warning("Failed to delete transcript of note %s: %s", note_id, exc)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import hashlib
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from app.config import get_settings
+from app.database.cache_store import TieredCache
+from app.database.indexes import register_indexes
+
+_COLLECTION_NAME = "transcription_cache"
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+_cache: Optional[TieredCache] = None
+_cache_lock = Lock()
+
+
+def _tiered_cache() -> TieredCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = get_settings()
+            _cache = TieredCache(
+                "transcriptions",
+                _COLLECTION_NAME,
+                maxsize=settings.transcription_cache_size,
+                ttl_seconds=settings.transcription_cache_ttl_seconds,
+            )
+        return _cache
+
+
+register_indexes(_COLLECTION_NAME, lambda: _tiered_cache().index_models())
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(audio_sha256: str, model_name: str, language: Optional[str]) -> str:
+    return f"{audio_sha256}:{model_name}:{language or 'auto'}"
+
+
+async def get(key: str) -> Optional[Dict[str, Any]]:
+    """Return a cached ``{"text", "language", "raw"}`` payload from memory, then MongoDB."""
+    return await _tiered_cache().get(key)
+
+
+async def put(key: str, payload: Dict[str, Any]) -> None:
+    await _tiered_cache().put(key, payload)
+
+
+def clear_memory() -> None:
+    _tiered_cache().clear_memory()
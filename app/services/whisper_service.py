@@ -1,15 +1,63 @@
 ﻿from __future__ import annotations
 
 import asyncio
+import logging
+import multiprocessing
 import os
-import tempfile
-from dataclasses import dataclass
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from functools import partial
 from threading import Lock
-from typing import Any, Dict, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
+import numpy as np
+import torch
 import whisper
 
-from app.config import get_settings
+from app.config import Settings, get_settings
+from app.services import transcription_cache
+from app.utils import metrics
+from app.utils.audio import (
+    SAMPLE_RATE,
+    AudioWindow,
+    DecodedAudio,
+    decode_audio,
+    plan_windows,
+    probe_duration,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# What a transcription worker receives: samples in memory, or a memory-mapped decode by path.
+AudioInput = Union[np.ndarray, DecodedAudio]
+
+
+@dataclass(frozen=True)
+class WindowTiming:
+    """Span of one independently transcribed window (seconds) and its decode time."""
+
+    start: float
+    end: float
+    seconds: float
 
 
 @dataclass(frozen=True)
@@ -19,58 +67,711 @@ class TranscriptionResult:
     text: str
     language: Optional[str]
     raw: Dict[str, Any]
+    windows: Tuple[WindowTiming, ...] = ()
+    model: Optional[str] = None
+
+
+class ModelSwitchInProgressError(Exception):
+    """Raised when a model switch is requested while another one is still loading."""
+
+
+QualityTier = Literal["fast", "balanced", "accurate", "auto"]
+QUALITY_TIERS: Tuple[str, ...] = ("fast", "balanced", "accurate", "auto")
 
+_MB = 1024 * 1024
+# Approximate size of each checkpoint's fp32 weights, used to budget a model before it loads;
+# the measured size replaces the estimate once it is resident.
+_MODEL_MEMORY_MB = {
+    "tiny": 150,
+    "base": 290,
+    "small": 970,
+    "medium": 3000,
+    "turbo": 3100,
+    "large": 6000,
+}
 
-_model_cache: Dict[str, Any] = {}
+# ``_model_lock`` guards the dictionaries below and is never held while a checkpoint loads, so
+# loading one model does not block transcriptions on another. ``_model_cache`` is kept in
+# least-recently-used order for eviction under ``WHISPER_MODEL_MEMORY_MB``.
+_model_cache: "OrderedDict[str, Any]" = OrderedDict()
+_model_bytes: Dict[str, int] = {}
 _model_lock = Lock()
+_loading_locks: Dict[str, Lock] = {}
+_inference_locks: Dict[str, Lock] = {}
+_warm_models: Set[str] = set()
+# Transcriptions in flight per model, so a model switched away from is unloaded only when idle.
+_model_users: Counter[str] = Counter()
+
+# Model for new transcriptions once switched at runtime; ``None`` means the configured size.
+_active_model: Optional[str] = None
+_ready_model: Optional[str] = None
+_loading_model: Optional[str] = None
+_load_error: Optional[str] = None
+_background_task: Optional[asyncio.Task] = None
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = Lock()
+# Uploads decoded at once; each runs ffmpeg across every core and holds its samples in memory.
+_decode_executor: Optional[ThreadPoolExecutor] = None
+_decode_executor_lock = Lock()
+# Pools swapped out by a model switch, finishing their in-flight transcriptions.
+_draining_pools: Set[asyncio.Task] = set()
+
+# Decodes waiting for a model's inference lock: the in-process transcription queue. With the
+# process backend, load and decode metrics are recorded inside the workers and not exported.
+INFERENCE_WAITING = metrics.Gauge(
+    "whisper_inference_waiting", "Transcriptions waiting for a Whisper model.", ("model",)
+)
+MODEL_EVICTIONS = metrics.Counter(
+    "whisper_model_evictions_total",
+    "Whisper models unloaded to stay within the memory budget.",
+    ("model",),
+)
+
+
+def _resident_bytes() -> Dict[Tuple[str, ...], float]:
+    with _model_lock:
+        return {(name,): size for name, size in _model_bytes.items()}
+
+
+metrics.Gauge(
+    "whisper_model_resident_bytes",
+    "Memory held by each loaded Whisper model.",
+    ("model",),
+    callback=_resident_bytes,
+)
+
+
+def _estimated_bytes(model_name: str) -> int:
+    base = model_name.split(".")[0]
+    if "turbo" in base:
+        base = "turbo"
+    elif base.startswith("large"):
+        base = "large"
+    return _MODEL_MEMORY_MB.get(base, _MODEL_MEMORY_MB["large"]) * _MB
+
+
+def _measured_bytes(model_name: str, model: Any) -> int:
+    if not isinstance(model, torch.nn.Module):
+        return _estimated_bytes(model_name)
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+def _make_room(model_name: str) -> None:
+    """Unload idle models, least recently used first, until ``model_name`` fits the budget.
+
+    The active model and models with transcriptions in flight are never evicted; when they
+    alone exceed the budget the new model is loaded anyway and a warning is logged.
+    """
+
+    budget = get_settings().whisper_model_memory_mb * _MB
+    needed = _estimated_bytes(model_name)
+    keep = active_model_name()
+    victims: List[str] = []
+    with _model_lock:
+        resident = sum(_model_bytes.values())
+        for name in _model_cache:
+            if resident + needed <= budget:
+                break
+            if name == keep or _model_users[name] > 0:
+                continue
+            victims.append(name)
+            resident -= _model_bytes.get(name, 0)
+        kept = [name for name in _model_cache if name not in victims]
+
+    for name in victims:
+        if _unload_model(name):
+            MODEL_EVICTIONS.inc(model=name)
+    if resident + needed > budget:
+        logger.warning(
+            "Loading Whisper model %s exceeds the %d MB budget; resident models in use: %s",
+            model_name,
+            budget // _MB,
+            ", ".join(kept) or "none",
+        )
 
 
 def _get_or_load_model(model_name: str):
     with _model_lock:
-        if model_name not in _model_cache:
-            _model_cache[model_name] = whisper.load_model(model_name)
-    return _model_cache[model_name]
+        model = _model_cache.get(model_name)
+        if model is not None:
+            _model_cache.move_to_end(model_name)
+            return model
+        loading = _loading_locks.setdefault(model_name, Lock())
 
+    with loading:
+        model = _model_cache.get(model_name)
+        if model is None:
+            _make_room(model_name)
+            with metrics.track("whisper.load_model", model_name):
+                model = whisper.load_model(model_name)
+            with _model_lock:
+                _inference_locks.setdefault(model_name, Lock())
+                _model_cache[model_name] = model
+                _model_bytes[model_name] = _measured_bytes(model_name, model)
+    return model
 
-def _transcribe_sync(
-    file_bytes: bytes, language: Optional[str], model_name: str
-) -> TranscriptionResult:
-    model = _get_or_load_model(model_name)
-    tmp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+
+def _load_and_warm(model_name: str) -> None:
+    """Load a model and run one short decode so the first real request finds it ready."""
+    # Counted as in use so that a concurrent load cannot evict it before it is warm.
+    _acquire_model(model_name)
     try:
-        tmp_file.write(file_bytes)
-        tmp_file.flush()
-        tmp_path = tmp_file.name
+        model = _get_or_load_model(model_name)
+        if model_name in _warm_models:
+            return
+        with _inference_slot(model_name):
+            model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), language="en")
+        _warm_models.add(model_name)
+        logger.info("Whisper model %s loaded and warmed up", model_name)
     finally:
-        tmp_file.close()
+        with _model_lock:
+            _model_users[model_name] -= 1
+
+
+def active_model_name() -> str:
+    return _active_model or get_settings().whisper_model_size
+
+
+def tier_models(settings: Settings) -> Dict[str, str]:
+    """Checkpoint behind each fixed quality tier; ``balanced`` follows the active model."""
+    return {
+        "fast": settings.whisper_fast_model,
+        "balanced": active_model_name(),
+        "accurate": settings.whisper_accurate_model,
+    }
+
+
+def model_for_tier(tier: str, duration: Optional[float], settings: Settings) -> str:
+    """Pick the checkpoint for ``tier``; ``auto`` decides by the recording's duration.
+
+    Short clips go to the fast model and long meetings to the accurate one. Recordings in
+    between, or whose duration is unknown, use the balanced model.
+    """
+
+    if tier not in QUALITY_TIERS:
+        raise ValueError(f"Unknown quality tier {tier!r}.")
+    models = tier_models(settings)
+    if tier != "auto":
+        return models[tier]
+    if duration is None:
+        return models["balanced"]
+    if duration <= settings.whisper_auto_fast_max_seconds:
+        return models["fast"]
+    if duration >= settings.whisper_auto_accurate_min_seconds:
+        return models["accurate"]
+    return models["balanced"]
 
+
+def _acquire_model(model_name: str) -> None:
+    with _model_lock:
+        _model_users[model_name] += 1
+
+
+def _release_model(model_name: str) -> None:
+    with _model_lock:
+        _model_users[model_name] -= 1
+        idle = _model_users[model_name] <= 0
+    if idle:
+        _unload_if_unused(model_name)
+
+
+def _unload_if_unused(model_name: str) -> None:
+    # Models behind a tier stay resident (subject to the budget); others, such as a model
+    # switched away from, are unloaded as soon as they are idle.
+    if model_name not in tier_models(get_settings()).values():
+        _unload_model(model_name)
+
+
+def _unload_model(model_name: str) -> bool:
+    with _model_lock:
+        if _model_users[model_name] > 0:
+            return False
+        _model_users.pop(model_name, None)
+        _model_bytes.pop(model_name, None)
+        _warm_models.discard(model_name)
+        if _model_cache.pop(model_name, None) is None:
+            return False
+    logger.info("Unloaded Whisper model %s", model_name)
+    return True
+
+
+@contextmanager
+def _inference_slot(model_name: str) -> Iterator[None]:
+    # Whisper installs kv-cache hooks on the model while decoding, so concurrent decodes on one
+    # instance corrupt each other; parallelism comes from the process backend instead.
+    INFERENCE_WAITING.inc(model=model_name)
     try:
-        result = model.transcribe(tmp_path, language=language)
+        _inference_locks[model_name].acquire()
     finally:
-        try:
-            os.remove(tmp_path)
-        except OSError:
-            pass
+        INFERENCE_WAITING.dec(model=model_name)
+    try:
+        with metrics.track("whisper.decode", model_name):
+            yield
+    finally:
+        _inference_locks[model_name].release()
+
+
+def _samples(audio: AudioInput) -> np.ndarray:
+    return audio.samples() if isinstance(audio, DecodedAudio) else audio
+
+
+def _transcribe_sync(
+    audio: AudioInput, language: Optional[str], model_name: str
+) -> TranscriptionResult:
+    model = _get_or_load_model(model_name)
+    samples = _samples(audio)
+    with _inference_slot(model_name):
+        result = model.transcribe(samples, language=language)
 
     text = result.get("text", "").strip()
     language_detected = result.get("language") or language
     return TranscriptionResult(text=text, language=language_detected, raw=result)
 
 
+def _transcribe_window_sync(
+    audio: AudioInput, language: Optional[str], model_name: str
+) -> Tuple[Dict[str, Any], float]:
+    model = _get_or_load_model(model_name)
+    samples = _samples(audio)
+    with _inference_slot(model_name):
+        started = time.perf_counter()
+        result = model.transcribe(samples, language=language)
+        return result, time.perf_counter() - started
+
+
+def _normalise_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _stitch_windows(
+    windows: Sequence[AudioWindow], results: Sequence[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Merge per-window Whisper output into one result on the recording's timeline.
+
+    Segments starting past a window's cut belong to the next window. Where a segment straddles
+    the cut, the next window usually repeats it at its start; such repeats are dropped.
+    """
+
+    segments: List[Dict[str, Any]] = []
+    languages: Counter[str] = Counter()
+    for window, result in zip(windows, results, strict=True):
+        if result.get("language"):
+            languages[result["language"]] += 1
+
+        offset = window.start / SAMPLE_RATE
+        cut = window.cut / SAMPLE_RATE
+        for segment in result.get("segments", []):
+            start = segment["start"] + offset
+            end = segment["end"] + offset
+            if start >= cut:
+                continue
+
+            if segments and start < segments[-1]["end"]:
+                previous = segments[-1]
+                text = _normalise_text(segment["text"])
+                if end <= previous["end"] or text in _normalise_text(previous["text"]):
+                    continue
+
+            segments.append({**segment, "id": len(segments), "start": start, "end": end})
+
+    language = languages.most_common(1)[0][0] if languages else None
+    text = "".join(segment["text"] for segment in segments).strip()
+    return {"text": text, "segments": segments, "language": language}
+
+
+def _init_process_worker(model_name: str, torch_threads: Optional[int]) -> None:
+    """Process pool initializer: pin torch threads, then load and warm the model per worker."""
+    global _active_model
+    # Workers of a pool started by a model switch must not treat the configured size as active.
+    _active_model = model_name
+    if torch_threads:
+        torch.set_num_threads(torch_threads)
+    _load_and_warm(model_name)
+
+
+def _worker_pid() -> int:
+    return os.getpid()
+
+
+def _new_process_pool(settings: Settings, model_name: str) -> ProcessPoolExecutor:
+    # Spawn rather than fork: forking a process that has touched torch is unsafe.
+    return ProcessPoolExecutor(
+        max_workers=settings.whisper_process_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_process_worker,
+        initargs=(model_name, settings.whisper_torch_threads),
+    )
+
+
+def _get_process_pool(settings: Settings) -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = _new_process_pool(settings, active_model_name())
+        return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _spawn_workers(pool: ProcessPoolExecutor, settings: Settings, model_name: str) -> None:
+    loop = asyncio.get_running_loop()
+    # Submitting one task per worker while none is idle makes the executor spawn all of them.
+    pids: List[int] = await asyncio.gather(
+        *(loop.run_in_executor(pool, _worker_pid) for _ in range(settings.whisper_process_workers))
+    )
+    logger.info(
+        "Whisper process backend ready: %d workers for model %s", len(set(pids)), model_name
+    )
+
+
+async def start_process_pool() -> None:
+    """Spawn every worker of the process backend so models load at startup, not on first use."""
+    settings = get_settings()
+    await _spawn_workers(_get_process_pool(settings), settings, active_model_name())
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _get_decode_executor(settings: Settings) -> ThreadPoolExecutor:
+    global _decode_executor
+    with _decode_executor_lock:
+        if _decode_executor is None:
+            _decode_executor = ThreadPoolExecutor(
+                max_workers=settings.audio_decode_workers, thread_name_prefix="audio-decode"
+            )
+        return _decode_executor
+
+
+def shutdown_decode_executor() -> None:
+    global _decode_executor
+    with _decode_executor_lock:
+        executor, _decode_executor = _decode_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _prepare_model(settings: Settings, model_name: str) -> None:
+    """Load and warm ``model_name`` where transcriptions will run, then make it the active one.
+
+    The model is reported ready as soon as it is swapped in. With the process backend a fresh
+    pool is started for the model and swapped in; the old pool finishes the transcriptions
+    already submitted to it in the background before its workers exit.
+    """
+
+    global _active_model, _ready_model, _process_pool
+    if settings.whisper_backend == "process":
+        with _process_pool_lock:
+            current = _process_pool
+        if current is not None and model_name == active_model_name():
+            await _spawn_workers(current, settings, model_name)
+            _ready_model = model_name
+            return
+
+        pool = _new_process_pool(settings, model_name)
+        try:
+            await _spawn_workers(pool, settings, model_name)
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        with _process_pool_lock:
+            previous, _process_pool = _process_pool, pool
+            _active_model = _ready_model = model_name
+        if previous is not None:
+            _drain_in_background(previous)
+        return
+
+    await asyncio.to_thread(_load_and_warm, model_name)
+    previous = active_model_name()
+    _active_model = _ready_model = model_name
+    if previous != model_name:
+        _unload_if_unused(previous)
+
+
+def _drain_in_background(pool: ProcessPoolExecutor) -> None:
+    task = asyncio.create_task(
+        asyncio.to_thread(pool.shutdown, wait=True), name="whisper-pool-drain"
+    )
+    _draining_pools.add(task)
+    task.add_done_callback(_draining_pools.discard)
+
+
+async def _load_in_background(model_name: str) -> None:
+    global _loading_model, _load_error
+    try:
+        await _prepare_model(get_settings(), model_name)
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        logger.exception("Failed to load Whisper model %s", model_name)
+        _load_error = f"{model_name}: {exc}"
+    finally:
+        _loading_model = None
+
+
+def _start_background_load(model_name: str) -> asyncio.Task:
+    global _background_task, _loading_model, _load_error
+    if _background_task is not None and not _background_task.done():
+        raise ModelSwitchInProgressError(f"Whisper model {_loading_model} is still loading.")
+    _loading_model, _load_error = model_name, None
+    _background_task = asyncio.create_task(
+        _load_in_background(model_name), name=f"whisper-load-{model_name}"
+    )
+    return _background_task
+
+
+def start_preload() -> asyncio.Task:
+    """Load and warm the configured model in the background; readiness turns true when done."""
+    return _start_background_load(active_model_name())
+
+
+def switch_model(model_name: str) -> asyncio.Task:
+    """Load ``model_name`` in the background and swap it in once it is warm.
+
+    Transcriptions already running keep the model they started with; new ones use the new
+    model as soon as it is ready. The previous model is unloaded once it is idle.
+    """
+
+    if model_name not in whisper.available_models():
+        raise ValueError(f"Unknown Whisper model {model_name!r}.")
+    return _start_background_load(model_name)
+
+
+async def stop_background_load() -> None:
+    task = _background_task
+    if task is not None and not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    # Pools swapped out by a switch still finish what was submitted to them.
+    await asyncio.gather(*_draining_pools, return_exceptions=True)
+
+
+def is_ready() -> bool:
+    """Whether the active model has been loaded and warmed (always true without preloading)."""
+    return not get_settings().whisper_preload or _ready_model == active_model_name()
+
+
+def model_status() -> Dict[str, Any]:
+    settings = get_settings()
+    with _model_lock:
+        loaded = list(_model_cache)
+        resident = sum(_model_bytes.values())
+        in_flight = {name: count for name, count in _model_users.items() if count}
+    return {
+        "backend": settings.whisper_backend,
+        "active_model": active_model_name(),
+        "ready": is_ready(),
+        "loading": _loading_model,
+        "error": _load_error,
+        "tiers": tier_models(settings),
+        "loaded_models": loaded,
+        "resident_mb": round(resident / _MB, 1),
+        "memory_budget_mb": settings.whisper_model_memory_mb,
+        "in_flight": in_flight,
+    }
+
+
+async def _run_in_backend(settings: Settings, func: Callable[..., T], *args: Any) -> T:
+    if settings.whisper_backend != "process":
+        return await asyncio.to_thread(func, *args)
+
+    pool = _get_process_pool(settings)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. a native crash in torch); replace the pool for later requests.
+        logger.error("Whisper worker process died; restarting the process pool")
+        _discard_process_pool(pool)
+        raise
+
+
+def _for_backend(audio: DecodedAudio, start: int = 0, end: Optional[int] = None) -> AudioInput:
+    # Memory-mapped audio travels to process workers as a path; in-memory audio as the slice.
+    part = audio.window(start, audio.end - audio.start if end is None else end)
+    return part if part.path is not None else part.samples()
+
+
+def _on_upload_timeline(result: TranscriptionResult, offset: float) -> TranscriptionResult:
+    """Shift timestamps by the leading silence trimmed off before decoding."""
+    if not offset:
+        return result
+    segments = [
+        {**segment, "start": segment["start"] + offset, "end": segment["end"] + offset}
+        for segment in result.raw.get("segments", [])
+    ]
+    windows = tuple(
+        replace(timing, start=timing.start + offset, end=timing.end + offset)
+        for timing in result.windows
+    )
+    return replace(result, raw={**result.raw, "segments": segments}, windows=windows)
+
+
+async def _transcribe_segmented(
+    audio: DecodedAudio, language: Optional[str], model_name: str, settings: Settings
+) -> TranscriptionResult:
+    windows = await asyncio.to_thread(
+        plan_windows,
+        audio.samples(),
+        max_seconds=settings.whisper_segment_max_seconds,
+        overlap_seconds=settings.whisper_segment_overlap_seconds,
+    )
+    # Only as many windows in flight as the backend decodes at once: on the thread backend the
+    # rest would each hold a default-executor thread while waiting for the inference lock.
+    slots = asyncio.Semaphore(
+        settings.whisper_process_workers if settings.whisper_backend == "process" else 1
+    )
+
+    async def transcribe_window(window: AudioWindow) -> Tuple[Dict[str, Any], float]:
+        async with slots:
+            return await _run_in_backend(
+                settings,
+                _transcribe_window_sync,
+                _for_backend(audio, window.start, window.end),
+                language,
+                model_name,
+            )
+
+    outcomes = await asyncio.gather(*(transcribe_window(window) for window in windows))
+
+    raw = _stitch_windows(windows, [result for result, _ in outcomes])
+    timings = tuple(
+        WindowTiming(
+            start=window.start / SAMPLE_RATE, end=window.end / SAMPLE_RATE, seconds=elapsed
+        )
+        for window, (_, elapsed) in zip(windows, outcomes, strict=True)
+    )
+    return TranscriptionResult(
+        text=raw["text"], language=raw["language"] or language, raw=raw, windows=timings
+    )
+
+
+async def _preprocess(audio_path: str, settings: Settings) -> DecodedAudio:
+    """Decode the upload to 16 kHz mono float32 and trim its silent edges.
+
+    This runs before a transcription worker is involved, so an upload ffmpeg cannot decode is
+    rejected with ``UnsupportedAudioError`` (a ``ValueError``) without waiting for a model. At
+    most ``audio_decode_workers`` uploads are decoded at once; the rest wait their turn.
+    """
+
+    decode = partial(
+        decode_audio,
+        audio_path,
+        memmap_min_seconds=settings.audio_memmap_min_seconds,
+        directory=settings.upload_spool_dir,
+        trim_silence=settings.audio_trim_silence,
+        silence_threshold_db=settings.audio_silence_threshold_db,
+        silence_padding_seconds=settings.audio_silence_padding_seconds,
+    )
+    loop = asyncio.get_running_loop()
+    with metrics.track("whisper.preprocess"):
+        return await loop.run_in_executor(_get_decode_executor(settings), decode)
+
+
+async def _transcribe_uncached(
+    audio: DecodedAudio, language: Optional[str], model_name: str, settings: Settings
+) -> TranscriptionResult:
+    if audio.duration == 0:
+        if not audio.total:
+            return TranscriptionResult(
+                text="", language=language, raw={"text": "", "segments": [], "language": language}
+            )
+        # Nothing rose above the silence threshold, yet a quiet far-field recording can still
+        # hold speech; let the model hear all of it rather than store an empty transcript.
+        audio = replace(audio, start=0, end=audio.total)
+    if settings.whisper_segmenting:
+        result = await _transcribe_segmented(audio, language, model_name, settings)
+    else:
+        result = await _run_in_backend(
+            settings, _transcribe_sync, _for_backend(audio), language, model_name
+        )
+    return _on_upload_timeline(result, audio.offset)
+
+
+async def _transcribe_file(
+    audio_path: str,
+    language: Optional[str],
+    audio_sha256: Optional[str],
+    model_name: str,
+    settings: Settings,
+) -> TranscriptionResult:
+    key: Optional[str] = None
+    if settings.transcription_cache_enabled:
+        digest = audio_sha256 or await asyncio.to_thread(
+            transcription_cache.file_sha256, audio_path
+        )
+        key = transcription_cache.cache_key(digest, model_name, language)
+        cached = await transcription_cache.get(key)
+        if cached is not None:
+            return TranscriptionResult(
+                text=cached["text"],
+                language=cached["language"],
+                raw=cached["raw"],
+                model=model_name,
+            )
+
+    audio = await _preprocess(audio_path, settings)
+    try:
+        result = await _transcribe_uncached(audio, language, model_name, settings)
+    except Exception as exc:  # pragma: no cover
+        raise RuntimeError("Failed to transcribe audio.") from exc
+    finally:
+        audio.remove()
+
+    if key is not None:
+        await transcription_cache.put(
+            key, {"text": result.text, "language": result.language, "raw": result.raw}
+        )
+    return replace(result, model=model_name)
+
+
+async def _select_model(audio_path: str, tier: Optional[str], settings: Settings) -> str:
+    tier = tier or settings.whisper_default_tier
+    duration = None
+    if tier == "auto":
+        duration = await asyncio.to_thread(probe_duration, audio_path)
+    return model_for_tier(tier, duration, settings)
+
+
 async def transcribe_audio(
-    file_bytes: bytes,
+    audio_path: str,
     *,
     language: Optional[str] = None,
+    audio_sha256: Optional[str] = None,
+    tier: Optional[str] = None,
 ) -> TranscriptionResult:
-    """Run Whisper transcription asynchronously using the configured model size."""
+    """Run Whisper transcription asynchronously on an audio file already on disk.
+
+    ``tier`` picks the model (see ``model_for_tier``) and defaults to
+    ``WHISPER_DEFAULT_TIER``. Results are cached by audio content, model size and language;
+    pass ``audio_sha256`` when the digest is already known to avoid re-reading the file.
+    """
 
-    if not file_bytes:
+    try:
+        size = os.path.getsize(audio_path)
+    except OSError as exc:
+        raise ValueError("Uploaded audio file is missing.") from exc
+    if size == 0:
         raise ValueError("Uploaded audio file is empty.")
 
     settings = get_settings()
-    model_name = settings.whisper_model_size
-
+    model_name = await _select_model(audio_path, tier, settings)
+    _acquire_model(model_name)
     try:
-        return await asyncio.to_thread(_transcribe_sync, file_bytes, language, model_name)
-    except Exception as exc:  # pragma: no cover
-        raise RuntimeError("Failed to transcribe audio.") from exc
+        with metrics.track("whisper.transcribe", model_name):
+            return await _transcribe_file(audio_path, language, audio_sha256, model_name, settings)
+    finally:
+        _release_model(model_name)
@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+import logging
+import os
+import subprocess
+import tempfile
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Energy is measured over 30 ms frames, the usual VAD granularity.
+_FRAME_SECONDS = 0.03
+# Silence trimming scans this many frames (30 s) at a time from each end of the recording.
+_SCAN_FRAMES = 1000
+_DECODE_CHUNK_BYTES = 1024 * 1024
+_FLOAT32_BYTES = 4
+
+# Leading bytes of the containers ffmpeg is expected to see; anything else is rejected before
+# a decoder is started. RIFF/WAVE, AIFF and MP4 are matched on fields past offset 0 below.
+_SIGNATURES: Tuple[Tuple[bytes, str], ...] = (
+    (b"ID3", "mp3"),
+    (b"fLaC", "flac"),
+    (b"OggS", "ogg"),
+    (b"\x1aE\xdf\xa3", "webm"),
+    (b"#!AMR", "amr"),
+    (b"caff", "caf"),
+    (b"0&\xb2u\x8ef\xcf\x11", "asf"),
+)
+
+
+class UnsupportedAudioError(ValueError):
+    """Raised when an upload is not a recording ffmpeg can decode."""
+
+
+@dataclass(frozen=True)
+class AudioWindow:
+    """A slice of a recording, in samples.
+
+    ``cut`` is where the next window takes over; samples between ``cut`` and ``end`` are overlap
+    kept only for decoding context.
+    """
+
+    start: int
+    cut: int
+    end: int
+
+
+def frame_energy(samples: np.ndarray, frame_length: int) -> np.ndarray:
+    """Return the RMS energy of consecutive ``frame_length`` frames (the tail is dropped)."""
+    frame_count = len(samples) // frame_length
+    energy = np.zeros(frame_count, dtype=np.float32)
+    # _SCAN_FRAMES at a time, so a memory-mapped recording is never squared in one full copy.
+    for first in range(0, frame_count, _SCAN_FRAMES):
+        last = min(first + _SCAN_FRAMES, frame_count)
+        block = samples[first * frame_length : last * frame_length]
+        frames = block.reshape(last - first, frame_length)
+        energy[first:last] = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return energy
+
+
+def plan_windows(
+    samples: np.ndarray,
+    *,
+    max_seconds: float,
+    overlap_seconds: float = 0.0,
+    sample_rate: int = SAMPLE_RATE,
+) -> List[AudioWindow]:
+    """Split a recording into windows of at most ``max_seconds``, cutting in the quietest spot.
+
+    Each cut is placed at the lowest-energy frame in the second half of the window, so words are
+    rarely split; each window then extends ``overlap_seconds`` past its cut.
+    """
+
+    if max_seconds <= 0:
+        raise ValueError("max_seconds must be greater than zero")
+
+    total = len(samples)
+    max_length = int(max_seconds * sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+    frame_length = max(1, int(_FRAME_SECONDS * sample_rate))
+    energy = frame_energy(samples, frame_length)
+
+    windows: List[AudioWindow] = []
+    start = 0
+    while total - start > max_length:
+        first_frame = (start + max_length // 2) // frame_length
+        last_frame = (start + max_length) // frame_length
+        candidates = energy[first_frame:last_frame]
+        if len(candidates):
+            cut = (first_frame + int(np.argmin(candidates))) * frame_length
+        else:
+            cut = start + max_length
+        cut = min(max(cut, start + frame_length), start + max_length)
+        windows.append(AudioWindow(start=start, cut=cut, end=min(total, cut + overlap)))
+        start = cut
+
+    windows.append(AudioWindow(start=start, cut=total, end=total))
+    return windows
+
+
+def probe_duration(path: str, *, timeout: float = 10.0) -> Optional[float]:
+    """Return a recording's duration in seconds from its container header, or ``None``.
+
+    ``ffprobe`` reads only the header, so this is cheap even for long recordings. ``None`` is
+    returned when ``ffprobe`` is missing or cannot tell.
+    """
+
+    command = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        path,
+    ]
+    try:
+        completed = subprocess.run(
+            command, capture_output=True, text=True, timeout=timeout, check=True
+        )
+        return float(completed.stdout.strip())
+    except (OSError, subprocess.SubprocessError, ValueError) as exc:
+        logger.debug("Could not probe the duration of %s: %s", path, exc)
+        return None
+
+
+def sniff_format(header: bytes) -> Optional[str]:
+    """Name the container of a file from its first bytes, or ``None`` if it is not audio."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"FORM" and header[8:12] in (b"AIFF", b"AIFC"):
+        return "aiff"
+    if header[4:8] == b"ftyp":
+        return "mp4"
+    for signature, name in _SIGNATURES:
+        if header.startswith(signature):
+            return name
+    # Headerless MPEG streams start with a frame sync: 12 set bits for ADTS AAC, 11 for MP3.
+    if len(header) >= 2 and header[0] == 0xFF:
+        if header[1] & 0xF6 == 0xF0:
+            return "aac"
+        if header[1] & 0xE0 == 0xE0:
+            return "mp3"
+    return None
+
+
+def sniff_file(path: str) -> str:
+    with open(path, "rb") as handle:
+        name = sniff_format(handle.read(16))
+    if name is None:
+        raise UnsupportedAudioError("Unrecognised audio format.")
+    return name
+
+
+def speech_bounds(
+    samples: np.ndarray,
+    *,
+    threshold_db: float,
+    padding_seconds: float,
+    sample_rate: int = SAMPLE_RATE,
+) -> Tuple[int, int]:
+    """Return the ``[start, end)`` range from the first to the last frame above ``threshold_db``.
+
+    The range is widened by ``padding_seconds`` on each side; ``(0, 0)`` means the recording
+    never rises above the threshold. Only the silent edges are scanned, so a long memory-mapped
+    recording is not read in full.
+    """
+
+    frame_length = max(1, int(_FRAME_SECONDS * sample_rate))
+    block = frame_length * _SCAN_FRAMES
+    threshold = 10 ** (threshold_db / 20)
+    total = len(samples)
+
+    first: Optional[int] = None
+    for offset in range(0, total, block):
+        loud = np.flatnonzero(
+            frame_energy(samples[offset : offset + block], frame_length) > threshold
+        )
+        if len(loud):
+            first = offset + int(loud[0]) * frame_length
+            break
+    if first is None:
+        return 0, 0
+
+    last = first + frame_length
+    for stop in range(total, first, -block):
+        begin = max(first, stop - block)
+        loud = np.flatnonzero(frame_energy(samples[begin:stop], frame_length) > threshold)
+        if len(loud):
+            last = begin + (int(loud[-1]) + 1) * frame_length
+            break
+
+    padding = int(padding_seconds * sample_rate)
+    return max(0, first - padding), min(total, last + padding)
+
+
+def _remove(path: Optional[str]) -> None:
+    if path is not None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+@dataclass(frozen=True)
+class DecodedAudio:
+    """A recording decoded to 16 kHz mono float32, held in memory or in a raw file on disk.
+
+    ``start`` and ``end`` bound the samples kept after silence trimming. A file-backed recording
+    pickles as its path, so process-pool workers map the file rather than receive a copy.
+    """
+
+    format: str
+    total: int
+    start: int
+    end: int
+    buffer: Optional[np.ndarray] = None
+    path: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start) / SAMPLE_RATE
+
+    @property
+    def offset(self) -> float:
+        """Seconds trimmed from the start; add to timestamps to place them in the upload."""
+        return self.start / SAMPLE_RATE
+
+    def samples(self) -> np.ndarray:
+        if self.buffer is not None:
+            return self.buffer[self.start : self.end]
+        # Copy-on-write so that consumers (torch.from_numpy) get a writable array.
+        mapped = np.memmap(self.path, dtype=np.float32, mode="c", shape=(self.total,))
+        return mapped[self.start : self.end]
+
+    def window(self, start: int, end: int) -> "DecodedAudio":
+        """The samples ``[start, end)`` of the trimmed recording, sharing the same storage."""
+        return replace(self, start=self.start + start, end=self.start + min(end, self.end))
+
+    def remove(self) -> None:
+        _remove(self.path)
+
+
+def decode_audio(
+    path: str,
+    *,
+    memmap_min_seconds: float,
+    directory: Optional[str] = None,
+    trim_silence: bool = True,
+    silence_threshold_db: float = -45.0,
+    silence_padding_seconds: float = 0.3,
+) -> DecodedAudio:
+    """Decode, downmix and resample a recording to 16 kHz mono float32 with one ffmpeg pass.
+
+    The container is sniffed first so that non-audio uploads are rejected without starting
+    ffmpeg. Decoded samples are streamed from ffmpeg's stdout into memory; once they pass
+    ``memmap_min_seconds`` the rest goes to a raw file in ``directory`` that is memory-mapped.
+    The caller owns that file and must ``remove()`` the result when done. Raises
+    ``UnsupportedAudioError`` for uploads ffmpeg cannot decode and ``RuntimeError`` when ffmpeg
+    is not installed.
+    """
+
+    container = sniff_file(path)
+    command = [
+        "ffmpeg",
+        "-nostdin",
+        "-v",
+        "error",
+        "-threads",
+        "0",
+        "-i",
+        path,
+        "-vn",
+        "-f",
+        "f32le",
+        "-ac",
+        "1",
+        "-ar",
+        str(SAMPLE_RATE),
+        "-",
+    ]
+    spill_bytes = int(memmap_min_seconds * SAMPLE_RATE) * _FLOAT32_BYTES
+    buffer = bytearray()
+    spill_path: Optional[str] = None
+    decoded = 0
+
+    with tempfile.TemporaryFile() as errors:
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors)
+        except OSError as exc:
+            raise RuntimeError("ffmpeg is required to decode audio.") from exc
+
+        spill = None
+        try:
+            while chunk := process.stdout.read(_DECODE_CHUNK_BYTES):
+                if spill is None and len(buffer) + len(chunk) > spill_bytes:
+                    spill = tempfile.NamedTemporaryFile(suffix=".f32", dir=directory, delete=False)
+                    spill_path = spill.name
+                    spill.write(buffer)
+                    buffer = bytearray()
+                if spill is None:
+                    buffer.extend(chunk)
+                else:
+                    spill.write(chunk)
+                decoded += len(chunk)
+            returncode = process.wait()
+        except BaseException:
+            process.kill()
+            process.wait()
+            if spill is not None:
+                spill.close()
+            _remove(spill_path)
+            raise
+        finally:
+            process.stdout.close()
+        if spill is not None:
+            spill.close()
+
+        if returncode != 0:
+            _remove(spill_path)
+            errors.seek(0)
+            detail = errors.read()[-500:].decode("utf-8", "replace").strip()
+            raise UnsupportedAudioError(f"Could not decode the {container} upload: {detail}")
+
+    total = decoded // _FLOAT32_BYTES
+    if total == 0:
+        _remove(spill_path)
+        raise UnsupportedAudioError("The upload contains no audio.")
+
+    if spill_path is None:
+        audio = DecodedAudio(
+            format=container,
+            total=total,
+            start=0,
+            end=total,
+            buffer=np.frombuffer(memoryview(buffer)[: total * _FLOAT32_BYTES], dtype=np.float32),
+        )
+    else:
+        audio = DecodedAudio(format=container, total=total, start=0, end=total, path=spill_path)
+
+    if not trim_silence:
+        return audio
+    start, end = speech_bounds(
+        audio.samples(),
+        threshold_db=silence_threshold_db,
+        padding_seconds=silence_padding_seconds,
+    )
+    return replace(audio, start=start, end=end)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from app.utils import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_stats_providers: Dict[str, Callable[[], Dict[str, int]]] = {}
+
+
+def register_stats(name: str, provider: Callable[[], Dict[str, int]]) -> None:
+    """Expose a named set of counters through ``cache_stats``."""
+    _stats_providers[name] = provider
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    return {name: provider() for name, provider in sorted(_stats_providers.items())}
+
+
+def _cache_stat_values() -> Dict[Tuple[str, ...], float]:
+    return {
+        (name, stat): value
+        for name, stats in cache_stats().items()
+        for stat, value in stats.items()
+    }
+
+
+CACHE_STATS = metrics.Gauge(
+    "app_cache_stat",
+    "Counters from /api/monitoring/caches (hits, misses, evictions, ...).",
+    ("cache", "stat"),
+    callback=_cache_stat_values,
+)
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe bounded LRU mapping with optional per-entry expiry and usage counters."""
+
+    def __init__(self, name: str, maxsize: int, ttl_seconds: Optional[float] = None) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be greater than zero")
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[K, Tuple[V, Optional[float]]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        register_stats(name, self.stats)
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, *, ttl_seconds: Optional[float] = None) -> None:
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[0] if entry else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SingleFlight(Generic[K, V]):
+    """Coalesce concurrent calls for the same key into one shared in-flight task.
+
+    The shared task is shielded, so a caller that is cancelled (e.g. a client disconnect) does
+    not cancel the work other callers are waiting on.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._inflight: Dict[K, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+        register_stats(name, self.stats)
+
+    async def run(self, key: K, factory: Callable[[], Awaitable[V]]) -> V:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._inflight), "calls": self.calls, "coalesced": self.coalesced}
@@ -1,4 +1,11 @@
-﻿from typing import List
+﻿import re
+import sys
+from typing import Callable, List, Optional, Tuple
+
+try:  # pragma: no cover - resource is unavailable on Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
 
 
 def chunk_text(text: str, size: int) -> List[str]:
@@ -6,3 +13,71 @@ def chunk_text(text: str, size: int) -> List[str]:
     if size <= 0:
         raise ValueError("size must be greater than zero")
     return [text[index : index + size] for index in range(0, len(text), size)]
+
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text after sentence-ending punctuation and at line breaks."""
+    return [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+
+def chunk_sentences(
+    text: str,
+    max_tokens: int,
+    *,
+    count_tokens: Callable[[str], int],
+    overlap_tokens: int = 0,
+) -> List[str]:
+    """Group whole sentences into chunks of at most ``max_tokens`` tokens.
+
+    Up to ``overlap_tokens`` worth of trailing sentences from one chunk are repeated at the start
+    of the next. A single sentence longer than ``max_tokens`` is split between words.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be greater than zero")
+
+    pieces: List[Tuple[str, int]] = []
+    for sentence in split_sentences(text):
+        tokens = count_tokens(sentence)
+        if tokens <= max_tokens:
+            pieces.append((sentence, tokens))
+            continue
+        words = sentence.split()
+        per_piece = max(1, len(words) * max_tokens // tokens)
+        for index in range(0, len(words), per_piece):
+            piece = " ".join(words[index : index + per_piece])
+            pieces.append((piece, count_tokens(piece)))
+
+    chunks: List[str] = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+    for piece, tokens in pieces:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(sentence for sentence, _ in current))
+            carried: List[Tuple[str, int]] = []
+            carried_tokens = 0
+            for sentence, sentence_tokens in reversed(current):
+                if carried_tokens + sentence_tokens > overlap_tokens:
+                    break
+                carried.insert(0, (sentence, sentence_tokens))
+                carried_tokens += sentence_tokens
+            if carried_tokens + tokens > max_tokens:
+                carried, carried_tokens = [], 0
+            current, current_tokens = carried, carried_tokens
+        current.append((piece, tokens))
+        current_tokens += tokens
+
+    if current:
+        chunks.append(" ".join(sentence for sentence, _ in current))
+    return chunks
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Return the peak resident set size of the current process, if the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
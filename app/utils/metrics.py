@@ -0,0 +1,358 @@
+"""In-process metrics rendered in the Prometheus text exposition format at ``/metrics``.
+
+Metrics are module-level objects created once at import time; recording is a lock and a few
+additions, cheap enough to leave on. ``track`` and ``instrumented`` time a stage of the
+pipeline and maintain its in-progress gauge and error counter.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Milliseconds; spans a pool checkout that finds an idle connection up to a server-side timeout.
+DEFAULT_LATENCY_BUCKETS_MS: Sequence[float] = (
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    10000,
+)
+
+# Seconds; from a cached note read up to transcribing a long recording on CPU.
+STAGE_BUCKETS_SECONDS: Sequence[float] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+    300,
+    600,
+)
+
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram; ``snapshot`` reports cumulative bucket counts."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts: List[int] = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+
+        cumulative: Dict[str, int] = {}
+        running = 0
+        for bound, count in zip(self.buckets, counts, strict=False):
+            running += count
+            cumulative[f"{bound:g}"] = running
+        cumulative["+Inf"] = running + counts[-1]
+        return {"count": cumulative["+Inf"], "sum": total, "buckets": cumulative}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Mapping[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def histogram_lines(name: str, labels: Mapping[str, str], snapshot: Mapping[str, Any]) -> List[str]:
+    """Exposition lines for one labelled ``Histogram.snapshot()``."""
+    lines = [
+        f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}"
+        for bound, count in snapshot["buckets"].items()
+    ]
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+    lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+_registry: Dict[str, "_Metric"] = {}
+_collectors: List[Callable[[], Iterable[str]]] = []
+_refreshers: List[Callable[[], Awaitable[None]]] = []
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        if name in _registry:
+            raise ValueError(f"Metric {name} is already registered")
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = Lock()
+        _registry[name] = self
+
+    def _key(self, labels: Mapping[str, str]) -> Tuple[str, ...]:
+        return tuple([str(labels[name]) for name in self.label_names])
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.label_names, key, strict=True))
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        header = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return header + self.samples()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, or one read from ``callback`` at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        *,
+        callback: Optional[Callable[[], Mapping[Tuple[str, ...], float]]] = None,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self.add_to(self._key(labels), amount)
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.add_to(self._key(labels), -amount)
+
+    def add_to(self, key: Tuple[str, ...], amount: float) -> None:
+        """``inc`` for a precomputed label tuple, for hot paths."""
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels: str) -> float:
+        if self._callback is not None:
+            return self._callback().get(self._key(labels), 0.0)
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        if self._callback is not None:
+            values = sorted(self._callback().items())
+        else:
+            with self._lock:
+                values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class LabelledHistogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = STAGE_BUCKETS_SECONDS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        self._children: Dict[Tuple[str, ...], Histogram] = {}
+
+    def child(self, **labels: str) -> Histogram:
+        key = self._key(labels)
+        with self._lock:
+            histogram = self._children.get(key)
+            if histogram is None:
+                histogram = self._children[key] = Histogram(self.buckets)
+            return histogram
+
+    def observe(self, value: float, **labels: str) -> None:
+        self.child(**labels).observe(value)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            children = sorted(self._children.items())
+        lines: List[str] = []
+        for key, histogram in children:
+            lines.extend(histogram_lines(self.name, self._labels(key), histogram.snapshot()))
+        return lines
+
+
+def register_collector(collector: Callable[[], Iterable[str]]) -> None:
+    """Add exposition lines produced at scrape time, for state kept outside this registry."""
+    _collectors.append(collector)
+
+
+def register_refresher(refresher: Callable[[], Awaitable[None]]) -> None:
+    """Run an async update (e.g. a database count) before each scrape."""
+    _refreshers.append(refresher)
+
+
+async def refresh() -> None:
+    results = await asyncio.gather(
+        *(refresher() for refresher in _refreshers), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.debug("Metrics refresh failed: %s", result)
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric in _registry.values():
+        lines.extend(metric.render())
+    for collector in _collectors:
+        try:
+            lines.extend(collector())
+        except Exception as exc:  # pragma: no cover - collectors must not break the scrape
+            logger.warning("Metrics collector %r failed: %s", collector, exc)
+    return "\n".join(lines) + "\n"
+
+
+STAGE_DURATION = LabelledHistogram(
+    "app_stage_duration_seconds", "Duration of pipeline stages.", ("stage", "model")
+)
+STAGE_IN_PROGRESS = Gauge("app_stage_in_progress", "Pipeline stages currently running.", ("stage",))
+STAGE_ERRORS = Counter(
+    "app_stage_errors_total", "Pipeline stages that raised, by exception type.", ("stage", "error")
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _stage_histogram(stage: str, model: str) -> Histogram:
+    return STAGE_DURATION.child(stage=stage, model=model)
+
+
+class track:
+    """Time a stage and count it as in progress; exceptions are counted and re-raised.
+
+    A class rather than a generator-based context manager: it is entered on every note read,
+    so the per-call cost is kept to a few microseconds.
+    """
+
+    __slots__ = ("stage", "key", "histogram", "started")
+
+    def __init__(self, stage: str, model: str = "") -> None:
+        self.stage = stage
+        self.key = (stage,)
+        self.histogram = _stage_histogram(stage, model)
+
+    def __enter__(self) -> None:
+        STAGE_IN_PROGRESS.add_to(self.key, 1)
+        self.started = time.perf_counter()
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        self.histogram.observe(time.perf_counter() - self.started)
+        STAGE_IN_PROGRESS.add_to(self.key, -1)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(stage=self.stage, error=exc_type.__name__)
+
+
+def instrumented(stage: str, model: str = "") -> Callable[[F], F]:
+    """Decorator form of ``track`` for plain and ``async`` functions."""
+
+    def decorate(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with track(stage, model):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with track(stage, model):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import IO, Dict, Optional
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+# Routes that read their body with ``spool_upload`` bypass FastAPI's form parsing, so they pass
+# this as ``openapi_extra`` to document the expected multipart body.
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+# Allowance for multipart framing (boundaries, part headers) on top of the file payload.
+_MULTIPART_OVERHEAD = 16 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+@dataclass(frozen=True)
+class SpooledUpload:
+    """An uploaded file that has been streamed to disk."""
+
+    path: str
+    filename: Optional[str]
+    content_type: Optional[str]
+    size: int
+    sha256: str
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class _FilePartCollector:
+    """Multipart parser callbacks that buffer the payload of a single named file part."""
+
+    def __init__(self, field_name: str, max_bytes: int) -> None:
+        self.field_name = field_name.encode()
+        self.max_bytes = max_bytes
+        self.buffer = bytearray()
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.found = False
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self._active = False
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+
+    def callbacks(self) -> Dict[str, object]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, disposition = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._active = not self.found and disposition.get(b"name") == self.field_name
+        if not self._active:
+            return
+
+        self.found = True
+        filename = disposition.get(b"filename")
+        content_type = self._headers.get(b"content-type")
+        self.filename = filename.decode("utf-8", "replace") if filename else None
+        self.content_type = content_type.decode("latin-1") if content_type else None
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._active:
+            return
+        self.size += end - start
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds the {self.max_bytes} byte limit.")
+        block = data[start:end]
+        self.digest.update(block)
+        self.buffer.extend(block)
+
+    def on_part_end(self) -> None:
+        self._active = False
+
+    def take(self) -> bytes:
+        block = bytes(self.buffer)
+        self.buffer.clear()
+        return block
+
+
+async def spool_upload(
+    request: Request,
+    *,
+    field_name: str = "file",
+    chunk_size: int,
+    max_bytes: int,
+    directory: Optional[str] = None,
+) -> SpooledUpload:
+    """Stream one file field of a multipart request body into a temporary file.
+
+    The body is parsed as it arrives and written to disk in ``chunk_size`` blocks, so memory
+    stays bounded regardless of upload size; ``max_bytes`` is enforced mid-stream and the
+    SHA-256 of the payload is computed on the way through. The caller owns the returned file and
+    must ``remove()`` it when done.
+    """
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise ValueError("Expected a multipart/form-data upload.")
+
+    declared_length = request.headers.get("content-length", "")
+    if declared_length.isdigit() and int(declared_length) > max_bytes + _MULTIPART_OVERHEAD:
+        raise UploadTooLargeError(f"Upload exceeds the {max_bytes} byte limit.")
+
+    collector = _FilePartCollector(field_name, max_bytes)
+    parser = MultipartParser(boundary, collector.callbacks())
+    handle: Optional[IO[bytes]] = None
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if handle is None and collector.found:
+                suffix = os.path.splitext(collector.filename or "")[1]
+                handle = tempfile.NamedTemporaryFile(suffix=suffix, dir=directory, delete=False)
+            if handle is not None and len(collector.buffer) >= chunk_size:
+                await run_in_threadpool(handle.write, collector.take())
+        parser.finalize()
+
+        if handle is None:
+            raise ValueError(f"Missing '{field_name}' file in upload.")
+        if collector.buffer:
+            await run_in_threadpool(handle.write, collector.take())
+        handle.close()
+    except BaseException:
+        if handle is not None:
+            handle.close()
+            try:
+                os.remove(handle.name)
+            except OSError:
+                pass
+        raise
+
+    return SpooledUpload(
+        path=handle.name,
+        filename=collector.filename,
+        content_type=collector.content_type,
+        size=collector.size,
+        sha256=collector.digest.hexdigest(),
+    )
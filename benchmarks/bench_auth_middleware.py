@@ -0,0 +1,107 @@
+"""Compare requests per second through the pure ASGI auth middleware and a BaseHTTPMiddleware.
+
+Usage::
+
+    python -m benchmarks.bench_auth_middleware --requests 5000 --concurrency 50
+
+Requests are sent in-process through ``httpx.ASGITransport``, so the numbers isolate
+middleware and routing overhead: the user lookup and the notes query are stubbed out.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Iterable
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.middleware.auth_middleware import AuthMiddleware
+from app.models.note_model import NotePage
+from app.models.user_model import UserPublic
+from app.routes import notes
+from app.services import auth_service, note_service
+
+_PROTECTED_PATHS = ("/api/notes", "/api/mindmap", "/api/summarise")
+
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    """The previous implementation: BaseHTTPMiddleware plus a linear prefix scan."""
+
+    def __init__(self, app, protected_paths: Iterable[str]) -> None:
+        super().__init__(app)
+        self.protected_paths = tuple(protected_paths)
+
+    async def dispatch(self, request: Request, call_next):
+        if any(request.url.path.startswith(prefix) for prefix in self.protected_paths):
+            try:
+                token = AuthMiddleware._extract_token(request.headers)
+                request.state.user = await auth_service.get_user_from_token(token)
+            except HTTPException as exc:
+                return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+        return await call_next(request)
+
+
+async def _stub_user(token: str) -> UserPublic:
+    return UserPublic(id="user", email="user@example.com", full_name="User")
+
+
+async def _stub_list_notes(user_id: str, *, limit: int, cursor=None) -> NotePage:
+    return NotePage(items=[])
+
+
+def _build_app(middleware) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware, protected_paths=_PROTECTED_PATHS)
+    app.include_router(notes.router)
+
+    @app.get("/health")
+    async def health_check() -> dict[str, str]:
+        return {"status": "ok"}
+
+    return app
+
+
+async def _measure(app: FastAPI, path: str, total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": "Bearer token"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def run(count: int) -> None:
+            pending = iter(range(count))
+
+            async def worker() -> None:
+                for _ in pending:
+                    response = await client.get(path, headers=headers)
+                    response.raise_for_status()
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+        await run(min(total, 200))  # warm-up
+        started = time.perf_counter()
+        await run(total)
+        return total / (time.perf_counter() - started)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    auth_service.get_user_from_token = _stub_user
+    note_service.list_notes = _stub_list_notes
+
+    for path in ("/health", "/api/notes/"):
+        for label, middleware in (("before", LegacyAuthMiddleware), ("after", AuthMiddleware)):
+            rate = await _measure(_build_app(middleware), path, args.requests, args.concurrency)
+            print(f"{path:>12} {label:>6}: {rate:8.0f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""Measure ``/health`` latency while a burst of logins is being verified.
+
+Usage::
+
+    python -m benchmarks.bench_login_burst --logins 40 --rounds 12
+
+Runs the burst twice in-process: once with bcrypt called inline on the event loop (the old
+behaviour) and once through the bounded hashing executor, probing ``/health`` every 10 ms
+throughout. With hashing on the loop, probes queue behind every verification; offloaded, their
+latency should stay close to the idle baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List
+
+import httpx
+from bson import ObjectId
+
+from app.config import get_settings
+from app.main import app
+from app.services import auth_service
+
+
+class _UserStore:
+    def __init__(self, document: Dict[str, Any]) -> None:
+        self.document = document
+
+    async def find_one(self, query: Dict[str, Any]) -> Dict[str, Any] | None:
+        return dict(self.document) if query.get("email") == self.document["email"] else None
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any]) -> None:
+        self.document.update(update["$set"])
+
+
+async def _inline_hasher(func, *args):
+    return func(*args)
+
+
+async def _probe(client: httpx.AsyncClient, stop: asyncio.Event) -> List[float]:
+    # Latency is measured from when each probe was due, so time spent waiting for a blocked
+    # event loop to run the probe at all is counted too.
+    latencies: List[float] = []
+    due = time.perf_counter()
+    while True:
+        await client.get("/health")
+        finished = time.perf_counter()
+        latencies.append((finished - due) * 1000)
+        if stop.is_set():
+            return latencies
+        due = finished + 0.01
+        await asyncio.sleep(0.01)
+
+
+async def _burst(logins: int) -> List[float]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(client, stop))
+        await asyncio.sleep(0.1)
+        payload = {"email": "user@example.com", "password": "Password123"}
+        responses = await asyncio.gather(
+            *(client.post("/api/auth/login", json=payload) for _ in range(logins))
+        )
+        stop.set()
+        latencies = await probe
+
+    assert all(response.status_code == 200 for response in responses)
+    return latencies
+
+
+def _report(label: str, latencies: List[float]) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{label:>10}: {len(ordered):4d} probes  median {statistics.median(ordered):7.1f} ms  "
+        f"p99 {p99:7.1f} ms  max {ordered[-1]:7.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=None, help="hashing executor threads")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    settings.jwt_secret = settings.jwt_secret or "benchmark-secret"
+    settings.password_hash_rounds = args.rounds
+    if args.workers:
+        settings.password_hash_workers = args.workers
+
+    store = _UserStore(
+        {
+            "_id": ObjectId(),
+            "email": "user@example.com",
+            "hashed_password": auth_service.hash_password("Password123"),
+        }
+    )
+    auth_service.get_user_collection = lambda: store
+
+    offloaded = auth_service._run_hasher
+    auth_service._run_hasher = _inline_hasher
+    _report("inline", await _burst(args.logins))
+    auth_service._run_hasher = offloaded
+    _report("offloaded", await _burst(args.logins))
+    auth_service.shutdown_hash_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
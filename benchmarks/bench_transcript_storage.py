@@ -0,0 +1,158 @@
+"""Compare note documents with inline transcripts against the split transcript store.
+
+Usage::
+
+    python -m benchmarks.bench_transcript_storage --minutes 30 60 120
+    python -m benchmarks.bench_transcript_storage --mongo-uri mongodb://localhost:27017
+
+Without a MongoDB URI it reports BSON document sizes and the client-side cost of decoding a
+fetched note (BSON decode, plus zlib for the split layout). With one, it also times ``find_one``
+by ``_id`` on a scratch database for both layouts, which is what ``get_note`` waits on.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import bson
+from bson import ObjectId
+
+from app.services import transcript_service
+
+_WORDS_PER_MINUTE = 150
+_VOCABULARY_SIZE = 3000
+
+
+def _transcript(minutes: int, rng: random.Random) -> str:
+    vocabulary = [
+        "".join(rng.choice("etaoinshrdlucmfwyp") for _ in range(rng.randint(2, 9)))
+        for _ in range(_VOCABULARY_SIZE)
+    ]
+    # Zipf-like word frequencies, as in speech.
+    weights = [1 / rank for rank in range(1, _VOCABULARY_SIZE + 1)]
+    words = rng.choices(vocabulary, weights=weights, k=minutes * _WORDS_PER_MINUTE)
+    return " ".join(words)
+
+
+def _layouts(transcript: str) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    now = datetime.utcnow()
+    note = {
+        "_id": ObjectId(),
+        "user_id": "user",
+        "summary": "Weekly planning meeting. " * 20,
+        "actions": [{"task": f"Follow up {index}", "owner": "Ada"} for index in range(5)],
+        "topics": ["Launch", "Hiring", "Budget"],
+        "mindmap": {"version": 2, "nodes": [], "links": []},
+        "created_at": now,
+        "updated_at": now,
+    }
+    inline = {**note, "transcript": transcript}
+    split = {**note, **transcript_service.note_fields(transcript)}
+    stored = {
+        "_id": note["_id"],
+        "user_id": "user",
+        "codec": "zlib",
+        "data": transcript_service.compress(transcript),
+        "length": len(transcript),
+    }
+    return inline, split, stored
+
+
+def _decode_cost(encoded: List[bytes], repeat: int, decompress: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for data in encoded:
+            document = bson.decode(data)
+            if decompress:
+                transcript_service.decompress(document["data"])
+    return (time.perf_counter() - start) / repeat
+
+
+def _report_sizes(minutes: int, repeat: int) -> Tuple[Dict[str, Any], ...]:
+    inline, split, stored = _layouts(_transcript(minutes, random.Random(minutes)))
+    sizes = [len(bson.encode(document)) for document in (inline, split, stored)]
+    inline_cost = _decode_cost([bson.encode(inline)], repeat, decompress=False)
+    split_cost = _decode_cost([bson.encode(split)], repeat, decompress=False)
+    full_cost = split_cost + _decode_cost([bson.encode(stored)], repeat, decompress=True)
+    print(
+        f"{minutes:4d} min  note inline {sizes[0] / 1024:8.1f} KiB  split {sizes[1] / 1024:6.1f} KiB"
+        f"  + transcript {sizes[2] / 1024:7.1f} KiB  |  decode inline {inline_cost * 1e6:7.1f} us"
+        f"  split {split_cost * 1e6:6.1f} us  split+transcript {full_cost * 1e6:7.1f} us"
+    )
+    return inline, split, stored
+
+
+async def _time_find(collection, ids: List[ObjectId], projection=None) -> float:
+    samples = []
+    for note_id in ids:
+        start = time.perf_counter()
+        await collection.find_one({"_id": note_id}, projection)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+async def _report_latency(uri: str, minutes: int, notes: int) -> None:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(uri)
+    database = client["bench_transcript_storage"]
+    try:
+        inline_docs, split_docs, stored_docs = [], [], []
+        for index in range(notes):
+            inline, split, stored = _layouts(_transcript(minutes, random.Random(index)))
+            inline_docs.append(inline)
+            split_docs.append({**split, "_id": inline["_id"]})
+            stored_docs.append({**stored, "_id": inline["_id"]})
+        await database["inline"].insert_many(inline_docs)
+        await database["split"].insert_many(split_docs)
+        await database["transcripts"].insert_many(stored_docs)
+        ids = [document["_id"] for document in inline_docs]
+
+        inline_time = await _time_find(database["inline"], ids)
+        slim_time = await _time_find(database["split"], ids, {"transcript_excerpt": 0})
+
+        async def full(note_id: ObjectId) -> None:
+            note, stored = await asyncio.gather(
+                database["split"].find_one({"_id": note_id}, {"transcript_excerpt": 0}),
+                database["transcripts"].find_one({"_id": note_id}),
+            )
+            await asyncio.to_thread(transcript_service.decompress, stored["data"])
+
+        samples = []
+        for note_id in ids:
+            start = time.perf_counter()
+            await full(note_id)
+            samples.append(time.perf_counter() - start)
+        print(
+            f"{minutes:4d} min  get_note p50 inline {inline_time * 1000:6.2f} ms  "
+            f"split without transcript {slim_time * 1000:6.2f} ms  "
+            f"split with transcript {statistics.median(samples) * 1000:6.2f} ms"
+        )
+    finally:
+        await client.drop_database("bench_transcript_storage")
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=int, nargs="+", default=[30, 60, 120])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--mongo-uri", default=None)
+    parser.add_argument("--notes", type=int, default=50)
+    args = parser.parse_args()
+
+    for minutes in args.minutes:
+        _report_sizes(minutes, args.repeat)
+    if args.mongo_uri:
+        for minutes in args.minutes:
+            asyncio.run(_report_latency(args.mongo_uri, minutes, args.notes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import os
+import pickle
+import sys
+
+import numpy as np
+import pytest
+
+from app.utils.audio import (
+    SAMPLE_RATE,
+    UnsupportedAudioError,
+    decode_audio,
+    frame_energy,
+    plan_windows,
+    sniff_format,
+    speech_bounds,
+)
+
+
+def _speech_with_pauses(pauses: list[float], duration: float) -> np.ndarray:
+    """Loud noise everywhere except 0.3 s of silence centred on each pause time."""
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(-0.5, 0.5, int(duration * SAMPLE_RATE)).astype(np.float32)
+    for pause in pauses:
+        start = int((pause - 0.15) * SAMPLE_RATE)
+        samples[start : start + int(0.3 * SAMPLE_RATE)] = 0.0
+    return samples
+
+
+def test_plan_windows_keeps_short_audio_whole() -> None:
+    samples = np.zeros(5 * SAMPLE_RATE, dtype=np.float32)
+
+    windows = plan_windows(samples, max_seconds=10)
+
+    assert len(windows) == 1
+    assert (windows[0].start, windows[0].end) == (0, len(samples))
+
+
+def test_plan_windows_cuts_in_silence_with_overlap() -> None:
+    samples = _speech_with_pauses([7.0, 15.0], duration=20.0)
+
+    windows = plan_windows(samples, max_seconds=10, overlap_seconds=0.5)
+
+    assert len(windows) == 3
+    assert 6.85 <= windows[0].cut / SAMPLE_RATE <= 7.15
+    assert 14.85 <= windows[1].cut / SAMPLE_RATE <= 15.15
+    for window, following in zip(windows, windows[1:], strict=False):
+        assert following.start == window.cut
+        assert window.end - window.cut == int(0.5 * SAMPLE_RATE)
+        assert window.cut - window.start <= 10 * SAMPLE_RATE
+    assert windows[-1].end == len(samples)
+
+
+def test_frame_energy_is_computed_in_blocks_over_mapped_audio(tmp_path) -> None:
+    samples = _speech_with_pauses([40.0], duration=95.0)
+    path = tmp_path / "long.f32"
+    samples.tofile(path)
+    mapped = np.memmap(path, dtype=np.float32, mode="c", shape=samples.shape)
+    frame_length = int(0.03 * SAMPLE_RATE)
+
+    energy = frame_energy(mapped, frame_length)
+
+    frames = samples[: len(energy) * frame_length].reshape(-1, frame_length)
+    assert len(energy) == len(samples) // frame_length
+    np.testing.assert_allclose(energy, np.sqrt(np.mean(np.square(frames), axis=1)), rtol=1e-5)
+
+
+def test_plan_windows_rejects_invalid_length() -> None:
+    with pytest.raises(ValueError):
+        plan_windows(np.zeros(10, dtype=np.float32), max_seconds=0)
+
+
+_FAKE_FFMPEG = """#!{python}
+import sys
+
+import numpy as np
+
+if "corrupt" in sys.argv[sys.argv.index("-i") + 1]:
+    sys.stderr.write("Invalid data found when processing input\\n")
+    sys.exit(1)
+rate = 16000
+silence = np.zeros(rate, dtype=np.float32)
+tone = 0.5 * np.sin(np.arange(2 * rate, dtype=np.float32) / 5)
+sys.stdout.buffer.write(np.concatenate([silence, tone, silence]).astype("<f4").tobytes())
+"""
+
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch, tmp_path):
+    """An ``ffmpeg`` on PATH that emits 1 s of silence, 2 s of tone, then 1 s of silence."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "ffmpeg"
+    script.write_text(_FAKE_FFMPEG.format(python=sys.executable))
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return tmp_path
+
+
+def _wav_file(directory, name: str = "clip.wav"):
+    path = directory / name
+    path.write_bytes(b"RIFF\x24\x00\x00\x00WAVEfmt " + bytes(32))
+    return path
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        (b"RIFF\x24\x00\x00\x00WAVEfmt ", "wav"),
+        (b"\x00\x00\x00\x20ftypM4A ", "mp4"),
+        (b"OggS\x00\x02", "ogg"),
+        (b"\x1aE\xdf\xa3\x9fB\x86", "webm"),
+        (b"ID3\x04\x00", "mp3"),
+        (b"\xff\xfb\x90\x64", "mp3"),
+        (b"\xff\xf1\x50\x80", "aac"),
+        (b"%PDF-1.7", None),
+        (b"", None),
+    ],
+)
+def test_sniff_format_recognises_audio_containers(header: bytes, expected) -> None:
+    assert sniff_format(header) == expected
+
+
+def test_speech_bounds_trims_silent_edges_with_padding() -> None:
+    samples = np.zeros(40 * SAMPLE_RATE, dtype=np.float32)
+    samples[35 * SAMPLE_RATE : 36 * SAMPLE_RATE] = 0.5
+
+    start, end = speech_bounds(samples, threshold_db=-45, padding_seconds=0.25)
+
+    assert abs(start / SAMPLE_RATE - 34.75) < 0.05
+    assert abs(end / SAMPLE_RATE - 36.25) < 0.05
+    assert speech_bounds(np.zeros(SAMPLE_RATE), threshold_db=-45, padding_seconds=0) == (0, 0)
+
+
+def test_decode_audio_streams_and_trims(fake_ffmpeg) -> None:
+    audio = decode_audio(str(_wav_file(fake_ffmpeg)), memmap_min_seconds=60)
+    assert audio.path is None
+    assert audio.format == "wav"
+    assert audio.total == 4 * SAMPLE_RATE
+    assert 0.65 <= audio.offset <= 1.0
+    assert 2.0 <= audio.duration <= 2.7
+    assert audio.samples().dtype == np.float32
+
+
+def test_decode_audio_spills_long_recordings_to_a_mapped_file(fake_ffmpeg) -> None:
+    audio = decode_audio(
+        str(_wav_file(fake_ffmpeg)),
+        memmap_min_seconds=1,
+        directory=str(fake_ffmpeg),
+        trim_silence=False,
+    )
+
+    try:
+        assert audio.path is not None
+        assert os.path.getsize(audio.path) == 4 * SAMPLE_RATE * 4
+        window = audio.window(SAMPLE_RATE, 2 * SAMPLE_RATE)
+        restored = pickle.loads(pickle.dumps(window))
+        assert np.array_equal(restored.samples(), audio.samples()[SAMPLE_RATE : 2 * SAMPLE_RATE])
+    finally:
+        audio.remove()
+    assert not os.path.exists(audio.path)
+
+
+def test_decode_audio_rejects_undecodable_uploads(fake_ffmpeg) -> None:
+    with pytest.raises(UnsupportedAudioError, match="Invalid data"):
+        decode_audio(str(_wav_file(fake_ffmpeg, "corrupt.wav")), memmap_min_seconds=60)
+
+    notes = fake_ffmpeg / "notes.txt"
+    notes.write_text("not audio")
+    with pytest.raises(UnsupportedAudioError, match="Unrecognised"):
+        decode_audio(str(notes), memmap_min_seconds=60)
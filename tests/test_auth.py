@@ -4,6 +4,7 @@ from typing import Any, Dict
 
 import pytest
 from bson import ObjectId
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 
 from app.main import app
@@ -39,11 +40,22 @@ class InMemoryCollection:
 
         return Result(doc_copy["_id"])
 
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any]) -> None:
+        for document in self._documents.values():
+            if document.get("_id") == query["_id"]:
+                document.update(update["$set"])
+
 
 class _TestSettings:
     jwt_secret = "secret"
     jwt_algorithm = "HS256"
     jwt_expire_minutes = 60
+    password_hash_rounds = 4
+    password_hash_workers = 2
+    auth_cache_enabled = True
+    auth_token_cache_size = 16
+    auth_user_cache_size = 16
+    auth_user_cache_ttl_seconds = 60
 
 
 @pytest.fixture
@@ -51,6 +63,7 @@ def patched_auth_dependencies(monkeypatch):
     store = InMemoryCollection()
     monkeypatch.setattr(auth_service, "get_user_collection", lambda: store)
     monkeypatch.setattr(auth_service, "get_settings", lambda: _TestSettings())
+    auth_service.clear_auth_caches()
     return store
 
 
@@ -133,3 +146,72 @@ def test_me_endpoint_requires_valid_token(monkeypatch, patched_auth_dependencies
     assert response.status_code == 200
     body = response.json()
     assert body["email"] == "user@example.com"
+
+
+@pytest.mark.asyncio
+async def test_user_cache_skips_repeat_lookups_until_invalidated(patched_auth_dependencies):
+    store = patched_auth_dependencies
+    user_id = ObjectId()
+    store._documents["user@example.com"] = {
+        "_id": user_id,
+        "email": "user@example.com",
+        "full_name": "User",
+    }
+    lookups = []
+    original_find_one = store.find_one
+
+    async def counting_find_one(query):
+        lookups.append(query)
+        return await original_find_one(query)
+
+    store.find_one = counting_find_one
+    token = auth_service.create_access_token(user_id)
+
+    first = await auth_service.get_user_from_token(token)
+    second = await auth_service.get_user_from_token(token)
+    assert first == second
+    assert len(lookups) == 1
+
+    store._documents["user@example.com"]["full_name"] = "Renamed"
+    auth_service.invalidate_user(user_id)
+    third = await auth_service.get_user_from_token(token)
+
+    assert third.full_name == "Renamed"
+    assert len(lookups) == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_token_is_rejected_once_expired(monkeypatch, patched_auth_dependencies):
+    store = patched_auth_dependencies
+    user_id = ObjectId()
+    store._documents["user@example.com"] = {"_id": user_id, "email": "user@example.com"}
+    token = auth_service.create_access_token(user_id)
+    await auth_service.get_user_from_token(token)
+
+    later = auth_service.time.time() + 2 * 3600
+    monkeypatch.setattr(auth_service.time, "time", lambda: later)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await auth_service.get_user_from_token(token)
+    assert excinfo.value.status_code == 401
+
+
+def test_login_rehashes_password_when_cost_changes(patched_auth_dependencies):
+    store = patched_auth_dependencies
+    old_hash = auth_service._crypt_context(5).hash("Password123")
+    store._documents["user@example.com"] = {
+        "_id": ObjectId(),
+        "email": "user@example.com",
+        "hashed_password": old_hash,
+    }
+
+    response = client.post(
+        "/api/auth/login",
+        json={"email": "user@example.com", "password": "Password123"},
+    )
+
+    assert response.status_code == 200
+    new_hash = store._documents["user@example.com"]["hashed_password"]
+    assert new_hash != old_hash
+    assert new_hash.startswith("$2b$04$")
+    assert auth_service.verify_password("Password123", new_hash)
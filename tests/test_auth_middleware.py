@@ -0,0 +1,62 @@
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware.auth_middleware import AuthMiddleware
+from app.models.user_model import UserPublic
+from app.services import auth_service
+
+
+async def _stub_get_user_from_token(token: str) -> UserPublic:
+    if token != "good":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token.")
+    return UserPublic(id="user", email="user@example.com", full_name="User")
+
+
+def _client(monkeypatch) -> TestClient:
+    monkeypatch.setattr(auth_service, "get_user_from_token", _stub_get_user_from_token)
+    app = FastAPI()
+    app.add_middleware(AuthMiddleware, protected_paths=("/api/notes", "/api/notes/archive"))
+
+    @app.get("/api/notes/me")
+    async def whoami(request: Request) -> dict[str, str]:
+        return {"id": request.state.user.id}
+
+    @app.get("/api/notes/stream")
+    async def stream() -> StreamingResponse:
+        return StreamingResponse(iter([b"a", b"b", b"c"]), media_type="text/plain")
+
+    @app.get("/public")
+    async def public() -> dict[str, str]:
+        return {"status": "ok"}
+
+    return TestClient(app)
+
+
+def test_protected_path_sets_request_state_user(monkeypatch) -> None:
+    client = _client(monkeypatch)
+
+    response = client.get("/api/notes/me", headers={"Authorization": "Bearer good"})
+
+    assert response.status_code == 200
+    assert response.json() == {"id": "user"}
+
+
+def test_rejections_keep_json_detail(monkeypatch) -> None:
+    client = _client(monkeypatch)
+
+    missing = client.get("/api/notes/me")
+    malformed = client.get("/api/notes/me", headers={"Authorization": "Token good"})
+    invalid = client.get("/api/notes/me", headers={"Authorization": "Bearer bad"})
+
+    assert (missing.status_code, missing.json()) == (401, {"detail": "Not authenticated."})
+    assert malformed.json() == {"detail": "Invalid authorization header."}
+    assert invalid.json() == {"detail": "Invalid token."}
+
+
+def test_unprotected_paths_and_streams_pass_through(monkeypatch) -> None:
+    client = _client(monkeypatch)
+
+    assert client.get("/public").json() == {"status": "ok"}
+    streamed = client.get("/api/notes/stream", headers={"Authorization": "Bearer good"})
+    assert streamed.text == "abc"
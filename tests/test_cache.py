@@ -0,0 +1,61 @@
+import time
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.main import app
+from app.routes import admin as admin_route
+from app.services import auth_service
+from app.utils.cache import LRUCache
+
+client = TestClient(app)
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache: LRUCache[str, int] = LRUCache("test-lru", maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_cache_expires_entries() -> None:
+    cache: LRUCache[str, int] = LRUCache("test-ttl", maxsize=4, ttl_seconds=60)
+    cache.set("short", 1, ttl_seconds=0.01)
+    cache.set("long", 2)
+
+    time.sleep(0.02)
+
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cache_stats_endpoint_lists_registered_caches(monkeypatch) -> None:
+    async def stub_user(token: str):
+        return SimpleNamespace(id="admin", email="admin@example.com")
+
+    monkeypatch.setattr(auth_service, "get_user_from_token", stub_user)
+    LRUCache("test-endpoint", maxsize=1).set("key", "value")
+    headers = {"Authorization": "Bearer token"}
+
+    assert client.get("/api/monitoring/caches").status_code == 401
+    monkeypatch.setattr(admin_route, "get_settings", lambda: Settings(admin_emails=""))
+    assert client.get("/api/monitoring/caches", headers=headers).status_code == 403
+
+    monkeypatch.setattr(
+        admin_route, "get_settings", lambda: Settings(admin_emails="admin@example.com")
+    )
+    response = client.get("/api/monitoring/caches", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["test-endpoint"]["size"] == 1
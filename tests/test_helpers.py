@@ -0,0 +1,36 @@
+import pytest
+
+from app.utils.helpers import chunk_sentences, split_sentences
+
+
+def _words(text: str) -> int:
+    return len(text.split())
+
+
+def test_split_sentences_breaks_on_punctuation_and_newlines() -> None:
+    assert split_sentences("One. Two? Three!\nFour") == ["One.", "Two?", "Three!", "Four"]
+
+
+def test_chunk_sentences_respects_budget_and_overlap() -> None:
+    text = "Alpha beta gamma. Delta epsilon. Zeta eta theta. Iota kappa."
+
+    chunks = chunk_sentences(text, 5, count_tokens=_words, overlap_tokens=2)
+
+    assert chunks == [
+        "Alpha beta gamma. Delta epsilon.",
+        "Delta epsilon. Zeta eta theta.",
+        "Iota kappa.",
+    ]
+    assert all(_words(chunk) <= 5 for chunk in chunks)
+
+
+def test_chunk_sentences_splits_oversized_sentence() -> None:
+    chunks = chunk_sentences("one two three four five six seven", 3, count_tokens=_words)
+
+    assert all(_words(chunk) <= 3 for chunk in chunks)
+    assert " ".join(chunks) == "one two three four five six seven"
+
+
+def test_chunk_sentences_rejects_invalid_budget() -> None:
+    with pytest.raises(ValueError):
+        chunk_sentences("text", 0, count_tokens=_words)
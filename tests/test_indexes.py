@@ -0,0 +1,135 @@
+from typing import Any, Dict, List
+
+import pytest
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import DuplicateKeyError
+
+from app.database import indexes
+from app.models.user_model import UserCreate
+from app.services import auth_service
+
+
+class _FakeCollection:
+    def __init__(self, existing: Dict[str, Dict[str, Any]]) -> None:
+        self.existing = existing
+        self.created: List[IndexModel] = []
+
+    async def index_information(self) -> Dict[str, Dict[str, Any]]:
+        return dict(self.existing)
+
+    async def create_indexes(self, models: List[IndexModel]) -> List[str]:
+        self.created.extend(models)
+        for model in models:
+            self.existing[model.document["name"]] = dict(model.document)
+        return [model.document["name"] for model in models]
+
+
+class _FakeDatabase:
+    def __init__(self, collection: _FakeCollection) -> None:
+        self.collection = collection
+        self.commands: List[Any] = []
+
+    def __getitem__(self, name: str) -> _FakeCollection:
+        return self.collection
+
+    async def command(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        self.commands.append((args, kwargs))
+        return {"ok": 1}
+
+
+def _use_database(monkeypatch, existing: Dict[str, Dict[str, Any]]) -> _FakeDatabase:
+    database = _FakeDatabase(_FakeCollection(existing))
+    monkeypatch.setattr(indexes, "get_database", lambda: database)
+    return database
+
+
+@pytest.mark.asyncio
+async def test_ensure_collection_indexes_is_idempotent(monkeypatch) -> None:
+    database = _use_database(monkeypatch, {"_id_": {"key": [("_id", 1)]}})
+    models = [
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+    ]
+
+    await indexes.ensure_collection_indexes("users", models)
+    await indexes.ensure_collection_indexes("users", models)
+
+    assert len(database.collection.created) == 2
+    assert database.commands == []
+
+
+@pytest.mark.asyncio
+async def test_changed_ttl_is_updated_in_place(monkeypatch) -> None:
+    database = _use_database(
+        monkeypatch, {"created_at_1": {"key": [("created_at", 1)], "expireAfterSeconds": 60}}
+    )
+
+    await indexes.ensure_collection_indexes(
+        "summary_cache", [IndexModel([("created_at", ASCENDING)], expireAfterSeconds=120)]
+    )
+
+    assert database.collection.created == []
+    ((args, kwargs),) = database.commands
+    assert args == ("collMod", "summary_cache")
+    assert kwargs["index"] == {"name": "created_at_1", "expireAfterSeconds": 120}
+
+
+@pytest.mark.asyncio
+async def test_missing_unique_option_is_reported(monkeypatch) -> None:
+    _use_database(monkeypatch, {"email_1": {"key": [("email", 1)]}})
+
+    with pytest.raises(RuntimeError, match="unique"):
+        await indexes.ensure_collection_indexes(
+            "users", [IndexModel([("email", ASCENDING)], unique=True)]
+        )
+
+
+@pytest.mark.asyncio
+async def test_text_index_over_other_fields_is_reported(monkeypatch) -> None:
+    _use_database(
+        monkeypatch,
+        {
+            "notes_text": {
+                "key": [("_fts", "text"), ("_ftsx", 1)],
+                "weights": {"transcript": 1, "summary": 5},
+            }
+        },
+    )
+
+    with pytest.raises(RuntimeError, match="weights"):
+        await indexes.ensure_collection_indexes(
+            "notes",
+            [IndexModel([("summary", TEXT)], weights={"summary": 5}, name="notes_text")],
+        )
+
+
+def test_services_declare_their_indexes() -> None:
+    declared = indexes.declared_indexes()
+
+    assert {"users", "notes", "transcription_jobs", "summary_cache"} <= set(declared)
+    (email,) = declared["users"]
+    assert email.document["unique"] is True
+
+
+def test_plan_stages_flattens_the_winning_plan() -> None:
+    plan = {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}
+
+    assert indexes._plan_stages(plan) == ["LIMIT", "FETCH", "IXSCAN"]
+
+
+@pytest.mark.asyncio
+async def test_register_user_maps_duplicate_key_race(monkeypatch) -> None:
+    class RacingCollection:
+        async def find_one(self, query: Dict[str, Any]) -> None:
+            return None
+
+        async def insert_one(self, document: Dict[str, Any]):
+            raise DuplicateKeyError("E11000 duplicate key error")
+
+    monkeypatch.setattr(auth_service, "get_user_collection", lambda: RacingCollection())
+    monkeypatch.setattr(auth_service, "hash_password", lambda password: "hashed")
+
+    with pytest.raises(auth_service.UserAlreadyExistsError):
+        await auth_service.register_user(
+            UserCreate(email="user@example.com", password="Password123")
+        )
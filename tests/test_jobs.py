@@ -0,0 +1,315 @@
+import hashlib
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.main import app
+from app.models.job_model import JobRead
+from app.routes import audio as audio_route, jobs as jobs_route
+from app.services import auth_service, job_service
+from app.services.whisper_service import TranscriptionResult
+
+client = TestClient(app)
+AUTH_HEADER = {"Authorization": "Bearer token"}
+
+
+@pytest.fixture(autouse=True)
+def _authenticated(monkeypatch) -> None:
+    async def stub_user(token: str):
+        return SimpleNamespace(id="owner", email="owner@example.com")
+
+    monkeypatch.setattr(auth_service, "get_user_from_token", stub_user)
+
+
+class _RecordingCollection:
+    def __init__(self) -> None:
+        self.updates: list[Dict[str, Any]] = []
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any]):
+        self.updates.append(update["$set"])
+        return SimpleNamespace(matched_count=1)
+
+
+def _matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(document, branch) for branch in condition):
+                return False
+        elif isinstance(condition, dict) and "$lt" in condition:
+            if key not in document or not document[key] < condition["$lt"]:
+                return False
+        elif isinstance(condition, dict) and "$exists" in condition:
+            if (key in document) != condition["$exists"]:
+                return False
+        elif document.get(key) != condition:
+            return False
+    return True
+
+
+class _JobCollection:
+    """Just enough of a collection to claim, requeue and finish jobs."""
+
+    def __init__(self, *documents: Dict[str, Any]) -> None:
+        self.documents = list(documents)
+
+    def _apply(self, document: Dict[str, Any], update: Dict[str, Any]) -> None:
+        document.update(update.get("$set", {}))
+        for key in update.get("$unset", {}):
+            document.pop(key, None)
+
+    async def update_one(self, query, update):
+        matched = [document for document in self.documents if _matches(document, query)][:1]
+        for document in matched:
+            self._apply(document, update)
+        return SimpleNamespace(matched_count=len(matched))
+
+    async def update_many(self, query, update):
+        matched = [document for document in self.documents if _matches(document, query)]
+        for document in matched:
+            self._apply(document, update)
+        return SimpleNamespace(modified_count=len(matched))
+
+    async def find_one_and_update(self, query, update, *, sort, return_document):
+        for document in self.documents:
+            if _matches(document, query):
+                self._apply(document, update)
+                return dict(document)
+        return None
+
+
+def _job(status: str = "queued", **extra: Any) -> JobRead:
+    now = datetime.now(UTC)
+    return JobRead(id="job-1", status=status, created_at=now, updated_at=now, **extra)
+
+
+def test_async_upload_enqueues_job(monkeypatch) -> None:
+    captured = {}
+
+    async def fake_ensure_capacity() -> None:
+        return None
+
+    async def fake_enqueue(
+        path: str,
+        user_id: str,
+        *,
+        language: str | None = None,
+        audio_sha256: str | None = None,
+        tier: str | None = None,
+    ) -> JobRead:
+        captured["path"] = path
+        captured["user_id"] = user_id
+        captured["language"] = language
+        captured["sha256"] = audio_sha256
+        return _job()
+
+    monkeypatch.setattr(audio_route.job_service, "ensure_capacity", fake_ensure_capacity)
+    monkeypatch.setattr(audio_route.job_service, "enqueue_job", fake_enqueue)
+
+    response = client.post(
+        "/api/upload-audio",
+        files={"file": ("sample.wav", b"data", "audio/wav")},
+        params={"async": "true", "language": "en"},
+        headers=AUTH_HEADER,
+    )
+
+    assert response.status_code == 202
+    assert response.json() == {"job_id": "job-1", "status": "queued"}
+    assert captured["user_id"] == "owner"
+    assert captured["language"] == "en"
+    assert captured["sha256"] == hashlib.sha256(b"data").hexdigest()
+    assert Path(captured["path"]).read_bytes() == b"data"
+    Path(captured["path"]).unlink()
+
+
+def test_async_upload_applies_backpressure(monkeypatch) -> None:
+    async def fake_ensure_capacity() -> None:
+        raise job_service.QueueFullError(retry_after=15)
+
+    monkeypatch.setattr(audio_route.job_service, "ensure_capacity", fake_ensure_capacity)
+
+    response = client.post(
+        "/api/upload-audio",
+        files={"file": ("sample.wav", b"data", "audio/wav")},
+        params={"async": "true"},
+        headers=AUTH_HEADER,
+    )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "15"
+
+
+def test_get_job_reports_transcript(monkeypatch) -> None:
+    async def fake_get_job(job_id: str, user_id: str) -> JobRead:
+        assert (job_id, user_id) == ("job-1", "owner")
+        return _job("done", transcript="hello", detected_language="en")
+
+    monkeypatch.setattr(jobs_route.job_service, "get_job", fake_get_job)
+
+    response = client.get("/api/jobs/job-1", headers=AUTH_HEADER)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "done"
+    assert body["transcript"] == "hello"
+
+
+def test_get_job_handles_missing_job(monkeypatch) -> None:
+    async def fake_get_job(job_id: str, user_id: str):
+        return None
+
+    monkeypatch.setattr(jobs_route.job_service, "get_job", fake_get_job)
+
+    response = client.get("/api/jobs/unknown", headers=AUTH_HEADER)
+
+    assert response.status_code == 404
+
+
+def test_jobs_require_an_owner() -> None:
+    assert client.get("/api/jobs/job-1").status_code == 401
+
+    response = client.post(
+        "/api/upload-audio",
+        files={"file": ("sample.wav", b"data", "audio/wav")},
+        params={"async": "true"},
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_get_job_is_scoped_to_its_owner(monkeypatch) -> None:
+    queries = []
+
+    class _Collection:
+        async def find_one(self, query):
+            queries.append(query)
+            return None
+
+    monkeypatch.setattr(job_service, "_collection", lambda: _Collection())
+
+    assert await job_service.get_job(str(ObjectId()), "someone-else") is None
+    assert queries[0]["user_id"] == "someone-else"
+
+
+@pytest.mark.asyncio
+async def test_run_job_records_result_and_removes_audio(monkeypatch, tmp_path) -> None:
+    audio_path = tmp_path / "clip.wav"
+    audio_path.write_bytes(b"audio")
+    collection = _RecordingCollection()
+
+    async def fake_transcribe(
+        path: str,
+        *,
+        language: str | None = None,
+        audio_sha256: str | None = None,
+        tier: str | None = None,
+    ) -> TranscriptionResult:
+        return TranscriptionResult(text="hello", language="en", raw={})
+
+    monkeypatch.setattr(job_service, "_collection", lambda: collection)
+    monkeypatch.setattr(job_service, "transcribe_audio", fake_transcribe)
+
+    await job_service._run_job({"_id": ObjectId(), "audio_path": str(audio_path), "claim": {}})
+
+    assert collection.updates[-1]["status"] == "done"
+    assert collection.updates[-1]["result"] == {"transcript": "hello", "language": "en"}
+    assert not audio_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_run_job_records_failure(monkeypatch, tmp_path) -> None:
+    collection = _RecordingCollection()
+
+    async def fake_transcribe(
+        path: str,
+        *,
+        language: str | None = None,
+        audio_sha256: str | None = None,
+        tier: str | None = None,
+    ):
+        raise RuntimeError("Failed to transcribe audio.")
+
+    monkeypatch.setattr(job_service, "_collection", lambda: collection)
+    monkeypatch.setattr(job_service, "transcribe_audio", fake_transcribe)
+
+    await job_service._run_job(
+        {"_id": ObjectId(), "audio_path": str(tmp_path / "gone.wav"), "claim": {}}
+    )
+
+    assert collection.updates[-1]["status"] == "failed"
+    assert collection.updates[-1]["error"] == "Failed to transcribe audio."
+
+
+@pytest.mark.asyncio
+async def test_jobs_of_a_crashed_worker_are_requeued_without_waiting_for_the_timeout(
+    monkeypatch,
+) -> None:
+    crashed_at = datetime.now(UTC) - timedelta(minutes=5)
+    job = {
+        "_id": ObjectId(),
+        "status": "running",
+        "claim": {"instance": "gone", "id": ObjectId()},
+        "created_at": crashed_at,
+        "started_at": crashed_at,
+        "heartbeat_at": crashed_at,
+    }
+    collection = _JobCollection(job)
+    settings = Settings(transcription_job_heartbeat_seconds=30)
+    monkeypatch.setattr(job_service, "_collection", lambda: collection)
+    monkeypatch.setattr(job_service, "get_settings", lambda: settings)
+    monkeypatch.setattr(job_service, "_last_requeue", None)
+
+    # Run from the worker loop, well within transcription_job_timeout_seconds.
+    await job_service._requeue_if_due(settings)
+
+    assert job["status"] == "queued"
+    assert "claim" not in job
+    claimed = await job_service._claim_next_job()
+    assert claimed["claim"]["instance"] == job_service._INSTANCE_ID
+
+
+@pytest.mark.asyncio
+async def test_stale_claim_cannot_overwrite_the_new_owner(monkeypatch, tmp_path) -> None:
+    audio_path = tmp_path / "clip.wav"
+    audio_path.write_bytes(b"audio")
+    collection = _JobCollection(
+        {
+            "_id": ObjectId(),
+            "status": "queued",
+            "audio_path": str(audio_path),
+            "created_at": datetime.now(UTC),
+        }
+    )
+    monkeypatch.setattr(job_service, "_collection", lambda: collection)
+
+    async def fake_transcribe(path: str, **kwargs) -> TranscriptionResult:
+        return TranscriptionResult(text="hello", language="en", raw={})
+
+    monkeypatch.setattr(job_service, "transcribe_audio", fake_transcribe)
+
+    stalled = await job_service._claim_next_job()
+    # The stalled worker's job is requeued and claimed by another instance.
+    await collection.update_many({}, {"$set": {"status": "queued"}, "$unset": {"claim": ""}})
+    current = await job_service._claim_next_job()
+
+    async def failing_transcribe(path: str, **kwargs):
+        raise RuntimeError("Uploaded audio file is missing.")
+
+    monkeypatch.setattr(job_service, "transcribe_audio", failing_transcribe)
+    await job_service._run_job(stalled)
+
+    (job,) = collection.documents
+    assert job["status"] == "running"
+    assert audio_path.exists()
+
+    monkeypatch.setattr(job_service, "transcribe_audio", fake_transcribe)
+    await job_service._run_job(current)
+
+    assert job["status"] == "done"
+    assert job["result"]["transcript"] == "hello"
+    assert not audio_path.exists()
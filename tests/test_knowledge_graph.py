@@ -0,0 +1,187 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from app.services import knowledge_graph_service as graph
+
+
+def _ops(updates) -> Dict[Any, Dict[str, Any]]:
+    result = {}
+    for update in updates:
+        document = update._filter
+        key = document.get("key") or (document["source"], document["target"])
+        result[key] = update._doc["$inc"]
+    return result
+
+
+def test_graph_updates_apply_only_the_difference() -> None:
+    before = graph.NoteContribution({"topics": ["Budget", "Hiring"], "actions": [{}, {}]})
+    after = graph.NoteContribution({"topics": ["budget ", "Launch"], "actions": [{}]})
+
+    nodes, edges = graph._graph_updates("user", before, after)
+
+    assert _ops(nodes) == {
+        "budget": {"notes": 0, "actions": -1},
+        "hiring": {"notes": -1, "actions": -2},
+        "launch": {"notes": 1, "actions": 1},
+    }
+    assert _ops(edges) == {
+        ("budget", "hiring"): {"weight": -1},
+        ("budget", "launch"): {"weight": 1},
+    }
+
+
+def test_new_note_adds_every_topic_pair_once() -> None:
+    nodes, edges = graph._graph_updates(
+        "user",
+        graph.NoteContribution(None),
+        graph.NoteContribution({"topics": ["C", "A", "B", "a"]}),
+    )
+
+    assert set(_ops(nodes)) == {"a", "b", "c"}
+    assert set(_ops(edges)) == {("a", "b"), ("a", "c"), ("b", "c")}
+
+
+def test_pipelines_merge_into_the_graph_collections() -> None:
+    for pipeline, target in (
+        (graph.node_pipeline("user"), "knowledge_graph_nodes"),
+        (graph.edge_pipeline("user"), "knowledge_graph_edges"),
+    ):
+        assert pipeline[0] == {"$match": {"user_id": "user"}}
+        assert pipeline[-1]["$merge"]["into"] == target
+
+
+class _FakeCursor:
+    def __init__(self, documents: List[Dict[str, Any]]) -> None:
+        self.documents = documents
+
+    def sort(self, keys):
+        return self
+
+    def limit(self, count: int):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.documents
+
+
+class _FakeCollection:
+    def __init__(self, documents: List[Dict[str, Any]]) -> None:
+        self.documents = documents
+        self.writes: List[Any] = []
+
+    async def find_one(self, query, projection=None):
+        return next((doc for doc in self.documents if doc["_id"] == query["_id"]), None)
+
+    def find(self, query, projection=None):
+        return _FakeCursor(list(self.documents))
+
+    async def bulk_write(self, updates, ordered=True):
+        self.writes.extend(updates)
+
+    async def delete_many(self, query):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_record_change_ignores_graphs_not_built_yet(monkeypatch) -> None:
+    collections = {
+        "knowledge_graphs": _FakeCollection([]),
+        "knowledge_graph_nodes": _FakeCollection([]),
+    }
+    monkeypatch.setattr(graph, "_collection", lambda name: collections[name])
+
+    await graph.record_change("user", None, {"topics": ["Budget"]})
+    assert collections["knowledge_graph_nodes"].writes == []
+
+    collections["knowledge_graphs"].documents.append({"_id": "user"})
+    await graph.record_change("user", None, {"topics": ["Budget"]})
+    assert len(collections["knowledge_graph_nodes"].writes) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_user_graph_reads_stored_counts(monkeypatch) -> None:
+    collections = {
+        "knowledge_graphs": _FakeCollection([{"_id": "user"}]),
+        "knowledge_graph_nodes": _FakeCollection(
+            [
+                {"key": "budget", "label": "Budget", "notes": 3, "actions": 5},
+                {"key": "hiring", "label": "Hiring", "notes": 1, "actions": 0},
+            ]
+        ),
+        "knowledge_graph_edges": _FakeCollection(
+            [{"source": "budget", "target": "hiring", "weight": 1}]
+        ),
+    }
+    monkeypatch.setattr(graph, "_collection", lambda name: collections[name])
+
+    result = await graph.get_user_graph("user", max_topics=10)
+
+    assert result["nodes"][0] == {"id": "budget", "label": "Budget", "notes": 3, "actions": 5}
+    assert result["links"] == [{"source": "budget", "target": "hiring", "weight": 1}]
+
+
+class _StateCollection:
+    def __init__(self) -> None:
+        self.documents: Dict[str, Dict[str, Any]] = {}
+
+    async def find_one(self, query, projection=None):
+        return self.documents.get(query["_id"])
+
+    async def replace_one(self, query, document, upsert=False):
+        current = self.documents.get(query["_id"])
+        if current is None and not upsert:
+            return
+        if current is not None and any(current.get(k) != v for k, v in query.items()):
+            return
+        self.documents[query["_id"]] = document
+
+    async def delete_one(self, query):
+        self.documents.pop(query["_id"], None)
+
+
+class _NotesDuringRebuild:
+    """Aggregations that run a note change between the node and edge pipelines."""
+
+    def __init__(self, change) -> None:
+        self.change = change
+
+    def aggregate(self, pipeline):
+        change, self.change = self.change, None
+        return _ChangeCursor(change)
+
+
+class _ChangeCursor:
+    def __init__(self, change) -> None:
+        self.change = change
+
+    async def to_list(self, length):
+        if self.change is not None:
+            await self.change()
+        return []
+
+
+@pytest.mark.asyncio
+async def test_change_during_rebuild_leaves_the_graph_unbuilt(monkeypatch) -> None:
+    state = _StateCollection()
+
+    async def change() -> None:
+        await graph.record_change("user", None, {"topics": ["Budget"]})
+
+    collections = {
+        "knowledge_graphs": state,
+        "knowledge_graph_nodes": _FakeCollection([]),
+        "knowledge_graph_edges": _FakeCollection([]),
+        "notes": _NotesDuringRebuild(change),
+    }
+    monkeypatch.setattr(graph, "_collection", lambda name: collections[name])
+
+    await graph.rebuild("user")
+
+    assert collections["knowledge_graph_nodes"].writes == []
+    assert not await graph._is_built("user")
+
+    collections["notes"] = _NotesDuringRebuild(None)
+    await graph.rebuild("user")
+    assert await graph._is_built("user")
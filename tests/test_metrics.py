@@ -0,0 +1,91 @@
+from threading import Lock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.main import app
+from app.routes import monitoring
+from app.services import mindmap_service, note_service, whisper_service
+from app.utils import metrics
+
+SCRAPE_HEADER = {"Authorization": "Bearer scrape"}
+
+
+def _stage_count(stage: str, model: str = "") -> int:
+    return metrics.STAGE_DURATION.child(stage=stage, model=model).snapshot()["count"]
+
+
+def test_prometheus_rendering_of_counters_and_histograms(monkeypatch) -> None:
+    # A registry of its own, so the test metrics never reach /metrics or clash on a rerun.
+    monkeypatch.setattr(metrics, "_registry", {})
+    counter = metrics.Counter("test_render_total", "Test counter.", ("kind",))
+    histogram = metrics.LabelledHistogram("test_render_seconds", "Test histogram.", buckets=(1,))
+    counter.inc(kind='say "hi"')
+    histogram.observe(0.5)
+    histogram.observe(2)
+
+    text = metrics.render_prometheus()
+
+    assert "# TYPE test_render_total counter" in text
+    assert 'test_render_total{kind="say \\"hi\\""} 1' in text
+    assert 'test_render_seconds_bucket{le="1"} 1' in text
+    assert 'test_render_seconds_bucket{le="+Inf"} 2' in text
+    assert "test_render_seconds_sum 2.5" in text
+
+
+def test_metrics_endpoint_requires_the_scrape_token(monkeypatch) -> None:
+    client = TestClient(app)
+
+    monkeypatch.setattr(monitoring, "get_settings", lambda: Settings())
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(monitoring, "get_settings", lambda: Settings(metrics_token="scrape"))
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer nope"}).status_code == 401
+    assert client.get("/metrics", headers=SCRAPE_HEADER).status_code == 200
+
+
+def test_metrics_endpoint_counts_requests_by_route_template(monkeypatch) -> None:
+    monkeypatch.setattr(monitoring, "get_settings", lambda: Settings(metrics_token="scrape"))
+    client = TestClient(app)
+    before = metrics.render_prometheus()
+
+    client.get("/health")
+    response = client.get("/metrics", headers=SCRAPE_HEADER)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    line = 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}'
+    counts = [
+        int(text.split(line)[1].split()[0]) if line in text else 0
+        for text in (before, response.text)
+    ]
+    assert counts[1] == counts[0] + 1
+    assert "app_cache_stat" in response.text
+
+
+@pytest.mark.asyncio
+async def test_service_stages_record_latency_and_errors() -> None:
+    builds = _stage_count("mindmap.build")
+    errors = metrics.STAGE_ERRORS.value(stage="notes.get", error="ValueError")
+
+    mindmap_service.build_mindmap([{"task": "Ship it"}], ["Launch"])
+    with pytest.raises(ValueError):
+        await note_service.get_note("not-an-object-id", "user")
+
+    assert _stage_count("mindmap.build") == builds + 1
+    assert metrics.STAGE_ERRORS.value(stage="notes.get", error="ValueError") == errors + 1
+    assert metrics.STAGE_IN_PROGRESS.value(stage="notes.get") == 0
+
+
+def test_whisper_decode_slot_tracks_waiting_and_decode_time(monkeypatch) -> None:
+    monkeypatch.setitem(whisper_service._inference_locks, "test-model", Lock())
+    decodes = _stage_count("whisper.decode", "test-model")
+
+    with whisper_service._inference_slot("test-model"):
+        assert whisper_service._inference_locks["test-model"].locked()
+
+    assert not whisper_service._inference_locks["test-model"].locked()
+    assert whisper_service.INFERENCE_WAITING.value(model="test-model") == 0
+    assert _stage_count("whisper.decode", "test-model") == decodes + 1
@@ -0,0 +1,49 @@
+import time
+
+from app.services import mindmap_service
+
+
+def _links(mindmap):
+    return {(link["source"], link["target"]) for link in mindmap["links"]}
+
+
+def test_actions_link_to_the_topics_they_mention() -> None:
+    mindmap = mindmap_service.build_mindmap(
+        [{"task": "Draft the hiring plan"}, {"task": "Book a venue"}],
+        ["Hiring", "Budget review"],
+    )
+
+    assert ("topic-1", "action-1") in _links(mindmap)
+    assert ("root", "action-2") in _links(mindmap)
+    assert mindmap["version"] == mindmap_service.MINDMAP_VERSION
+    topic = next(node for node in mindmap["nodes"] if node["id"] == "topic-1")
+    assert topic["type"] == "topic"
+    assert {"x", "y", "centrality"} <= topic.keys()
+
+
+def test_words_shared_by_every_topic_do_not_create_links() -> None:
+    mindmap = mindmap_service.build_mindmap(
+        [{"task": "Update the plan"}], ["Launch plan", "Pricing plan"]
+    )
+
+    assert ("root", "action-1") in _links(mindmap)
+
+
+def test_hundreds_of_actions_build_quickly() -> None:
+    subjects = "budget hiring roadmap launch pricing security docs support infra sales".split()
+    topics = [f"{subject} review" for subject in subjects]
+    actions = [{"task": f"Follow up on {subjects[i % 10]} item {i}"} for i in range(500)]
+
+    started = time.perf_counter()
+    mindmap = mindmap_service.build_mindmap(actions, topics)
+    elapsed = time.perf_counter() - started
+
+    assert len(mindmap["nodes"]) == 511
+    assert len(mindmap["links"]) == 510
+    assert elapsed < 1.0
+
+
+def test_is_current_rejects_legacy_maps() -> None:
+    assert not mindmap_service.is_current({})
+    assert not mindmap_service.is_current({"nodes": [], "links": []})
+    assert mindmap_service.is_current(mindmap_service.build_mindmap([], []))
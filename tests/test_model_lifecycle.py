@@ -0,0 +1,233 @@
+import asyncio
+import threading
+from collections import Counter, OrderedDict
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.main import app
+from app.routes import admin as admin_route
+from app.services import auth_service, transcription_cache, whisper_service
+from app.utils.audio import SAMPLE_RATE, DecodedAudio
+
+AUTH_HEADER = {"Authorization": "Bearer admintoken"}
+
+
+class _FakeModel:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.decodes = 0
+
+    def transcribe(self, audio, language=None):
+        self.decodes += 1
+        return {"text": f"from {self.name}", "language": language or "en"}
+
+
+@pytest.fixture
+def models(monkeypatch):
+    loaded = []
+
+    def load_model(name: str) -> _FakeModel:
+        loaded.append(name)
+        return _FakeModel(name)
+
+    settings = Settings(
+        whisper_model_size="base",
+        whisper_model_memory_mb=1200,
+        transcription_cache_enabled=False,
+    )
+    for name, value in {
+        "_model_cache": OrderedDict(),
+        "_model_bytes": {},
+        "_loading_locks": {},
+        "_inference_locks": {},
+        "_warm_models": set(),
+        "_model_users": Counter(),
+        "_active_model": None,
+        "_ready_model": None,
+        "_loading_model": None,
+        "_load_error": None,
+        "_background_task": None,
+    }.items():
+        monkeypatch.setattr(whisper_service, name, value)
+    monkeypatch.setattr(whisper_service, "get_settings", lambda: settings)
+    monkeypatch.setattr(whisper_service.whisper, "load_model", load_model)
+    samples = np.full(SAMPLE_RATE, 0.1, dtype=np.float32)
+    speech = DecodedAudio(format="wav", total=SAMPLE_RATE, start=0, end=SAMPLE_RATE, buffer=samples)
+    monkeypatch.setattr(whisper_service, "decode_audio", lambda path, **_: speech)
+    transcription_cache.clear_memory()
+    return loaded
+
+
+@pytest.mark.asyncio
+async def test_preload_loads_and_warms_before_reporting_ready(models) -> None:
+    assert not whisper_service.is_ready()
+
+    await whisper_service.start_preload()
+
+    assert models == ["base"]
+    assert whisper_service._model_cache["base"].decodes == 1
+    assert whisper_service.is_ready()
+    assert whisper_service.model_status()["loaded_models"] == ["base"]
+
+
+@pytest.mark.asyncio
+async def test_switch_keeps_in_flight_model_until_it_finishes(models, tmp_path) -> None:
+    await whisper_service.start_preload()
+    audio_path = tmp_path / "clip.wav"
+    audio_path.write_bytes(b"audio")
+
+    # A transcription that started on "base" is still running while the switch completes.
+    whisper_service._acquire_model("base")
+    await whisper_service.switch_model("small")
+
+    assert whisper_service.active_model_name() == "small"
+    assert whisper_service.is_ready()
+    assert "base" in whisper_service._model_cache
+
+    whisper_service._release_model("base")
+    assert sorted(whisper_service._model_cache) == ["small"]
+
+    result = await whisper_service.transcribe_audio(str(audio_path))
+    assert result.text == "from small"
+
+
+@pytest.mark.asyncio
+async def test_switch_rejects_unknown_models_and_concurrent_switches(models) -> None:
+    with pytest.raises(ValueError):
+        whisper_service.switch_model("enormous")
+
+    task = whisper_service.switch_model("tiny")
+    with pytest.raises(whisper_service.ModelSwitchInProgressError):
+        whisper_service.switch_model("small")
+    await asyncio.gather(task)
+
+
+def test_readiness_probe_reports_loading_until_model_is_warm(monkeypatch) -> None:
+    client = TestClient(app)
+    monkeypatch.setattr(whisper_service, "is_ready", lambda: False)
+    assert client.get("/health/live").status_code == 200
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "loading"
+
+    monkeypatch.setattr(whisper_service, "is_ready", lambda: True)
+    assert client.get("/health/ready").status_code == 200
+
+
+def test_model_switch_requires_an_admin(monkeypatch) -> None:
+    async def stub_user(token: str):
+        return SimpleNamespace(id="user", email="user@example.com")
+
+    switched = []
+    monkeypatch.setattr(auth_service, "get_user_from_token", stub_user)
+    monkeypatch.setattr(whisper_service, "switch_model", switched.append)
+    client = TestClient(app)
+
+    monkeypatch.setattr(admin_route, "get_settings", lambda: Settings(admin_emails=""))
+    response = client.post(
+        "/api/admin/whisper-model", json={"model_size": "small"}, headers=AUTH_HEADER
+    )
+    assert response.status_code == 403
+
+    monkeypatch.setattr(
+        admin_route, "get_settings", lambda: Settings(admin_emails="USER@example.com")
+    )
+    response = client.post(
+        "/api/admin/whisper-model", json={"model_size": "small"}, headers=AUTH_HEADER
+    )
+    assert response.status_code == 202
+    assert switched == ["small"]
+
+
+def test_auto_tier_picks_the_model_by_duration() -> None:
+    settings = Settings(
+        whisper_model_size="base",
+        whisper_fast_model="tiny",
+        whisper_accurate_model="small",
+        whisper_auto_fast_max_seconds=60,
+        whisper_auto_accurate_min_seconds=600,
+    )
+
+    assert whisper_service.model_for_tier("accurate", None, settings) == "small"
+    assert whisper_service.model_for_tier("auto", 20, settings) == "tiny"
+    assert whisper_service.model_for_tier("auto", 300, settings) == "base"
+    assert whisper_service.model_for_tier("auto", 3600, settings) == "small"
+    assert whisper_service.model_for_tier("auto", None, settings) == "base"
+    with pytest.raises(ValueError):
+        whisper_service.model_for_tier("best", None, settings)
+
+
+@pytest.mark.asyncio
+async def test_tier_models_are_evicted_least_recently_used_first(
+    models, monkeypatch, tmp_path
+) -> None:
+    audio_path = tmp_path / "clip.wav"
+    audio_path.write_bytes(b"audio")
+    monkeypatch.setattr(whisper_service, "probe_duration", lambda path: 30.0)
+    await whisper_service.start_preload()
+
+    result = await whisper_service.transcribe_audio(str(audio_path), tier="auto")
+    assert result.model == "tiny"
+    assert list(whisper_service._model_cache) == ["base", "tiny"]
+
+    # base + tiny + small exceed the 1200 MB budget: tiny is idle and least recently used.
+    evictions = whisper_service.MODEL_EVICTIONS.value(model="tiny")
+    result = await whisper_service.transcribe_audio(str(audio_path), tier="accurate")
+    assert result.text == "from small"
+    assert list(whisper_service._model_cache) == ["base", "small"]
+    assert whisper_service.MODEL_EVICTIONS.value(model="tiny") == evictions + 1
+    assert models == ["base", "tiny", "small"]
+
+
+@pytest.mark.asyncio
+async def test_models_in_use_are_not_evicted(models, tmp_path) -> None:
+    audio_path = tmp_path / "clip.wav"
+    audio_path.write_bytes(b"audio")
+    await whisper_service.start_preload()
+    await whisper_service.transcribe_audio(str(audio_path), tier="fast")
+
+    whisper_service._acquire_model("tiny")
+    try:
+        await whisper_service.transcribe_audio(str(audio_path), tier="accurate")
+    finally:
+        whisper_service._release_model("tiny")
+
+    # Over budget, but the active model and the one in use both stay resident.
+    assert sorted(whisper_service._model_cache) == ["base", "small", "tiny"]
+
+
+@pytest.mark.asyncio
+async def test_process_switch_stays_ready_while_the_old_pool_drains(models, monkeypatch) -> None:
+    draining = threading.Event()
+
+    class _Pool:
+        def __init__(self, model_name: str) -> None:
+            self.model_name = model_name
+
+        def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+            draining.wait(timeout=5)
+
+    async def spawn_workers(pool, settings, model_name) -> None:
+        return None
+
+    settings = Settings(whisper_model_size="base", whisper_backend="process")
+    monkeypatch.setattr(whisper_service, "get_settings", lambda: settings)
+    monkeypatch.setattr(whisper_service, "_new_process_pool", lambda s, name: _Pool(name))
+    monkeypatch.setattr(whisper_service, "_spawn_workers", spawn_workers)
+    monkeypatch.setattr(whisper_service, "_process_pool", _Pool("base"))
+    monkeypatch.setattr(whisper_service, "_draining_pools", set())
+
+    await whisper_service.switch_model("small")
+
+    # The old pool is still finishing its transcriptions, yet the pod stays in rotation.
+    assert whisper_service._draining_pools
+    assert whisper_service.is_ready()
+    assert whisper_service._process_pool.model_name == "small"
+
+    draining.set()
+    await whisper_service.stop_background_load()
+    assert not whisper_service._draining_pools
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.database import mongodb, pool_monitor
+from app.main import app
+from app.routes import admin as admin_route
+from app.services import auth_service
+from app.utils.metrics import Histogram
+
+_ADDRESS = ("db.example", 27017)
+
+
+def _event(**fields):
+    return SimpleNamespace(address=_ADDRESS, connection_id=1, **fields)
+
+
+def test_histogram_reports_cumulative_buckets() -> None:
+    histogram = Histogram(buckets=(1, 10))
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+
+    assert snapshot["buckets"] == {"1": 2, "10": 3, "+Inf": 4}
+    assert snapshot["count"] == 4
+    assert snapshot["sum"] == 56.5
+
+
+def test_pool_monitor_tracks_checkouts_and_waits() -> None:
+    monitor = pool_monitor.PoolMonitor()
+    monitor.connection_created(_event())
+    monitor.connection_created(_event())
+    monitor.connection_checked_out(_event(duration=0.002))
+    monitor.connection_checked_out(_event(duration=0.2))
+    monitor.connection_checked_in(_event())
+    monitor.connection_check_out_failed(_event(duration=1.0, reason="timeout"))
+
+    (pool,) = monitor.snapshot().values()
+
+    assert pool["open"] == 2
+    assert pool["in_use"] == 1
+    assert pool["max_in_use"] == 2
+    assert pool["checkouts"] == 2
+    assert pool["checkout_failures"] == {"timeout": 1}
+    assert pool["checkout_wait_ms"]["count"] == 3
+    assert pool["checkout_wait_ms"]["buckets"]["2.5"] == 1
+    assert monitor.totals()["checkout_failures"] == 1
+
+
+def test_command_monitor_groups_latency_by_command() -> None:
+    monitor = pool_monitor.CommandMonitor()
+    monitor.succeeded(SimpleNamespace(command_name="find", duration_micros=1500))
+    monitor.failed(SimpleNamespace(command_name="insert", duration_micros=40000))
+
+    snapshot = monitor.snapshot()
+
+    assert snapshot["find"]["latency_ms"]["sum"] == 1.5
+    assert snapshot["insert"]["failures"] == 1
+
+
+def test_client_options_pass_only_configured_values() -> None:
+    settings = Settings(
+        mongo_max_pool_size=20, mongo_wait_queue_timeout_ms=500, mongo_compressors="zlib"
+    )
+
+    options = mongodb.client_options(settings)
+
+    assert options["maxPoolSize"] == 20
+    assert options["waitQueueTimeoutMS"] == 500
+    assert options["compressors"] == "zlib"
+    assert "socketTimeoutMS" not in options
+    assert pool_monitor.pool_monitor in options["event_listeners"]
+    assert "event_listeners" not in mongodb.client_options(Settings(mongo_pool_monitoring=False))
+
+
+def test_mongo_stats_route_returns_pools_and_commands(monkeypatch) -> None:
+    async def stub_user(token: str):
+        return SimpleNamespace(id="user", email="user@example.com")
+
+    monkeypatch.setattr(auth_service, "get_user_from_token", stub_user)
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer token"}
+
+    assert client.get("/api/monitoring/mongo").status_code == 401
+    monkeypatch.setattr(admin_route, "get_settings", lambda: Settings(admin_emails=""))
+    assert client.get("/api/monitoring/mongo", headers=headers).status_code == 403
+
+    monkeypatch.setattr(
+        admin_route, "get_settings", lambda: Settings(admin_emails="user@example.com")
+    )
+    response = client.get("/api/monitoring/mongo", headers=headers)
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"pools", "commands"}
@@ -1,4 +1,6 @@
-﻿import pytest
+﻿import asyncio
+
+import pytest
 
 from app.services import nlp_service
 
@@ -6,6 +8,21 @@ from app.services import nlp_service
 class _FakeSettings:
     openai_api_key = "test-key"
     openai_model = "test-model"
+    summary_chunk_tokens = 8000
+    summary_chunk_overlap_tokens = 0
+    summary_max_concurrency = 2
+    summary_batch_concurrency = 2
+    summary_batch_max_items = 10
+    summary_batch_max_retries = 2
+    summary_batch_backoff_seconds = 0.0
+    summary_cache_enabled = True
+    summary_cache_size = 16
+    summary_cache_ttl_seconds = 60
+    mongo_uri = None
+
+
+class _SmallWindowSettings(_FakeSettings):
+    summary_chunk_tokens = 12
 
 
 class _MissingKeySettings:
@@ -13,13 +30,23 @@ class _MissingKeySettings:
     openai_model = "test-model"
 
 
+@pytest.fixture(autouse=True)
+def _empty_summary_cache():
+    nlp_service.clear_summary_cache()
+    yield
+    nlp_service.clear_summary_cache()
+
+
 class _DummyChain:
     def __init__(self, response):
         self.response = response
         self.received = None
+        self.calls = 0
 
     async def ainvoke(self, inputs):
         self.received = inputs
+        self.calls += 1
+        await asyncio.sleep(0)
         return self.response
 
 
@@ -53,6 +80,183 @@ async def test_generate_summary_returns_normalised_payload(monkeypatch) -> None:
     assert result["transcript_length"] == len("Valid transcript")
 
 
+class _ChunkChain:
+    def __init__(self) -> None:
+        self.received = []
+        self.active = 0
+        self.peak = 0
+
+    async def ainvoke(self, inputs):
+        self.received.append(inputs["transcript"])
+        index = len(self.received)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return {
+            "summary": f"Part {index} summary.",
+            "actions": [{"task": "Send minutes"}, {"task": f"Task {index}"}],
+            "topics": ["Budget", "budget ", f"Topic {index}"],
+        }
+
+
+@pytest.mark.asyncio
+async def test_generate_summary_map_reduces_long_transcripts(monkeypatch) -> None:
+    chunk_chain = _ChunkChain()
+    reduce_chain = _DummyChain({"summary": "Whole meeting summary."})
+    transcript = " ".join(f"Sentence number {index} is here." for index in range(12))
+
+    monkeypatch.setattr(nlp_service, "get_settings", lambda: _SmallWindowSettings)
+    monkeypatch.setattr(nlp_service, "_count_tokens", lambda text, model_name: len(text.split()))
+    monkeypatch.setattr(nlp_service, "_get_chain", lambda api_key, model_name: chunk_chain)
+    monkeypatch.setattr(nlp_service, "_get_reduce_chain", lambda api_key, model_name: reduce_chain)
+
+    result = await nlp_service.generate_summary(transcript)
+
+    assert len(chunk_chain.received) == 6
+    assert chunk_chain.peak == 2
+    assert reduce_chain.received["summaries"].startswith("Part 1: ")
+    assert result["summary"] == "Whole meeting summary."
+    assert result["actions"][0] == {"task": "Send minutes"}
+    assert len(result["actions"]) == 7
+    assert result["topics"][:2] == ["Budget", "Topic 1"]
+    assert result["transcript_length"] == len(transcript)
+
+
+@pytest.mark.asyncio
+async def test_generate_summary_reuses_cached_and_in_flight_results(monkeypatch) -> None:
+    chain = _DummyChain({"summary": "cached", "actions": [], "topics": ["Topic"]})
+
+    monkeypatch.setattr(nlp_service, "get_settings", lambda: _FakeSettings)
+    monkeypatch.setattr(nlp_service, "_get_chain", lambda api_key, model_name: chain)
+
+    first, second = await asyncio.gather(
+        nlp_service.generate_summary("Same   transcript"),
+        nlp_service.generate_summary("Same transcript"),
+    )
+    repeat = await nlp_service.generate_summary(" Same transcript ")
+
+    assert chain.calls == 1
+    assert first["summary"] == second["summary"] == repeat["summary"] == "cached"
+    assert first["transcript_length"] == len("Same   transcript")
+    assert repeat["transcript_length"] == len("Same transcript")
+
+
+class _StreamingChain:
+    def __init__(self, partials):
+        self.partials = partials
+
+    async def astream(self, inputs):
+        for partial in self.partials:
+            yield partial
+
+
+@pytest.mark.asyncio
+async def test_stream_summary_emits_deltas_then_result(monkeypatch) -> None:
+    chain = _StreamingChain(
+        [
+            {"summary": "The team"},
+            {"summary": "The team agreed."},
+            {"summary": "The team agreed.", "actions": [{"task": "Draft"}]},
+            {"summary": "The team agreed.", "actions": [{"task": "Draft"}, {"task": "Sh"}]},
+            {
+                "summary": "The team agreed.",
+                "actions": [{"task": "Draft"}, {"task": "Ship"}],
+                "topics": ["Roadmap"],
+            },
+        ]
+    )
+
+    monkeypatch.setattr(nlp_service, "get_settings", lambda: _FakeSettings)
+    monkeypatch.setattr(nlp_service, "_get_chain", lambda api_key, model_name: chain)
+
+    events = [event async for event in nlp_service.stream_summary("Streamed transcript")]
+
+    assert events[:-1] == [
+        ("summary", {"delta": "The team"}),
+        ("summary", {"delta": " agreed."}),
+        ("action", {"item": {"task": "Draft"}}),
+        ("action", {"item": {"task": "Ship"}}),
+        ("topic", {"item": "Roadmap"}),
+    ]
+    assert events[-1] == (
+        "result",
+        {
+            "summary": "The team agreed.",
+            "actions": [{"task": "Draft"}, {"task": "Ship"}],
+            "topics": ["Roadmap"],
+            "transcript_length": len("Streamed transcript"),
+        },
+    )
+
+    cached = [event async for event in nlp_service.stream_summary("Streamed transcript")]
+    assert cached == [events[-1]]
+
+
+@pytest.mark.asyncio
+async def test_streamed_items_match_the_normalised_result(monkeypatch) -> None:
+    chain = _StreamingChain(
+        [
+            {"summary": "s", "actions": ["call Ada", {"task": "Draft"}], "topics": [7, "Budget"]},
+            {
+                "summary": "s",
+                "actions": ["call Ada", {"task": "Draft"}, 3],
+                "topics": [7, "Budget", None],
+            },
+        ]
+    )
+
+    monkeypatch.setattr(nlp_service, "get_settings", lambda: _FakeSettings)
+    monkeypatch.setattr(nlp_service, "_get_chain", lambda api_key, model_name: chain)
+
+    events = [event async for event in nlp_service.stream_summary("Malformed transcript")]
+
+    result = events[-1][1]
+    assert [data["item"] for event, data in events if event == "action"] == result["actions"]
+    assert [data["item"] for event, data in events if event == "topic"] == result["topics"]
+    assert result["actions"] == [{"task": "Draft"}]
+    assert result["topics"] == ["Budget"]
+
+
+class _RateLimitError(Exception):
+    status_code = 429
+    response = None
+
+
+@pytest.mark.asyncio
+async def test_generate_summaries_retries_rate_limits_and_isolates_failures(monkeypatch) -> None:
+    attempts = {"busy": 0}
+
+    async def fake_generate_summary(transcript: str):
+        if not transcript.strip():
+            raise ValueError("Transcript is empty.")
+        if transcript == "busy" and attempts["busy"] == 0:
+            attempts["busy"] += 1
+            raise RuntimeError("OpenAI summarisation error.") from _RateLimitError()
+        return {"summary": transcript, "actions": [], "topics": [], "transcript_length": 4}
+
+    monkeypatch.setattr(nlp_service, "get_settings", lambda: _FakeSettings)
+    monkeypatch.setattr(nlp_service, "generate_summary", fake_generate_summary)
+    monkeypatch.setattr(nlp_service, "_count_tokens", lambda text, model_name: 10)
+
+    batch = await nlp_service.generate_summaries(["busy", " ", "fine"])
+
+    assert [item["index"] for item in batch["results"]] == [0, 1, 2]
+    assert batch["results"][0]["result"]["summary"] == "busy"
+    assert batch["results"][1]["error"] == "Transcript is empty."
+    assert batch["results"][2]["result"]["summary"] == "fine"
+    assert (batch["succeeded"], batch["failed"]) == (2, 1)
+    assert batch["tokens_per_second"] == pytest.approx(20 / batch["elapsed_seconds"])
+
+
+@pytest.mark.asyncio
+async def test_generate_summaries_rejects_oversized_batch(monkeypatch) -> None:
+    monkeypatch.setattr(nlp_service, "get_settings", lambda: _FakeSettings)
+
+    with pytest.raises(ValueError):
+        await nlp_service.generate_summaries(["t"] * 11)
+
+
 @pytest.mark.asyncio
 async def test_generate_summary_requires_api_key(monkeypatch) -> None:
     monkeypatch.setattr(nlp_service, "get_settings", lambda: _MissingKeySettings)
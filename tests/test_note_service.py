@@ -0,0 +1,189 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import pytest
+from bson import ObjectId
+
+from app.models.note_model import NoteUpdate
+from app.services import note_service
+
+
+class _FakeCursor:
+    def __init__(self, documents: List[Dict[str, Any]]) -> None:
+        self._documents = documents
+        self._limit = 0
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self._documents.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    async def to_list(self, length: int):
+        return self._documents[: min(length, self._limit)]
+
+
+class _FakeNotes:
+    def __init__(self, documents: List[Dict[str, Any]]) -> None:
+        self.documents = documents
+        self.queries: List[Dict[str, Any]] = []
+        self.projections: List[Dict[str, Any]] = []
+
+    def find(self, query: Dict[str, Any], projection: Dict[str, Any]):
+        self.queries.append(query)
+        self.projections.append(projection)
+        matches = [doc for doc in self.documents if _matches(doc, query)]
+        return _FakeCursor(
+            [{k: v for k, v in doc.items() if k not in projection} for doc in matches]
+        )
+
+
+def _matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    if document["user_id"] != query["user_id"]:
+        return False
+    if "$or" not in query:
+        return True
+    newer, tie = query["$or"]
+    if document["created_at"] < newer["created_at"]["$lt"]:
+        return True
+    return document["created_at"] == tie["created_at"] and document["_id"] < tie["_id"]["$lt"]
+
+
+def _note(created_at: datetime) -> Dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "user_id": "user",
+        "transcript": "long transcript",
+        "summary": "summary",
+        "actions": [],
+        "topics": [],
+        "mindmap": {"nodes": []},
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+@pytest.mark.asyncio
+async def test_list_notes_walks_pages_with_keyset_cursor(monkeypatch) -> None:
+    start = datetime(2024, 1, 1)
+    same_time = start + timedelta(hours=1)
+    documents = [
+        _note(start),
+        _note(same_time),
+        _note(same_time),
+        _note(start + timedelta(hours=2)),
+    ]
+    collection = _FakeNotes(documents)
+    monkeypatch.setattr(note_service, "_collection", lambda: collection)
+
+    seen: List[str] = []
+    cursor = None
+    while True:
+        page = await note_service.list_notes("user", limit=2, cursor=cursor)
+        seen.extend(note.id for note in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    expected = sorted(documents, key=lambda doc: (doc["created_at"], doc["_id"]), reverse=True)
+    assert seen == [str(doc["_id"]) for doc in expected]
+    assert {"transcript": 0, "mindmap": 0, "embedding": 0}.items() <= collection.projections[
+        0
+    ].items()
+    assert len(collection.queries) == 2
+
+
+@pytest.mark.asyncio
+async def test_list_notes_rejects_malformed_cursor() -> None:
+    with pytest.raises(ValueError):
+        await note_service.list_notes("user", cursor="not-a-cursor")
+
+
+class _FakeNoteStore:
+    def __init__(self, document: Dict[str, Any]) -> None:
+        self.document = document
+        self.builds = 0
+        self.graph_changes: List[Any] = []
+        self.embeddings: List[Any] = []
+
+    async def find_one(self, query: Dict[str, Any], projection: Dict[str, Any]):
+        if query["_id"] != self.document["_id"]:
+            return None
+        return {
+            key: self.document[key]
+            for key, keep in projection.items()
+            if keep and key in self.document
+        }
+
+    async def find_one_and_update(self, query: Dict[str, Any], update: Dict[str, Any], **_: Any):
+        self.document.update(update["$set"])
+        return dict(self.document)
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any]) -> None:
+        self.document.update(update["$set"])
+
+
+@pytest.fixture
+def note_store(monkeypatch) -> _FakeNoteStore:
+    store = _FakeNoteStore(
+        {
+            **_note(datetime(2024, 1, 1)),
+            "actions": [{"task": "Plan launch"}],
+            "topics": ["Launch"],
+            "mindmap": {},
+        }
+    )
+    original = note_service.mindmap_service.build_mindmap
+
+    def counting_build(actions, topics):
+        store.builds += 1
+        return original(actions, topics)
+
+    async def record_change(user_id, before, after):
+        store.graph_changes.append((before, after))
+
+    monkeypatch.setattr(note_service, "_collection", lambda: store)
+    monkeypatch.setattr(note_service.knowledge_graph_service, "record_change", record_change)
+    monkeypatch.setattr(
+        note_service.search_service,
+        "schedule_embedding",
+        lambda note_id, user_id: store.embeddings.append(note_id),
+    )
+    monkeypatch.setattr(note_service.mindmap_service, "build_mindmap", counting_build)
+    return store
+
+
+@pytest.mark.asyncio
+async def test_get_mindmap_backfills_once_then_reads_stored_map(note_store) -> None:
+    note_id = str(note_store.document["_id"])
+
+    first = await note_service.get_mindmap(note_id, "user")
+    second = await note_service.get_mindmap(note_id, "user")
+
+    assert first == second
+    assert note_store.builds == 1
+    assert note_store.document["mindmap"] == first
+
+
+@pytest.mark.asyncio
+async def test_update_note_rebuilds_mindmap_only_when_actions_or_topics_change(note_store) -> None:
+    note_id = str(note_store.document["_id"])
+
+    await note_service.update_note(note_id, NoteUpdate(summary="new"), "user")
+    await note_service.update_note(note_id, NoteUpdate(topics=["Launch"]), "user")
+    assert note_store.builds == 0
+    assert note_store.graph_changes == []
+    assert len(note_store.embeddings) == 2
+
+    updated = await note_service.update_note(
+        note_id, NoteUpdate(topics=["Launch", "Hiring"]), "user"
+    )
+
+    assert note_store.builds == 1
+    assert any(node["label"] == "Hiring" for node in updated.mindmap["nodes"])
+    ((before, after),) = note_store.graph_changes
+    assert before["topics"] == ["Launch"]
+    assert after["topics"] == ["Launch", "Hiring"]
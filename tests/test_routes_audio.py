@@ -1,5 +1,8 @@
+from pathlib import Path
+
 from fastapi.testclient import TestClient
 
+from app.config import Settings
 from app.main import app
 from app.routes import audio as audio_route
 from app.services.whisper_service import TranscriptionResult
@@ -8,8 +11,17 @@ client = TestClient(app)
 
 
 def test_upload_audio_returns_transcript(monkeypatch) -> None:
-    async def fake_transcribe(data: bytes, language: str | None = None) -> TranscriptionResult:
-        assert data == b"data"
+    captured = {}
+
+    async def fake_transcribe(
+        path: str,
+        language: str | None = None,
+        audio_sha256: str | None = None,
+        tier: str | None = None,
+    ) -> TranscriptionResult:
+        captured["path"] = path
+        assert Path(path).read_bytes() == b"data"
+        assert path.endswith(".wav")
         assert language == "en"
         return TranscriptionResult(text="hello", language="en", raw={})
 
@@ -23,10 +35,65 @@ def test_upload_audio_returns_transcript(monkeypatch) -> None:
 
     assert response.status_code == 200
     assert response.json() == {"transcript": "hello", "language": "en"}
+    assert not Path(captured["path"]).exists()
+
+
+def test_upload_audio_streams_in_chunks(monkeypatch) -> None:
+    payload = bytes(range(256)) * 64
+
+    async def fake_transcribe(
+        path: str,
+        language: str | None = None,
+        audio_sha256: str | None = None,
+        tier: str | None = None,
+    ) -> TranscriptionResult:
+        assert Path(path).read_bytes() == payload
+        return TranscriptionResult(text="ok", language=None, raw={})
+
+    monkeypatch.setattr(audio_route, "get_settings", lambda: Settings(upload_chunk_size=1000))
+    monkeypatch.setattr(audio_route, "transcribe_audio", fake_transcribe)
+
+    response = client.post(
+        "/api/upload-audio",
+        files={"file": ("sample.mp3", payload, "audio/mpeg")},
+    )
+
+    assert response.status_code == 200
+
+
+def test_upload_audio_rejects_oversized_file(monkeypatch) -> None:
+    async def fake_transcribe(
+        path: str,
+        language: str | None = None,
+        audio_sha256: str | None = None,
+        tier: str | None = None,
+    ):
+        raise AssertionError("transcription should not run")
+
+    monkeypatch.setattr(audio_route, "get_settings", lambda: Settings(max_upload_bytes=4))
+    monkeypatch.setattr(audio_route, "transcribe_audio", fake_transcribe)
+
+    response = client.post(
+        "/api/upload-audio",
+        files={"file": ("sample.wav", b"too large", "audio/wav")},
+    )
+
+    assert response.status_code == 413
+
+
+def test_upload_audio_requires_file_field() -> None:
+    response = client.post("/api/upload-audio", data={"other": "value"})
+
+    assert response.status_code == 400
 
 
 def test_upload_audio_handles_client_error(monkeypatch) -> None:
-    async def fake_transcribe(data: bytes, language: str | None = None):
+    async def fake_transcribe(
+        path: str,
+        language: str | None = None,
+        audio_sha256: str | None = None,
+        tier: str | None = None,
+    ):
         raise ValueError("bad audio")
 
     monkeypatch.setattr(audio_route, "transcribe_audio", fake_transcribe)
@@ -41,7 +108,12 @@ def test_upload_audio_handles_client_error(monkeypatch) -> None:
 
 
 def test_upload_audio_handles_server_error(monkeypatch) -> None:
-    async def fake_transcribe(data: bytes, language: str | None = None):
+    async def fake_transcribe(
+        path: str,
+        language: str | None = None,
+        audio_sha256: str | None = None,
+        tier: str | None = None,
+    ):
         raise RuntimeError("failure")
 
     monkeypatch.setattr(audio_route, "transcribe_audio", fake_transcribe)
@@ -53,3 +125,32 @@ def test_upload_audio_handles_server_error(monkeypatch) -> None:
 
     assert response.status_code == 500
     assert response.json()["detail"] == "failure"
+
+
+def test_upload_audio_passes_quality_tier(monkeypatch) -> None:
+    async def fake_transcribe(
+        path: str,
+        language: str | None = None,
+        audio_sha256: str | None = None,
+        tier: str | None = None,
+    ) -> TranscriptionResult:
+        assert tier == "fast"
+        return TranscriptionResult(text="memo", language="en", raw={}, model="tiny")
+
+    monkeypatch.setattr(audio_route, "transcribe_audio", fake_transcribe)
+
+    response = client.post(
+        "/api/upload-audio",
+        files={"file": ("memo.wav", b"data", "audio/wav")},
+        params={"tier": "fast"},
+    )
+    assert response.status_code == 200
+    assert response.headers["X-Whisper-Model"] == "tiny"
+    assert "X-Peak-RSS-Bytes" not in response.headers
+
+    response = client.post(
+        "/api/upload-audio",
+        files={"file": ("memo.wav", b"data", "audio/wav")},
+        params={"tier": "best"},
+    )
+    assert response.status_code == 422
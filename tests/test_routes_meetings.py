@@ -0,0 +1,91 @@
+from datetime import UTC, datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.note_model import NoteRead
+from app.services import auth_service, meeting_service
+from app.services.whisper_service import TranscriptionResult
+
+client = TestClient(app)
+AUTH_HEADER = {"Authorization": "Bearer testtoken"}
+
+
+async def _stub_get_user_from_token(token: str):
+    return SimpleNamespace(id="user")
+
+
+def _patch_pipeline(monkeypatch, captured):
+    async def fake_transcribe(path, language=None, audio_sha256=None, tier=None):
+        captured["path"] = path
+        assert Path(path).read_bytes() == b"audio"
+        return TranscriptionResult(text="We agreed to ship the launch plan.", language="en", raw={})
+
+    async def fake_generate_summary(transcript: str):
+        captured["transcript"] = transcript
+        assert not Path(captured["path"]).exists()
+        return {
+            "summary": "Launch agreed",
+            "actions": [{"task": "Ship launch plan"}],
+            "topics": ["Launch"],
+            "transcript_length": len(transcript),
+        }
+
+    async def fake_create_note(note, user_id: str):
+        captured["note"] = note
+        now = datetime.now(UTC)
+        return NoteRead(
+            id="n1", user_id=user_id, created_at=now, updated_at=now, **note.model_dump()
+        )
+
+    monkeypatch.setattr(auth_service, "get_user_from_token", _stub_get_user_from_token)
+    monkeypatch.setattr(meeting_service.whisper_service, "transcribe_audio", fake_transcribe)
+    monkeypatch.setattr(meeting_service.nlp_service, "generate_summary", fake_generate_summary)
+    monkeypatch.setattr(meeting_service.note_service, "create_note", fake_create_note)
+
+
+def test_meeting_pipeline_saves_note_with_timings(monkeypatch) -> None:
+    captured = {}
+    _patch_pipeline(monkeypatch, captured)
+
+    response = client.post(
+        "/api/meetings",
+        files={"file": ("meeting.wav", b"audio", "audio/wav")},
+        headers=AUTH_HEADER,
+    )
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["note"]["id"] == "n1"
+    assert body["note"]["transcript"] == captured["transcript"]
+    assert body["language"] == "en"
+    assert set(body["timings"]) == {"upload", "transcribe", "summarise", "mindmap", "save", "total"}
+    assert "transcribe;dur=" in response.headers["Server-Timing"]
+    assert any(node["label"] == "Ship launch plan" for node in captured["note"].mindmap["nodes"])
+
+
+def test_meeting_pipeline_maps_summary_failure_to_bad_gateway(monkeypatch) -> None:
+    captured = {}
+    _patch_pipeline(monkeypatch, captured)
+
+    async def failing_summary(transcript: str):
+        raise RuntimeError("Failed to generate summary.")
+
+    monkeypatch.setattr(meeting_service.nlp_service, "generate_summary", failing_summary)
+
+    response = client.post(
+        "/api/meetings",
+        files={"file": ("meeting.wav", b"audio", "audio/wav")},
+        headers=AUTH_HEADER,
+    )
+
+    assert response.status_code == 502
+    assert not Path(captured["path"]).exists()
+
+
+def test_meeting_pipeline_requires_auth() -> None:
+    response = client.post("/api/meetings", files={"file": ("meeting.wav", b"audio", "audio/wav")})
+
+    assert response.status_code == 401
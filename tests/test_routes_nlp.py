@@ -1,12 +1,11 @@
-from datetime import UTC, datetime
 from types import SimpleNamespace
 
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.models.note_model import NoteRead
 from app.routes import nlp as nlp_route
 from app.services import auth_service
+from app.services.mindmap_service import build_mindmap
 
 client = TestClient(app)
 AUTH_HEADER = {"Authorization": "Bearer testtoken"}
@@ -46,31 +45,87 @@ def test_summarise_endpoint_handles_errors(monkeypatch) -> None:
     assert response.json()["detail"] == "bad data"
 
 
+def test_summarise_batch_endpoint_reports_items_and_throughput(monkeypatch) -> None:
+    async def fake_generate_summaries(transcripts, *, concurrency=None):
+        assert transcripts == ["one", ""]
+        assert concurrency == 2
+        return {
+            "results": [
+                {
+                    "index": 0,
+                    "result": {"summary": "1", "actions": [], "topics": [], "transcript_length": 3},
+                    "error": None,
+                },
+                {"index": 1, "result": None, "error": "Transcript is empty."},
+            ],
+            "succeeded": 1,
+            "failed": 1,
+            "elapsed_seconds": 0.5,
+            "items_per_second": 2.0,
+            "tokens_per_second": 4.0,
+        }
+
+    monkeypatch.setattr(nlp_route, "generate_summaries", fake_generate_summaries)
+    monkeypatch.setattr(auth_service, "get_user_from_token", _stub_get_user_from_token)
+
+    response = client.post(
+        "/api/summarise/batch",
+        json={"transcripts": ["one", ""], "concurrency": 2},
+        headers=AUTH_HEADER,
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["results"][0]["result"]["summary"] == "1"
+    assert body["results"][1]["error"] == "Transcript is empty."
+    assert body["items_per_second"] == 2.0
+
+
+def test_summarise_stream_endpoint_emits_events(monkeypatch) -> None:
+    async def fake_stream_summary(transcript: str):
+        yield "summary", {"delta": "Hi"}
+        yield "result", {"summary": "Hi", "actions": [], "topics": [], "transcript_length": 5}
+
+    monkeypatch.setattr(nlp_route, "stream_summary", fake_stream_summary)
+    monkeypatch.setattr(auth_service, "get_user_from_token", _stub_get_user_from_token)
+
+    response = client.post(
+        "/api/summarise/stream", json={"transcript": "hello"}, headers=AUTH_HEADER
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith('event: summary\ndata: {"delta": "Hi"}\n\n')
+    assert "event: result\n" in response.text
+
+
+def test_summarise_stream_endpoint_validates_before_streaming(monkeypatch) -> None:
+    async def fake_stream_summary(transcript: str):
+        raise ValueError("Transcript is empty.")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(nlp_route, "stream_summary", fake_stream_summary)
+    monkeypatch.setattr(auth_service, "get_user_from_token", _stub_get_user_from_token)
+
+    response = client.post("/api/summarise/stream", json={"transcript": " "}, headers=AUTH_HEADER)
+
+    assert response.status_code == 400
+
+
 async def _stub_get_user_from_token(token: str):
     assert token == "testtoken"
     return SimpleNamespace(id="user", email="user@example.com")
 
 
 def test_mindmap_endpoint_returns_graph(monkeypatch) -> None:
-    now = datetime.now(UTC)
-    note = NoteRead(
-        id="123",
-        user_id="user",
-        transcript="",
-        summary="",
-        actions=[{"task": "Task"}],
-        topics=["Topic"],
-        mindmap={},
-        created_at=now,
-        updated_at=now,
-    )
+    mindmap = build_mindmap([{"task": "Task"}], ["Topic"])
 
-    async def fake_get_note(note_id: str, user_id: str):
+    async def fake_get_mindmap(note_id: str, user_id: str):
         assert note_id == "123"
         assert user_id == "user"
-        return note
+        return mindmap
 
-    monkeypatch.setattr(nlp_route.note_service, "get_note", fake_get_note)
+    monkeypatch.setattr(nlp_route.note_service, "get_mindmap", fake_get_mindmap)
     monkeypatch.setattr(auth_service, "get_user_from_token", _stub_get_user_from_token)
 
     response = client.get("/api/mindmap/123", headers=AUTH_HEADER)
@@ -81,11 +136,25 @@ def test_mindmap_endpoint_returns_graph(monkeypatch) -> None:
     assert any(node["label"] == "Task" for node in data["nodes"])
 
 
+def test_user_mindmap_endpoint_returns_graph(monkeypatch) -> None:
+    async def fake_get_user_graph(user_id: str, *, max_topics: int):
+        assert (user_id, max_topics) == ("user", 5)
+        return {"nodes": [{"id": "budget"}], "links": []}
+
+    monkeypatch.setattr(nlp_route.knowledge_graph_service, "get_user_graph", fake_get_user_graph)
+    monkeypatch.setattr(auth_service, "get_user_from_token", _stub_get_user_from_token)
+
+    response = client.get("/api/mindmap", params={"max_topics": 5}, headers=AUTH_HEADER)
+
+    assert response.status_code == 200
+    assert response.json()["nodes"] == [{"id": "budget"}]
+
+
 def test_mindmap_endpoint_handles_missing_note(monkeypatch) -> None:
-    async def fake_get_note(_: str, __: str):
+    async def fake_get_mindmap(_: str, __: str):
         return None
 
-    monkeypatch.setattr(nlp_route.note_service, "get_note", fake_get_note)
+    monkeypatch.setattr(nlp_route.note_service, "get_mindmap", fake_get_mindmap)
     monkeypatch.setattr(auth_service, "get_user_from_token", _stub_get_user_from_token)
 
     response = client.get("/api/mindmap/unknown", headers=AUTH_HEADER)
@@ -4,9 +4,9 @@ from types import SimpleNamespace
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.models.note_model import NoteRead
+from app.models.note_model import NotePage, NoteRead, NoteSearchHit, NoteSummary
 from app.routes import notes as notes_route
-from app.services import auth_service
+from app.services import auth_service, search_service
 
 client = TestClient(app)
 AUTH_HEADER = {"Authorization": "Bearer testtoken"}
@@ -23,9 +23,9 @@ def test_list_notes_requires_auth() -> None:
 
 
 def test_list_notes_returns_payload(monkeypatch) -> None:
-    async def fake_list_notes(user_id: str):
+    async def fake_list_notes(user_id: str, *, limit: int, cursor: str | None):
         assert user_id == "user"
-        return []
+        return NotePage(items=[])
 
     monkeypatch.setattr(notes_route.note_service, "list_notes", fake_list_notes)
     monkeypatch.setattr(auth_service, "get_user_from_token", _stub_get_user_from_token)
@@ -36,6 +36,49 @@ def test_list_notes_returns_payload(monkeypatch) -> None:
     assert response.json() == []
 
 
+def test_list_notes_pages_with_cursor(monkeypatch) -> None:
+    now = datetime.now(UTC)
+    summary = NoteSummary(id="2", user_id="user", summary="s", created_at=now, updated_at=now)
+
+    async def fake_list_notes(user_id: str, *, limit: int, cursor: str | None):
+        assert (limit, cursor) == (1, "abc")
+        return NotePage(items=[summary], next_cursor="def")
+
+    monkeypatch.setattr(notes_route.note_service, "list_notes", fake_list_notes)
+    monkeypatch.setattr(auth_service, "get_user_from_token", _stub_get_user_from_token)
+
+    response = client.get("/api/notes", params={"limit": 1, "cursor": "abc"}, headers=AUTH_HEADER)
+
+    assert response.status_code == 200
+    assert response.headers["X-Next-Cursor"] == "def"
+    body = response.json()
+    assert [note["id"] for note in body] == ["2"]
+    assert "transcript" not in body[0]
+
+
+def test_search_notes_passes_mode_and_limit(monkeypatch) -> None:
+    now = datetime.now(UTC)
+    hit = NoteSearchHit(
+        id="1", user_id="user", summary="s", created_at=now, updated_at=now, score=0.9
+    )
+
+    async def fake_search_notes(user_id: str, query: str, *, mode: str, limit: int):
+        assert (user_id, query, mode, limit) == ("user", "budget", "semantic", 5)
+        return [hit]
+
+    monkeypatch.setattr(search_service, "search_notes", fake_search_notes)
+    monkeypatch.setattr(auth_service, "get_user_from_token", _stub_get_user_from_token)
+
+    response = client.get(
+        "/api/notes/search",
+        params={"q": "budget", "mode": "semantic", "limit": 5},
+        headers=AUTH_HEADER,
+    )
+
+    assert response.status_code == 200
+    assert response.json()[0]["score"] == 0.9
+
+
 def test_create_note_injects_user(monkeypatch) -> None:
     now = datetime.now(UTC)
     note = NoteRead(
@@ -0,0 +1,138 @@
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+from bson import ObjectId
+
+from app.database import indexes
+from app.services import embedding_service, search_service
+
+
+def _note(summary: str, topics: List[str]) -> Dict[str, Any]:
+    now = datetime(2024, 1, 1)
+    return {
+        "_id": ObjectId(),
+        "user_id": "user",
+        "transcript": "",
+        "summary": summary,
+        "actions": [],
+        "topics": topics,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+class _FakeCursor:
+    def __init__(self, documents: List[Dict[str, Any]]) -> None:
+        self.documents = documents
+
+    async def to_list(self, length):
+        return self.documents
+
+
+class _FakeNotes:
+    def __init__(self, documents: List[Dict[str, Any]]) -> None:
+        self.documents = documents
+
+    def _matches(self, document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+        for key, expected in query.items():
+            if isinstance(expected, dict) and "$in" in expected:
+                if document.get(key) not in expected["$in"]:
+                    return False
+            elif document.get(key) != expected:
+                return False
+        return True
+
+    def find(self, query: Dict[str, Any], projection: Dict[str, Any]):
+        return _FakeCursor([dict(doc) for doc in self.documents if self._matches(doc, query)])
+
+    async def find_one(self, query: Dict[str, Any], projection: Dict[str, Any]):
+        return next((dict(doc) for doc in self.documents if self._matches(doc, query)), None)
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any]) -> None:
+        for document in self.documents:
+            if self._matches(document, query):
+                document.update(update["$set"])
+
+
+@pytest.fixture
+def notes(monkeypatch) -> _FakeNotes:
+    store = _FakeNotes(
+        [
+            _note("Agreed the marketing budget for the spring campaign", ["Marketing budget"]),
+            _note("Reviewed backend hiring pipeline and interview loop", ["Hiring"]),
+            _note("Database migration plan and rollback steps", ["Infrastructure"]),
+        ]
+    )
+    monkeypatch.setattr(search_service, "_collection", lambda: store)
+    search_service._get_vector_indexes().clear()
+    return store
+
+
+def test_hashing_embedder_is_deterministic_and_normalised() -> None:
+    embedder = embedding_service.HashingEmbedder(64)
+
+    first, second = embedder.embed(["Quarterly budget review", "Quarterly budget review"])
+
+    assert first.dtype == np.float32
+    assert np.allclose(first, second)
+    assert np.isclose(np.linalg.norm(first), 1.0)
+
+
+def test_vectors_round_trip_as_float32_bytes() -> None:
+    vector = embedding_service.HashingEmbedder(32).embed(["hello world"])[0]
+
+    encoded = embedding_service.encode_vector(vector)
+
+    assert len(encoded) == 32 * 4
+    assert np.array_equal(embedding_service.decode_vector(encoded), vector)
+
+
+@pytest.mark.asyncio
+async def test_semantic_search_ranks_embedded_notes(notes) -> None:
+    for document in notes.documents:
+        search_service.schedule_embedding(document["_id"], "user")
+    await search_service.drain_pending()
+
+    hits = await search_service.search_notes(
+        "user", "hiring and interviews", mode="semantic", limit=2
+    )
+
+    assert len(hits) == 2
+    assert hits[0].summary.startswith("Reviewed backend hiring")
+    assert hits[0].score >= hits[1].score
+
+
+@pytest.mark.asyncio
+async def test_embedding_is_dropped_when_note_changed_meanwhile(notes, monkeypatch) -> None:
+    document = notes.documents[0]
+    original = embedding_service.embedding_fields
+
+    def slow_embedding_fields(note, embedder):
+        document["updated_at"] = datetime(2024, 1, 2)
+        return original(note, embedder)
+
+    monkeypatch.setattr(embedding_service, "embedding_fields", slow_embedding_fields)
+    search_service.schedule_embedding(document["_id"], "user")
+    await search_service.drain_pending()
+
+    assert "embedding" not in document
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_blank_query() -> None:
+    with pytest.raises(ValueError):
+        await search_service.search_notes("user", "   ")
+
+
+def test_text_index_key_matches_mongodb_report() -> None:
+    (model,) = [
+        model
+        for model in indexes.declared_indexes()["notes"]
+        if model.document["name"] == "notes_text"
+    ]
+
+    assert indexes.keys_match(model.document["key"], {"user_id": 1, "_fts": "text", "_ftsx": 1})
+    # A text index created before the user_id prefix is not mistaken for the declared one.
+    assert not indexes.keys_match(model.document["key"], {"_fts": "text", "_ftsx": 1})
@@ -1,21 +1,60 @@
-﻿import pytest
+﻿import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
-from app.config import get_settings
-from app.services import whisper_service
+import numpy as np
+import pytest
+
+from app.config import Settings, get_settings
+from app.services import transcription_cache, whisper_service
+from app.utils.audio import SAMPLE_RATE, AudioWindow, DecodedAudio
+
+
+@pytest.fixture(autouse=True)
+def _empty_transcription_cache():
+    transcription_cache.clear_memory()
+    yield
+    transcription_cache.clear_memory()
+
+
+def _decoded(samples: np.ndarray, start: int = 0) -> DecodedAudio:
+    return DecodedAudio(
+        format="wav", total=len(samples), start=start, end=len(samples), buffer=samples
+    )
+
+
+@pytest.fixture(autouse=True)
+def decoded_upload(monkeypatch) -> np.ndarray:
+    samples = np.full(SAMPLE_RATE, 0.1, dtype=np.float32)
+    monkeypatch.setattr(whisper_service, "decode_audio", lambda path, **_: _decoded(samples))
+    return samples
 
 
 @pytest.mark.asyncio
-async def test_transcribe_audio_requires_non_empty_bytes() -> None:
+async def test_transcribe_audio_requires_non_empty_file(tmp_path) -> None:
+    audio_path = tmp_path / "empty.wav"
+    audio_path.write_bytes(b"")
+
     with pytest.raises(ValueError):
-        await whisper_service.transcribe_audio(b"")
+        await whisper_service.transcribe_audio(str(audio_path))
 
 
 @pytest.mark.asyncio
-async def test_transcribe_audio_uses_sync_transcriber(monkeypatch) -> None:
+async def test_transcribe_audio_requires_existing_file(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        await whisper_service.transcribe_audio(str(tmp_path / "missing.wav"))
+
+
+@pytest.mark.asyncio
+async def test_transcribe_audio_uses_sync_transcriber(
+    monkeypatch, tmp_path, decoded_upload
+) -> None:
     captured = {}
+    audio_path = tmp_path / "clip.wav"
+    audio_path.write_bytes(b"audio-bytes")
 
-    def fake_transcribe(file_bytes: bytes, language: str | None, model_name: str):
-        captured["args"] = (file_bytes, language, model_name)
+    def fake_transcribe(audio: np.ndarray, language: str | None, model_name: str):
+        captured["args"] = (audio, language, model_name)
         return whisper_service.TranscriptionResult(
             text="Fake transcript",
             language=language or "en",
@@ -24,7 +63,165 @@ async def test_transcribe_audio_uses_sync_transcriber(monkeypatch) -> None:
 
     monkeypatch.setattr(whisper_service, "_transcribe_sync", fake_transcribe)
 
-    result = await whisper_service.transcribe_audio(b"audio-bytes", language="en")
+    result = await whisper_service.transcribe_audio(str(audio_path), language="en")
 
     assert result.text == "Fake transcript"
-    assert captured["args"] == (b"audio-bytes", "en", get_settings().whisper_model_size)
+    audio, language, model_name = captured["args"]
+    assert np.array_equal(audio, decoded_upload)
+    assert (language, model_name) == ("en", get_settings().whisper_model_size)
+
+
+@pytest.mark.asyncio
+async def test_transcribe_audio_dispatches_to_process_backend(monkeypatch, tmp_path) -> None:
+    audio_path = tmp_path / "clip.wav"
+    audio_path.write_bytes(b"audio-bytes")
+    executor = ThreadPoolExecutor(max_workers=1)
+    calls = []
+
+    def fake_transcribe(path: str, language: str | None, model_name: str):
+        calls.append(model_name)
+        return whisper_service.TranscriptionResult(text="ok", language=language, raw={})
+
+    settings = Settings(whisper_backend="process", whisper_model_size="tiny")
+    monkeypatch.setattr(whisper_service, "get_settings", lambda: settings)
+    monkeypatch.setattr(whisper_service, "_get_process_pool", lambda _: executor)
+    monkeypatch.setattr(whisper_service, "_transcribe_sync", fake_transcribe)
+
+    try:
+        result = await whisper_service.transcribe_audio(str(audio_path), language="en")
+    finally:
+        executor.shutdown()
+
+    assert result.text == "ok"
+    assert calls == ["tiny"]
+
+
+@pytest.mark.asyncio
+async def test_segmented_transcription_stitches_windows(monkeypatch, tmp_path) -> None:
+    audio_path = tmp_path / "meeting.wav"
+    audio_path.write_bytes(b"audio-bytes")
+    samples = np.zeros(25 * SAMPLE_RATE, dtype=np.float32)
+    windows = [
+        AudioWindow(start=0, cut=10 * SAMPLE_RATE, end=11 * SAMPLE_RATE),
+        AudioWindow(start=10 * SAMPLE_RATE, cut=25 * SAMPLE_RATE, end=25 * SAMPLE_RATE),
+    ]
+    outputs = {
+        0: {
+            "language": "en",
+            "segments": [
+                {"start": 0.0, "end": 4.0, "text": " Hello everyone."},
+                {"start": 8.0, "end": 10.5, "text": " Next item."},
+                {"start": 10.2, "end": 11.0, "text": " Budget"},
+            ],
+        },
+        10
+        * SAMPLE_RATE: {
+            "language": "en",
+            "segments": [
+                {"start": 0.0, "end": 0.4, "text": " item."},
+                {"start": 0.5, "end": 3.0, "text": " Budget review."},
+            ],
+        },
+    }
+
+    in_flight, peak = Counter(), []
+
+    def fake_window(chunk: np.ndarray, language: str | None, model_name: str):
+        in_flight["windows"] += 1
+        peak.append(in_flight["windows"])
+        time.sleep(0.01)
+        in_flight["windows"] -= 1
+        offset = next(w.start for w in windows if w.end - w.start == len(chunk))
+        return outputs[offset], 0.25
+
+    settings = Settings(whisper_segmenting=True)
+    monkeypatch.setattr(whisper_service, "get_settings", lambda: settings)
+    monkeypatch.setattr(whisper_service, "decode_audio", lambda path, **_: _decoded(samples))
+    monkeypatch.setattr(whisper_service, "plan_windows", lambda *_, **__: windows)
+    monkeypatch.setattr(whisper_service, "_transcribe_window_sync", fake_window)
+
+    result = await whisper_service.transcribe_audio(str(audio_path))
+
+    assert result.text == "Hello everyone. Next item. Budget review."
+    assert result.language == "en"
+    assert [segment["start"] for segment in result.raw["segments"]] == [0.0, 8.0, 10.5]
+    assert [(timing.start, timing.end) for timing in result.windows] == [(0.0, 11.0), (10.0, 25.0)]
+    assert all(timing.seconds == 0.25 for timing in result.windows)
+    # The thread backend decodes one window at a time, so only one thread waits per upload.
+    assert max(peak) == 1
+
+
+@pytest.mark.asyncio
+async def test_repeat_upload_is_served_from_cache(monkeypatch, tmp_path, decoded_upload) -> None:
+    first = tmp_path / "first.wav"
+    retry = tmp_path / "retry.wav"
+    first.write_bytes(b"same recording")
+    retry.write_bytes(b"same recording")
+    calls = []
+
+    def fake_decode(path: str, **_) -> DecodedAudio:
+        calls.append(path)
+        return _decoded(decoded_upload)
+
+    def fake_transcribe(audio: np.ndarray, language: str | None, model_name: str):
+        return whisper_service.TranscriptionResult(text="Cached", language="en", raw={})
+
+    monkeypatch.setattr(whisper_service, "get_settings", lambda: Settings(mongo_uri=None))
+    monkeypatch.setattr(whisper_service, "decode_audio", fake_decode)
+    monkeypatch.setattr(whisper_service, "_transcribe_sync", fake_transcribe)
+
+    await whisper_service.transcribe_audio(str(first), language="en")
+    repeated = await whisper_service.transcribe_audio(str(retry), language="en")
+    other_language = await whisper_service.transcribe_audio(str(retry), language="fr")
+
+    assert repeated.text == "Cached"
+    assert calls == [str(first), str(retry)]
+    assert other_language.text == "Cached"
+
+
+@pytest.mark.asyncio
+async def test_trimmed_silence_is_added_back_to_timestamps(monkeypatch, tmp_path) -> None:
+    audio_path = tmp_path / "memo.wav"
+    audio_path.write_bytes(b"audio-bytes")
+    samples = np.full(5 * SAMPLE_RATE, 0.1, dtype=np.float32)
+    lengths = []
+
+    def fake_transcribe(audio: np.ndarray, language: str | None, model_name: str):
+        lengths.append(len(audio))
+        segment = {"id": 0, "start": 0.5, "end": 1.5, "text": " Hi."}
+        return whisper_service.TranscriptionResult(
+            text="Hi.", language="en", raw={"text": " Hi.", "segments": [segment]}
+        )
+
+    monkeypatch.setattr(
+        whisper_service, "decode_audio", lambda path, **_: _decoded(samples, 2 * SAMPLE_RATE)
+    )
+    monkeypatch.setattr(whisper_service, "_transcribe_sync", fake_transcribe)
+
+    result = await whisper_service.transcribe_audio(str(audio_path))
+
+    assert lengths == [3 * SAMPLE_RATE]
+    assert [(s["start"], s["end"]) for s in result.raw["segments"]] == [(2.5, 3.5)]
+
+
+@pytest.mark.asyncio
+async def test_quiet_upload_is_transcribed_untrimmed(monkeypatch, tmp_path) -> None:
+    audio_path = tmp_path / "far-field.wav"
+    audio_path.write_bytes(b"audio-bytes")
+    # Nothing reaches the silence threshold, so trimming left no samples.
+    quiet = np.full(2 * SAMPLE_RATE, 0.001, dtype=np.float32)
+    trimmed = DecodedAudio(format="wav", total=len(quiet), start=0, end=0, buffer=quiet)
+    heard = []
+
+    def fake_transcribe(audio, language, model_name):
+        heard.append(len(audio))
+        return whisper_service.TranscriptionResult(text="Hello?", language=language, raw={})
+
+    monkeypatch.setattr(whisper_service, "decode_audio", lambda path, **_: trimmed)
+    monkeypatch.setattr(whisper_service, "_transcribe_sync", fake_transcribe)
+
+    result = await whisper_service.transcribe_audio(str(audio_path), language="en")
+
+    assert heard == [len(quiet)]
+    assert result.text == "Hello?"
+    assert result.language == "en"
@@ -0,0 +1,227 @@
+from datetime import datetime
+from typing import Any, Dict
+
+import pytest
+from bson import ObjectId
+
+from app.database import migrate_transcripts
+from app.models.note_model import NoteCreate, NoteUpdate
+from app.services import note_service, transcript_service
+
+
+class _UpdateResult:
+    def __init__(self, modified_count: int) -> None:
+        self.modified_count = modified_count
+
+
+def _project(document: Dict[str, Any], projection: Dict[str, int]) -> Dict[str, Any]:
+    if any(projection.values()):
+        return {
+            key: value for key, value in document.items() if projection.get(key) or key == "_id"
+        }
+    return {key: value for key, value in document.items() if key not in projection}
+
+
+def _matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    return all(
+        (
+            (key in document) == value["$exists"]
+            if isinstance(value, dict)
+            else document.get(key) == value
+        )
+        for key, value in query.items()
+    )
+
+
+class _FakeCollection:
+    def __init__(self) -> None:
+        self.documents: Dict[ObjectId, Dict[str, Any]] = {}
+        self.reads = 0
+        self.writes = 0
+
+    async def insert_one(self, document: Dict[str, Any]) -> None:
+        self.writes += 1
+        self.documents[document["_id"]] = dict(document)
+
+    async def find_one(self, query: Dict[str, Any], projection: Dict[str, int]):
+        self.reads += 1
+        document = self.documents.get(query["_id"])
+        if document is None or not _matches(document, query):
+            return None
+        return _project(document, projection)
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert=False):
+        self.writes += 1
+        document = self.documents.get(query["_id"])
+        if document is None or not _matches(document, query):
+            if not upsert:
+                return _UpdateResult(0)
+            document = self.documents[query["_id"]] = {"_id": query["_id"]}
+            document.update(update.get("$setOnInsert", {}))
+        document.update(update.get("$set", {}))
+        for key in update.get("$unset", {}):
+            document.pop(key, None)
+        return _UpdateResult(1)
+
+    async def find_one_and_update(self, query, update, *, projection, return_document):
+        result = await self.update_one(query, update)
+        if not result.modified_count:
+            return None
+        return _project(self.documents[query["_id"]], projection)
+
+    async def delete_one(self, query: Dict[str, Any]) -> None:
+        self.documents.pop(query["_id"], None)
+
+
+@pytest.fixture
+def stores(monkeypatch):
+    notes, transcripts = _FakeCollection(), _FakeCollection()
+
+    async def record_change(user_id, before, after) -> None:
+        return None
+
+    monkeypatch.setattr(note_service, "_collection", lambda: notes)
+    monkeypatch.setattr(transcript_service, "_collection", lambda: transcripts)
+    monkeypatch.setattr(note_service.knowledge_graph_service, "record_change", record_change)
+    monkeypatch.setattr(
+        note_service.search_service, "schedule_embedding", lambda note_id, user_id: None
+    )
+    return notes, transcripts
+
+
+def test_compression_round_trips_and_shrinks_repetitive_text() -> None:
+    transcript = "Let's review the launch plan. " * 500
+
+    data = transcript_service.compress(transcript)
+
+    assert transcript_service.decompress(data) == transcript
+    assert len(data) < len(transcript) / 10
+    fields = transcript_service.note_fields(transcript)
+    assert len(fields["transcript_excerpt"]) == transcript_service.EXCERPT_CHARS
+    assert fields["transcript_length"] == len(transcript)
+
+
+def test_search_terms_cover_words_past_the_excerpt() -> None:
+    transcript = "Opening remarks. " + "filler " * 2000 + "Budget approved for Lagos."
+
+    fields = transcript_service.note_fields(transcript)
+
+    assert "Lagos" not in fields["transcript_excerpt"]
+    assert fields["transcript_terms"] == [
+        "opening",
+        "remarks",
+        "filler",
+        "budget",
+        "approved",
+        "for",
+        "lagos",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_migration_adds_terms_to_split_notes(stores, monkeypatch) -> None:
+    notes, transcripts = stores
+    monkeypatch.setattr(migrate_transcripts, "get_database", lambda: {"notes": notes})
+    note_id = ObjectId()
+    notes.documents[note_id] = {"_id": note_id, "user_id": "user", "transcript_length": 12}
+    await transcript_service.save(note_id, "user", "Quarterly plan")
+
+    assert await migrate_transcripts.add_terms(note_id, "user")
+    assert notes.documents[note_id]["transcript_terms"] == ["quarterly", "plan"]
+    assert not await migrate_transcripts.add_terms(note_id, "user")
+
+
+@pytest.mark.asyncio
+async def test_note_keeps_only_an_excerpt_and_loads_the_transcript_lazily(stores) -> None:
+    notes, transcripts = stores
+    transcript = "word " * 2000
+
+    created = await note_service.create_note(
+        NoteCreate(transcript=transcript, summary="s", mindmap={"nodes": []}), "user"
+    )
+
+    (stored,) = notes.documents.values()
+    assert "transcript" not in stored
+    assert stored["transcript_length"] == len(transcript)
+    assert created.transcript == transcript
+
+    without = await note_service.get_note(created.id, "user", include_transcript=False)
+    assert without.transcript is None
+    assert transcripts.reads == 0
+
+    full = await note_service.get_note(created.id, "user")
+    assert full.transcript == transcript
+    assert await note_service.get_note(created.id, "someone-else") is None
+
+
+@pytest.mark.asyncio
+async def test_update_rewrites_the_transcript_only_when_it_changes(stores) -> None:
+    notes, transcripts = stores
+    created = await note_service.create_note(
+        NoteCreate(transcript="first", summary="s", mindmap={"nodes": []}), "user"
+    )
+    writes = transcripts.writes
+
+    updated = await note_service.update_note(
+        created.id, NoteUpdate(summary="new"), "user", include_transcript=False
+    )
+    assert updated.summary == "new"
+    assert updated.transcript is None
+    assert transcripts.writes == writes
+
+    updated = await note_service.update_note(created.id, NoteUpdate(transcript="second"), "user")
+    assert updated.transcript == "second"
+    assert transcripts.writes == writes + 1
+    assert notes.documents[ObjectId(created.id)]["transcript_excerpt"] == "second"
+
+
+@pytest.mark.asyncio
+async def test_failed_note_update_restores_the_previous_transcript(stores, monkeypatch) -> None:
+    notes, transcripts = stores
+    created = await note_service.create_note(
+        NoteCreate(transcript="first", summary="s", mindmap={"nodes": []}), "user"
+    )
+
+    async def failing_update(*args, **kwargs):
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(notes, "find_one_and_update", failing_update)
+    with pytest.raises(RuntimeError):
+        await note_service.update_note(created.id, NoteUpdate(transcript="second"), "user")
+
+    assert notes.documents[ObjectId(created.id)]["transcript_excerpt"] == "first"
+    assert await transcript_service.load(ObjectId(created.id), "user") == "first"
+    assert (
+        await note_service.update_note(created.id, NoteUpdate(transcript="stolen"), "someone-else")
+        is None
+    )
+    assert await transcript_service.load(ObjectId(created.id), "user") == "first"
+
+
+@pytest.mark.asyncio
+async def test_legacy_inline_transcripts_are_read_and_migrated(stores, monkeypatch) -> None:
+    notes, transcripts = stores
+    monkeypatch.setattr(migrate_transcripts, "get_database", lambda: {"notes": notes})
+    note_id = ObjectId()
+    now = datetime(2024, 1, 1)
+    notes.documents[note_id] = {
+        "_id": note_id,
+        "user_id": "user",
+        "transcript": "inline transcript",
+        "summary": "s",
+        "created_at": now,
+        "updated_at": now,
+    }
+
+    legacy = await note_service.get_note(str(note_id), "user")
+    assert legacy.transcript == "inline transcript"
+
+    assert await migrate_transcripts.migrate_note(dict(notes.documents[note_id]))
+    assert "transcript" not in notes.documents[note_id]
+    assert await transcript_service.load(note_id, "user") == "inline transcript"
+
+    # A transcript saved by a later edit is never overwritten by a stale migration.
+    await transcript_service.save(note_id, "user", "edited")
+    stale: Dict[str, Any] = {"_id": note_id, "user_id": "user", "transcript": "inline transcript"}
+    assert not await migrate_transcripts.migrate_note(stale)
+    assert await transcript_service.load(note_id, "user") == "edited"